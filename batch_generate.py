@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+PPT批量生成工具 v1.1
+功能：
+1. 非交互式批量生成：输入JSON配置目录或通配符（格式同 example_config.json）
+2. 多进程并行（ProcessPoolExecutor），吞吐量随CPU核数扩展
+3. 输出汇总报告（每个PPT的耗时、页数、文件大小、失败原因）
+4. 【新】字体排版模式的断行缓存跨次运行保存（子进程回传新增条目，主进程统一写盘）
+
+作者：AI资源指挥官
+版本：1.1
+更新：2026-01-15
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from ppt_generator import AutoPPTGeneratorV3, start_trace, finish_trace
+
+# 文字排版引擎（可选）
+try:
+    from text_layout import LineBreakCache, DEFAULT_LINE_CACHE_PATH
+    HAS_TEXT_LAYOUT = True
+except ImportError:
+    HAS_TEXT_LAYOUT = False
+    DEFAULT_LINE_CACHE_PATH = None
+
+# 子进程内共享的断行缓存（由 init_worker 载入）
+_worker_line_cache = None
+
+
+def init_worker(line_cache_path=None):
+    """子进程初始化：载入断行缓存，供该进程生成的所有PPT共享"""
+    global _worker_line_cache
+    if line_cache_path and HAS_TEXT_LAYOUT:
+        _worker_line_cache = LineBreakCache()
+        _worker_line_cache.load(line_cache_path)
+
+
+# ========================================================================
+# 单个PPT生成（在子进程中运行）
+# ========================================================================
+
+def generate_one(json_path, output_path, theme=None, optimize_images=False, trace_dir=None,
+                 fast_text=False, fit_text=False, incremental=False, name=None):
+    """
+    生成单个PPT，返回结果记录（不抛出异常）
+
+    Args:
+        json_path: JSON配置文件路径
+        output_path: 输出PPT路径
+        theme: 主题名称（默认使用JSON中 metadata.theme）
+        optimize_images: 是否压缩图片
+        trace_dir: 每个PPT的性能追踪JSON输出目录（可选）
+        fast_text: 文本直接生成XML（输出不变，更快）
+        fit_text: 按字体度量选取要点与标题字号（子进程已载入断行缓存时复用）
+        incremental: 输出文件已存在时只重新渲染变化的页面
+        name: 追踪名称（相对输出目录的路径，不含扩展名；默认取JSON文件名）
+    """
+    record = {
+        'config': json_path,
+        'output': output_path,
+        'status': 'failed',
+        'slides': 0,
+        'seconds': 0.0,
+        'size': 0,
+        'error': None,
+    }
+    start = time.perf_counter()
+    name = name or os.path.splitext(os.path.basename(json_path))[0]
+    if trace_dir:
+        start_trace(name)
+
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        theme = theme or data.get('metadata', {}).get('theme', 'military_solemn')
+
+        # 子进程的逐页日志没有意义，批量模式下静默
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            generator = AutoPPTGeneratorV3(theme=theme, optimize_images=optimize_images, fast_text=fast_text,
+                                           fit_text=fit_text, line_cache=_worker_line_cache)
+            generator.generate_from_json(data, output_path, incremental=incremental)
+
+        record['status'] = 'success'
+        record['slides'] = len(generator.prs.slides)
+        record['size'] = os.path.getsize(output_path)
+        if generator.incremental_report:
+            record['reused_slides'] = generator.incremental_report['reused']
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if _worker_line_cache is not None:
+            record['line_breaks'] = _worker_line_cache.drain_new()
+        if trace_dir:
+            trace_path = os.path.join(trace_dir, f"{name}.trace.json")
+            with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                finish_trace(trace_path)
+            record['trace'] = trace_path
+
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    return record
+
+
+# ========================================================================
+# 批量调度
+# ========================================================================
+
+def collect_configs(inputs):
+    """把目录/通配符/文件路径展开为JSON配置列表（去重并排序）"""
+    configs = []
+    for item in inputs:
+        if os.path.isdir(item):
+            configs.extend(glob.glob(os.path.join(item, '*.json')))
+        elif any(ch in item for ch in '*?['):
+            configs.extend(glob.glob(item, recursive=True))
+        elif os.path.exists(item):
+            configs.append(item)
+        else:
+            print(f"⚠️  路径不存在，已跳过: {item}")
+    return sorted(set(os.path.abspath(p) for p in configs))
+
+
+def output_names(configs):
+    """
+    每个配置的输出名称：相对所有配置公共目录的路径（不含扩展名），子目录结构在输出目录中保留，
+    不同目录下的同名配置不会写到同一个PPT/追踪文件
+
+    Raises:
+        ValueError: 名称仍然冲突（如仅大小写不同，或配置位于不同盘符）
+    """
+    if not configs:
+        return {}
+    try:
+        root = os.path.commonpath([os.path.dirname(p) for p in configs])
+        names = {p: os.path.splitext(os.path.relpath(p, root))[0] for p in configs}
+    except ValueError:
+        names = {p: os.path.splitext(os.path.basename(p))[0] for p in configs}
+
+    seen = {}
+    for path, name in names.items():
+        other = seen.setdefault(os.path.normcase(name).lower(), path)
+        if other != path:
+            raise ValueError(f"输出文件名冲突: {other} 与 {path}")
+    return names
+
+
+def batch_generate(inputs, output_dir, workers=None, theme=None, optimize_images=False,
+                   summary_path=None, trace_dir=None, fast_text=False, fit_text=False,
+                   line_cache_path=DEFAULT_LINE_CACHE_PATH, incremental=False):
+    """
+    批量生成PPT
+
+    Args:
+        inputs: 目录、通配符或JSON文件路径列表
+        output_dir: 输出目录（文件名与JSON同名，配置在不同子目录时保留相对目录结构）
+        workers: 进程数（默认CPU核数）
+        theme: 统一主题（默认各自使用JSON中的主题）
+        optimize_images: 是否压缩图片
+        summary_path: 汇总JSON路径（默认 output_dir/batch_summary.json）
+        trace_dir: 每个PPT的性能追踪JSON输出目录（可选）
+        fast_text: 文本直接生成XML（输出不变，更快）
+        fit_text: 按字体度量选取要点与标题字号
+        line_cache_path: fit_text 模式的断行缓存文件（默认 ~/.ppt_auto_cache/line_breaks.json，None 不缓存）
+        incremental: 输出目录已有上次的PPT时只重新渲染变化的页面
+
+    Returns:
+        dict: 汇总报告
+    """
+    configs = collect_configs(inputs)
+    names = output_names(configs)  # 先检查冲突，再提交任务
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    summary_path = summary_path or os.path.join(output_dir, 'batch_summary.json')
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+
+    line_cache = None
+    if fit_text and line_cache_path and HAS_TEXT_LAYOUT:
+        line_cache = LineBreakCache()
+        line_cache.load(line_cache_path)
+
+    started_at = datetime.now()
+
+    print("=" * 70)
+    print("📦 PPT批量生成")
+    print("=" * 70)
+    print(f"📅 开始时间: {started_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"📄 配置文件数: {len(configs)}")
+    print(f"⚡ 进程数: {workers}")
+    if line_cache is not None:
+        print(f"📝 断行缓存: {len(line_cache)} 条 ({line_cache_path})")
+    print()
+
+    start = time.perf_counter()
+    records = []
+
+    if configs:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(line_cache_path if line_cache is not None else None,)) as executor:
+            futures = {}
+            for json_path in configs:
+                name = names[json_path]
+                output_path = os.path.join(os.path.abspath(output_dir), f"{name}.pptx")
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                if trace_dir:
+                    os.makedirs(os.path.dirname(os.path.join(trace_dir, name)), exist_ok=True)
+                future = executor.submit(
+                    generate_one, json_path, output_path, theme, optimize_images, trace_dir, fast_text, fit_text,
+                    incremental, name
+                )
+                futures[future] = json_path
+
+            for i, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                line_breaks = record.pop('line_breaks', None)
+                if line_cache is not None and line_breaks:
+                    line_cache.update(line_breaks)
+                records.append(record)
+                name = os.path.basename(record['config'])
+                if record['status'] == 'success':
+                    print(f"[{i}/{len(configs)}] ✅ {name}: {record['slides']}页, "
+                          f"{record['size'] / 1024:.1f} KB, {record['seconds']:.2f}s")
+                else:
+                    print(f"[{i}/{len(configs)}] ❌ {name}: {record['error']}")
+
+    if line_cache is not None:
+        line_cache.save(line_cache_path)
+
+    records.sort(key=lambda r: r['config'])
+    elapsed = time.perf_counter() - start
+    succeeded = [r for r in records if r['status'] == 'success']
+
+    summary = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'workers': workers,
+        'total': len(records),
+        'success': len(succeeded),
+        'failed': len(records) - len(succeeded),
+        'wall_seconds': round(elapsed, 3),
+        'decks_per_second': round(len(records) / elapsed, 3) if elapsed > 0 else None,
+        'total_slides': sum(r['slides'] for r in succeeded),
+        'total_bytes': sum(r['size'] for r in succeeded),
+        'line_cache_entries': len(line_cache) if line_cache is not None else None,
+        'decks': records,
+    }
+
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "=" * 70)
+    print("📊 批量生成报告")
+    print("=" * 70)
+    print(f"✅ 成功: {summary['success']}")
+    print(f"❌ 失败: {summary['failed']}")
+    print(f"📄 总页数: {summary['total_slides']}")
+    print(f"⏱️  总耗时: {summary['wall_seconds']:.2f}s ({summary['decks_per_second']} 个/秒)")
+    print(f"📁 汇总报告: {summary_path}")
+    print("=" * 70)
+
+    return summary
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        description="批量从JSON配置生成PPT（非交互式）",
+        epilog="示例: python batch_generate.py configs/ -o output/ -j 8"
+    )
+    parser.add_argument('inputs', nargs='+', help="JSON配置目录、通配符或文件路径")
+    parser.add_argument('-o', '--output-dir', default='batch_output', help="输出目录（默认: batch_output）")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="进程数（默认: CPU核数）")
+    parser.add_argument('-t', '--theme', choices=list(AutoPPTGeneratorV3.THEMES.keys()),
+                        help="统一主题（默认使用各JSON中的主题）")
+    parser.add_argument('--optimize-images', action='store_true', help="按图片区域压缩图片")
+    parser.add_argument('--summary', default=None, help="汇总JSON路径（默认: 输出目录/batch_summary.json）")
+    parser.add_argument('--trace-dir', default=None, help="每个PPT的性能追踪JSON输出目录")
+    parser.add_argument('--fast-text', action='store_true', help="文本直接生成XML（输出不变，更快）")
+    parser.add_argument('--fit-text', action='store_true', help="按字体度量选取要点与标题字号（默认按字数估算）")
+    parser.add_argument('--line-cache', default=DEFAULT_LINE_CACHE_PATH,
+                        help="--fit-text 的断行缓存文件（默认: ~/.ppt_auto_cache/line_breaks.json）")
+    parser.add_argument('--no-line-cache', action='store_true', help="不读写断行缓存")
+    parser.add_argument('--incremental', action='store_true', help="复用输出目录中上次生成的PPT，只重新渲染变化的页面")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = batch_generate(
+            args.inputs, args.output_dir, args.workers, args.theme,
+            args.optimize_images, args.summary, args.trace_dir, args.fast_text, args.fit_text,
+            None if args.no_line_cache else args.line_cache, args.incremental
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+PPT生成器性能基准测试 v1.0
+功能：
+1. 合成测试数据：10/100/1000页PPT、不同要点长度、图表规模、模板页数
+2. 覆盖热点路径：generate_from_json、add_structured_bullets、
+   parse_outline_to_json、TemplateStyleExtractor.extract_all、图片下载引擎
+3. 报告每项耗时、单页/单条耗时、吞吐（条/秒）、峰值内存、输出文件大小
+4. 保存/对比基线JSON，发现性能回退
+5. 完全离线：图片提供方使用本地桩函数
+
+用法:
+    python benchmark.py                      # 运行全部基准
+    python benchmark.py --quick              # 小规模快速运行
+    python benchmark.py --save-baseline base.json
+    python benchmark.py --baseline base.json # 对比基线，回退时返回非0
+
+作者：AI资源指挥官
+版本：1.0
+更新：2026-01-12
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import datetime
+
+import ppt_generator
+from ppt_generator import AutoPPTGeneratorV3, parse_outline_to_json, tokenize_outline_line
+
+try:
+    from template_parser import TemplateStyleExtractor, TemplateBasedGenerator
+    HAS_TEMPLATE_PARSER = True
+except ImportError:
+    HAS_TEMPLATE_PARSER = False
+
+try:
+    from text_layout import TextMeasurer, LineBreakCache
+    HAS_TEXT_LAYOUT = True
+except ImportError:
+    HAS_TEXT_LAYOUT = False
+
+
+# 要点长度档位（字数）
+BULLET_LENGTHS = {
+    'short': 8,
+    'medium': 24,
+    'long': 60,
+}
+
+
+# ========================================================================
+# 合成测试数据
+# ========================================================================
+
+def _make_text(length, seed):
+    """生成指定长度的中文文本（含标点，便于触发换行逻辑）"""
+    base = "电磁防护体系建设需要持续投入研发，完善标准、试验能力与人才队伍；"
+    text = (base[seed % len(base):] + base) * (length // len(base) + 2)
+    return text[:length]
+
+
+def make_synthetic_deck(num_slides, bullet_length='medium', bullets_per_slide=4,
+                        chart_points=6, image_path=None):
+    """
+    生成合成的JSON配置
+
+    页面构成：首页封面、末页结束页，每10页一个章节页，每7页一个图表页，其余为图文页
+    （至少包含封面和结束页）
+    """
+    length = BULLET_LENGTHS.get(bullet_length, bullet_length)
+    slides = [{'type': 'cover', 'title': '性能基准测试', 'subtitle': '合成数据', 'slogan': '越快越好'}]
+
+    for i in range(1, max(num_slides - 1, 1)):
+        if i % 10 == 0:
+            slides.append({'type': 'section', 'title': f'第{i // 10}部分：基准章节'})
+        elif i % 7 == 0:
+            slides.append({
+                'type': 'chart',
+                'title': f'数据图表{i}',
+                'chart_type': 'column',
+                'chart_data': {
+                    'labels': [f'项目{j}' for j in range(chart_points)],
+                    'datasets': [
+                        {'name': '2025', 'values': [j * 1.5 for j in range(chart_points)]},
+                        {'name': '2026', 'values': [j * 2.0 for j in range(chart_points)]},
+                    ]
+                },
+                'note': '数据来源：合成'
+            })
+        else:
+            bullets = []
+            for j in range(bullets_per_slide):
+                text = _make_text(length, i + j)
+                # 一半要点使用"标题：内容"格式
+                bullets.append(f"要点{j + 1}：{text}" if j % 2 == 0 else text)
+            slide = {
+                'type': 'content_image',
+                'title': f'内容页{i}：{_make_text(12, i)}',
+                'bullets': bullets,
+                'image_desc': f'示意图{i}',
+                'quote': _make_text(30, i),
+            }
+            if image_path:
+                slide['image'] = image_path
+            slides.append(slide)
+
+    slides.append({'type': 'ending', 'title': '总结', 'bullets': ['要点一', '要点二'], 'quote': '谢谢'})
+
+    return {
+        'metadata': {'title': '性能基准测试', 'theme': 'tech_blue'},
+        'slides': slides,
+    }
+
+
+def make_synthetic_outline(num_sections, pages_per_section=5, bullets_per_page=4):
+    """生成合成的大纲文本"""
+    lines = ["# 性能基准测试大纲", "合成数据", ""]
+    for s in range(num_sections):
+        lines.append(f"## 第{s + 1}章 基准章节{s + 1}")
+        for p in range(pages_per_section):
+            lines.append(f"### 内容页{s + 1}-{p + 1}")
+            for b in range(bullets_per_page):
+                lines.append(f"- **要点{b + 1}**：{_make_text(20, s + p + b)}")
+            lines.append(f"> {_make_text(16, s + p)}")
+            lines.append("")
+        lines.append("---")
+    return "\n".join(lines)
+
+
+def make_image(path, size=(1024, 1024)):
+    """生成测试图片（带噪声，避免被过度压缩）"""
+    from PIL import Image
+    Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3)).save(path)
+    return path
+
+
+def make_template(path, num_slides):
+    """生成合成的模板PPT（用于模板样式提取基准）"""
+    deck = make_synthetic_deck(num_slides, 'medium')
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        AutoPPTGeneratorV3(theme='business_gray').generate_from_json(deck, path)
+    return path
+
+
+# ========================================================================
+# 图片提供方桩函数
+# ========================================================================
+
+@contextlib.contextmanager
+def stub_image_providers(image_path):
+    """把AI生成和Unsplash下载替换为复制本地图片，保证基准测试离线运行"""
+    def fake_generate(prompt, api_key, filename, **kwargs):
+        shutil.copyfile(image_path, filename)
+        return True, "AI生成成功"
+
+    def fake_unsplash(query, api_key, filename, **kwargs):
+        shutil.copyfile(image_path, filename)
+        return True, "成功 (桩)"
+
+    originals = (ppt_generator.generate_single_image_siliconflow,
+                 ppt_generator.download_single_image_unsplash)
+    ppt_generator.generate_single_image_siliconflow = fake_generate
+    ppt_generator.download_single_image_unsplash = fake_unsplash
+    try:
+        yield
+    finally:
+        (ppt_generator.generate_single_image_siliconflow,
+         ppt_generator.download_single_image_unsplash) = originals
+
+
+# ========================================================================
+# 测量
+# ========================================================================
+
+def measure(func, repeat=3):
+    """
+    测量函数性能
+
+    Args:
+        func: 无参函数，返回 (处理条数, 输出文件路径或None)
+        repeat: 计时次数（取最快一次）
+
+    Returns:
+        dict: seconds / items / per_item_ms / items_per_second / peak_kb / output_bytes
+    """
+    times = []
+    items, output = 0, None
+
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            items, output = func()
+            times.append(time.perf_counter() - start)
+
+        # 峰值内存单独测一次（tracemalloc 会拖慢计时）
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    seconds = min(times)
+    return {
+        'seconds': round(seconds, 5),
+        'items': items,
+        'per_item_ms': round(seconds * 1000 / items, 4) if items else None,
+        'items_per_second': round(items / seconds, 1) if items and seconds > 0 else None,
+        'peak_kb': round(peak / 1024, 1),
+        'output_bytes': os.path.getsize(output) if output and os.path.exists(output) else None,
+    }
+
+
+def build_cases(work_dir, sizes=(10, 100, 1000), quick=False):
+    """
+    构建基准用例列表
+
+    Returns:
+        list: [(用例名, 无参函数)]，函数返回 (处理条数, 输出文件路径或None)
+    """
+    if quick:
+        sizes = tuple(s for s in sizes if s <= 100) or (10,)
+
+    image_path = make_image(os.path.join(work_dir, 'bench_image.png'))
+    output_path = os.path.join(work_dir, 'bench_output.pptx')
+    cases = []
+
+    # 1. 整体生成（页数 × 要点长度 × 文本渲染方式，fast_text 用于A/B对比）
+    for size in sizes:
+        for length in ('short', 'long'):
+            deck = make_synthetic_deck(size, length, image_path=image_path)
+
+            for fast_text in (False, True):
+                def run(deck=deck, fast_text=fast_text):
+                    generator = AutoPPTGeneratorV3(theme='tech_blue', fast_text=fast_text)
+                    generator.generate_from_json(deck, output_path)
+                    return len(deck['slides']), output_path
+
+                suffix = ',fast_text' if fast_text else ''
+                cases.append((f"generate_from_json[slides={size},bullets={length}{suffix}]", run))
+
+    # 2. 图表规模
+    for points in ((5, 50) if not quick else (5,)):
+        deck = {'slides': [s for s in make_synthetic_deck(70, chart_points=points)['slides']
+                           if s['type'] == 'chart']}
+
+        def run(deck=deck):
+            generator = AutoPPTGeneratorV3()
+            generator.generate_from_json(deck, output_path)
+            return len(deck['slides']), output_path
+
+        cases.append((f"chart_slides[points={points}]", run))
+
+    # 3. 要点排版
+    for length in BULLET_LENGTHS:
+        bullets = [f"要点{i}：{_make_text(BULLET_LENGTHS[length], i)}" if i % 2 else _make_text(BULLET_LENGTHS[length], i)
+                   for i in range(200 if not quick else 40)]
+
+        for fast_text in (False, True):
+            def run(bullets=bullets, fast_text=fast_text):
+                generator = AutoPPTGeneratorV3(fast_text=fast_text)
+                slide = generator.prs.slides.add_slide(generator.prs.slide_layouts[6])
+                box = slide.shapes.add_textbox(0, 0, 4114800, 3200400)
+                generator.add_structured_bullets(box.text_frame, bullets)
+                return len(bullets), None
+
+            suffix = ',fast_text' if fast_text else ''
+            cases.append((f"add_structured_bullets[length={length}{suffix}]", run))
+
+        # 字体度量排版：每5条要点一个文本框（4.5×3.5英寸），冷缓存 / 复用上次运行的断行缓存
+        if HAS_TEXT_LAYOUT:
+            for warm in (False, True):
+                line_cache = LineBreakCache() if warm else None
+
+                def run(bullets=bullets, line_cache=line_cache):
+                    measurer = TextMeasurer(line_cache=line_cache)
+                    for i in range(0, len(bullets), 5):
+                        measurer.fit_size([[(bullet, 0, False)] for bullet in bullets[i:i + 5]], 324, 252, 8, 14)
+                    return len(bullets), None
+
+                suffix = ',warm_line_cache' if warm else ''
+                cases.append((f"text_layout_fit[length={length}{suffix}]", run))
+
+    # 4. 大纲解析
+    for sections in ((10, 100) if not quick else (10,)):
+        outline = make_synthetic_outline(sections)
+
+        def run(outline=outline):
+            parse_outline_to_json(outline)
+            return outline.count('\n') + 1, None
+
+        cases.append((f"parse_outline_to_json[sections={sections}]", run))
+
+        # 行分类（单条 = 一行，吞吐即 行/秒）
+        outline_lines = outline.split('\n')
+
+        def run(outline_lines=outline_lines):
+            for line in outline_lines:
+                tokenize_outline_line(line)
+            return len(outline_lines), None
+
+        cases.append((f"tokenize_outline_line[lines={len(outline_lines)}]", run))
+
+    # 5. 模板样式提取
+    if HAS_TEMPLATE_PARSER:
+        for size in ((10, 100) if not quick else (10,)):
+            template_path = make_template(os.path.join(work_dir, f'template_{size}.pptx'), size)
+
+            for backend in TemplateStyleExtractor.BACKENDS:
+                def run(template_path=template_path, size=size, backend=backend):
+                    TemplateStyleExtractor(template_path, backend=backend, use_cache=False).extract_all()
+                    return size, None
+
+                suffix = '' if backend == 'xml' else f',backend={backend}'
+                cases.append((f"template_extract_all[slides={size}{suffix}]", run))
+
+            # 分析缓存命中（首次运行写入缓存，之后的计时均为命中）
+            cache_dir = os.path.join(work_dir, 'template_cache')
+
+            def run(template_path=template_path, size=size, cache_dir=cache_dir):
+                TemplateStyleExtractor(template_path, cache_dir=cache_dir).extract_all()
+                return size, None
+
+            cases.append((f"template_extract_all[slides={size},cached]", run))
+
+            # 填充模式生成（整页克隆模板页面；生成器在用例间共用，只计生成）
+            with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                generator = TemplateBasedGenerator(template_path, cache_dir=cache_dir)
+            fill_deck = make_synthetic_deck(size, 'medium')
+            fill_output = os.path.join(work_dir, f'template_fill_{size}.pptx')
+
+            def run(generator=generator, fill_deck=fill_deck, fill_output=fill_output, size=size):
+                with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                    generator.generate_from_json(fill_deck, fill_output, mode='fill')
+                return size, None
+
+            cases.append((f"template_fill[slides={size}]", run))
+
+    # 6. 图片下载引擎（桩函数，测量调度开销）
+    tasks_count = 20 if quick else 100
+
+    def run():
+        tasks = [{'prompt': f'prompt {i}', 'path': os.path.join(work_dir, 'images', f'img_{i}.png'),
+                  'desc': f'图片{i}', 'title': f'标题{i}'} for i in range(tasks_count)]
+        with stub_image_providers(image_path):
+            ppt_generator.download_images_from_json(
+                tasks, siliconflow_key='stub', requests_per_second=0, use_cache=False
+            )
+        return tasks_count, None
+
+    cases.append((f"download_images_from_json[tasks={tasks_count},stubbed]", run))
+
+    return cases
+
+
+def run_benchmarks(sizes=(10, 100, 1000), repeat=3, quick=False, only=None):
+    """
+    运行基准测试
+
+    Args:
+        only: 只运行名称包含这些关键字的用例
+
+    Returns:
+        dict: {'created_at', 'python', 'results': {用例名: 指标}}
+    """
+    work_dir = tempfile.mkdtemp(prefix='ppt_bench_')
+    results = {}
+
+    try:
+        for name, func in build_cases(work_dir, sizes, quick):
+            if only and not any(key in name for key in only):
+                continue
+            print(f"⏱️  {name} ...", end=' ', flush=True)
+            results[name] = measure(func, repeat)
+            r = results[name]
+            print(f"{r['seconds'] * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+
+
+def compare_with_baseline(report, baseline, threshold=1.2):
+    """
+    与基线对比
+
+    Returns:
+        list: 回退的用例 [(用例名, 基线秒数, 当前秒数, 倍数)]
+    """
+    regressions = []
+    for name, current in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('seconds'):
+            continue
+        ratio = current['seconds'] / base['seconds']
+        current['baseline_ratio'] = round(ratio, 3)
+        if ratio > threshold:
+            regressions.append((name, base['seconds'], current['seconds'], ratio))
+    return regressions
+
+
+def print_report(report):
+    """打印结果表格"""
+    print("\n" + "=" * 124)
+    print("📊 基准测试结果")
+    print("=" * 124)
+    print(f"{'用例':<62}{'总耗时(ms)':>12}{'单条(ms)':>10}{'条/秒':>14}{'峰值内存(KB)':>14}{'输出(KB)':>10}{'对比基线':>10}")
+    print("-" * 124)
+    for name, r in report['results'].items():
+        per_item = f"{r['per_item_ms']:.3f}" if r['per_item_ms'] is not None else '-'
+        throughput = f"{r['items_per_second']:.0f}" if r.get('items_per_second') else '-'
+        output = f"{r['output_bytes'] / 1024:.1f}" if r['output_bytes'] else '-'
+        ratio = f"{r['baseline_ratio']:.2f}x" if 'baseline_ratio' in r else '-'
+        print(f"{name:<62}{r['seconds'] * 1000:>12.1f}{per_item:>10}{throughput:>14}{r['peak_kb']:>14.1f}"
+              f"{output:>10}{ratio:>10}")
+    print("=" * 124)
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="PPT生成器性能基准测试（离线）")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help="合成PPT的页数")
+    parser.add_argument('--repeat', type=int, default=3, help="每个用例计时次数（取最快）")
+    parser.add_argument('--quick', action='store_true', help="小规模快速运行")
+    parser.add_argument('--only', nargs='+', help="只运行名称包含这些关键字的用例")
+    parser.add_argument('--output', help="结果JSON输出路径")
+    parser.add_argument('--baseline', help="对比的基线JSON")
+    parser.add_argument('--save-baseline', help="把本次结果保存为基线")
+    parser.add_argument('--threshold', type=float, default=1.2, help="回退阈值（当前/基线耗时，默认1.2）")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.repeat, args.quick, args.only)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(report, json.load(f), args.threshold)
+
+    print_report(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"📁 结果已保存: {path}")
+
+    if regressions:
+        print(f"\n❌ 发现 {len(regressions)} 项性能回退（阈值 {args.threshold}x）:")
+        for name, base, current, ratio in regressions:
+            print(f"  {name}: {base * 1000:.1f} ms -> {current * 1000:.1f} ms ({ratio:.2f}x)")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
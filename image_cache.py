@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+图片缓存模块 v1.1
+功能：
+1. 按 (提供方, 模型, 提示词, 尺寸, 步数) 的哈希缓存生成的图片
+2. 命中缓存时直接复制到任务路径，不再调用付费API
+3. 按缓存总大小做LRU淘汰（以文件访问时间排序）
+4. 【新】插入PPT前按目标区域尺寸缩放并重新压缩图片，结果同样缓存
+
+作者：AI资源指挥官
+版本：1.1
+更新：2026-01-08
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from io import BytesIO
+
+# 图片处理（可选，python-pptx 已依赖 Pillow）
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+
+# 默认缓存目录与大小上限
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.ppt_auto_cache', 'images')
+DEFAULT_PROCESSED_DIR = os.path.join(os.path.expanduser('~'), '.ppt_auto_cache', 'processed')
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # 500MB
+
+
+# ========================================================================
+# 图片缓存
+# ========================================================================
+
+class ImageCache:
+    """
+    内容寻址的图片磁盘缓存
+    每个缓存键对应一个文件：<cache_dir>/<键前2位>/<键>.img
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录（默认 ~/.ppt_auto_cache/images）
+            max_bytes: 缓存总大小上限，超出后淘汰最久未使用的条目
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # 缓存总字节数（首次淘汰检查时扫描一次，之后按写入增量维护）
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(provider, model, prompt, image_size=None, num_inference_steps=None):
+        """根据生成参数计算缓存键"""
+        payload = json.dumps(
+            [provider, model, prompt, image_size, num_inference_steps],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key, ext='.img'):
+        return os.path.join(self.cache_dir, key[:2], f"{key}{ext}")
+
+    def fetch(self, key, dest_path):
+        """
+        命中时把缓存图片复制到 dest_path
+
+        Returns:
+            bool: 是否命中
+        """
+        entry = self._entry_path(key)
+        if not os.path.exists(entry):
+            return False
+
+        try:
+            dir_path = os.path.dirname(dest_path)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+            # 复制而非硬链接：任务路径之后可能被原地覆盖，不能影响缓存
+            # 先复制到临时文件再原子重命名，避免目标路径出现不完整的图片
+            fd, tmp_path = tempfile.mkstemp(dir=dir_path or '.', prefix='.', suffix='.part')
+            os.close(fd)
+            try:
+                shutil.copyfile(entry, tmp_path)
+                os.replace(tmp_path, dest_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            os.utime(entry)  # 刷新访问时间，用于LRU
+            return True
+        except OSError:
+            return False
+
+    def store(self, key, src_path):
+        """把已生成的图片存入缓存（原子写入），并按需淘汰"""
+        if not os.path.exists(src_path):
+            return
+
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        old_size = self._file_size(entry)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry), suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, entry)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self._record_write(entry, old_size)
+        self.evict()
+
+    def lookup(self, key, ext='.img'):
+        """返回已缓存条目的路径（刷新访问时间），不存在时返回None"""
+        entry = self._entry_path(key, ext)
+        if not os.path.exists(entry):
+            return None
+        os.utime(entry)
+        return entry
+
+    def store_bytes(self, key, data, ext='.img'):
+        """把内存中的图片数据原子写入缓存并按需淘汰，返回条目路径"""
+        entry = self._entry_path(key, ext)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        old_size = self._file_size(entry)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, entry)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._record_write(entry, old_size)
+        self.evict()
+        return entry
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _record_write(self, entry, old_size):
+        """条目写入后更新内存中的总大小"""
+        with self._lock:
+            if self._total is not None:
+                self._total += self._file_size(entry) - old_size
+
+    def _entries(self):
+        """列出所有缓存条目 (路径, 大小, 访问时间)"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                # 跳过写入中的临时文件
+                if name.startswith('.') or name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def size(self):
+        """缓存当前总字节数"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        总大小超限时，按最久未使用顺序删除条目
+
+        总大小在内存中按写入增量维护，只有首次检查或超限时才扫描目录
+        （其他进程写入同一目录时内存值偏小，超限后的扫描会重新校准）
+        """
+        with self._lock:
+            if self._total is not None and self._total <= self.max_bytes:
+                return 0
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            self._total = total
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                except OSError:
+                    pass
+            self._total = total
+            return removed
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total = 0
+
+
+# ========================================================================
+# 图片预处理（缩放 + 重新压缩）
+# ========================================================================
+
+class ImageNormalizer:
+    """
+    按幻灯片上的目标区域缩放并重新压缩图片
+    1024x1024 的PNG放进 2.8x3 英寸的区域时，按 dpi 缩到所需像素并转为JPEG，
+    显著减小输出的 .pptx；处理结果按 (源文件哈希, 目标像素, 参数) 存入 self.cache
+    """
+
+    def __init__(self, cache_dir=None, dpi=150, jpeg_quality=85, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: 处理结果缓存目录（默认 ~/.ppt_auto_cache/processed）
+            dpi: 目标分辨率（像素/英寸）
+            jpeg_quality: JPEG压缩质量
+        """
+        self.cache = ImageCache(cache_dir or DEFAULT_PROCESSED_DIR, max_bytes)
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+
+    @staticmethod
+    def _has_alpha(img):
+        """带透明通道的图片需要无损格式"""
+        return img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+
+    def normalize(self, src_path, width_inches, height_inches):
+        """
+        返回适合插入目标区域的图片路径；无需处理或处理失败时返回原路径
+
+        Args:
+            src_path: 原图路径
+            width_inches, height_inches: 幻灯片上的目标区域尺寸（英寸）
+        """
+        if not HAS_PIL:
+            return src_path
+
+        try:
+            with open(src_path, 'rb') as f:
+                data = f.read()
+
+            target = (max(1, round(width_inches * self.dpi)), max(1, round(height_inches * self.dpi)))
+
+            with Image.open(BytesIO(data)) as img:
+                lossless = self._has_alpha(img)
+                fmt = 'PNG' if lossless else 'JPEG'
+
+                # 已经足够小且格式合适，直接使用原图
+                if img.width <= target[0] and img.height <= target[1] and img.format == fmt:
+                    return src_path
+
+                src_hash = hashlib.sha256(data).hexdigest()
+                key = ImageCache.make_key('normalized', fmt, src_hash, f"{target[0]}x{target[1]}", self.jpeg_quality)
+                ext = '.png' if lossless else '.jpg'
+                entry = self.cache.lookup(key, ext)
+                if entry:
+                    return entry
+
+                # 只缩小不放大
+                size = (min(img.width, target[0]), min(img.height, target[1]))
+                out = img.convert('RGBA' if lossless else 'RGB')
+                if size != out.size:
+                    out = out.resize(size, Image.LANCZOS)
+
+                buffer = BytesIO()
+                if lossless:
+                    out.save(buffer, 'PNG', optimize=True)
+                else:
+                    out.save(buffer, 'JPEG', quality=self.jpeg_quality, optimize=True)
+
+            # 处理后反而更大（例如本来就很小的图），保留原图
+            if buffer.tell() >= len(data):
+                return src_path
+
+            return self.cache.store_bytes(key, buffer.getvalue(), ext)
+        except Exception:
+            return src_path
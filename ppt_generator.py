@@ -19,8 +19,22 @@ PPT自动生成器 v4.0 - 模板版
 import json
 import sys
 import os
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import math
 import time
+import base64
+import random
+import hashlib
+import tempfile
+import functools
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 
 # GUI支持
@@ -45,12 +59,568 @@ except ImportError:
     HAS_TEMPLATE_PARSER = False
     print("💡 提示：如需使用模板功能，请确保 template_parser.py 在同一目录下")
 
+from slide_registry import SlideRendererRegistry, format_render_stats
+
+# 图片缓存模块（可选）
+try:
+    from image_cache import ImageCache, ImageNormalizer
+    HAS_IMAGE_CACHE = True
+except ImportError:
+    HAS_IMAGE_CACHE = False
+
+# 文字排版引擎（可选）
+try:
+    from text_layout import TextMeasurer
+    HAS_TEXT_LAYOUT = True
+except ImportError:
+    HAS_TEXT_LAYOUT = False
+
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.chart.data import CategoryChartData
 from pptx.enum.chart import XL_CHART_TYPE
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
+from pptx.oxml.shapes.autoshape import CT_Shape
+from pptx.text.text import Font, TextFrame, _Paragraph
+from pptx.dml.fill import FillFormat
+from pptx.dml.line import LineFormat
+from copy import deepcopy
+from lxml.etree import SubElement
+
+
+# ========================================================================
+# 性能追踪（分阶段计时 + 计数器 + 可选 cProfile / tracemalloc）
+# ========================================================================
+
+class RunTrace:
+    """
+    一次运行的结构化追踪
+    - span(): 嵌套计时区间（单调时钟），按线程记录父子关系
+    - count(): 计数器
+    - 可选 cProfile（仅采样启动追踪的线程）与 tracemalloc 峰值内存
+    结果通过 to_dict()/save() 输出为JSON
+    """
+    
+    def __init__(self, name='run', profile=False, trace_memory=False):
+        self.name = name
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.counters = {}
+        self.started_at = datetime.now()
+        self._start = time.monotonic()
+        self._end = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 0
+        self._profiler = None
+        self._memory = None
+    
+    def start(self):
+        """开始采样（cProfile / tracemalloc）"""
+        if self.profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        return self
+    
+    def stop(self):
+        """结束采样并记录总耗时"""
+        self._end = time.monotonic()
+        if self._profiler:
+            self._profiler.disable()
+        if self.trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+                tracemalloc.stop()
+                self._memory = {
+                    'current_kb': round(current / 1024, 1),
+                    'peak_kb': round(peak / 1024, 1),
+                    'top': [{'where': str(stat.traceback), 'kb': round(stat.size / 1024, 1)} for stat in top],
+                }
+        return self
+    
+    @contextmanager
+    def span(self, name, **attrs):
+        """计时区间，可嵌套；attrs 为附加字段（如页面类型）"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+        
+        record = {
+            'id': span_id,
+            'name': name,
+            'parent': stack[-1] if stack else None,
+            'thread': threading.current_thread().name,
+            'start': round(time.monotonic() - self._start, 6),
+            'duration': None,
+        }
+        if attrs:
+            record['attrs'] = attrs
+        
+        stack.append(span_id)
+        begin = time.monotonic()
+        try:
+            yield record
+        finally:
+            record['duration'] = round(time.monotonic() - begin, 6)
+            stack.pop()
+            with self._lock:
+                self.spans.append(record)
+    
+    def count(self, name, value=1):
+        """累加计数器"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def stage_totals(self):
+        """按名称汇总各阶段耗时 {名称: {'count', 'total'}}"""
+        totals = {}
+        for span in self.spans:
+            item = totals.setdefault(span['name'], {'count': 0, 'total': 0.0})
+            item['count'] += 1
+            item['total'] = round(item['total'] + span['duration'], 6)
+        return totals
+    
+    def to_dict(self, profile_top=30):
+        end = self._end if self._end is not None else time.monotonic()
+        result = {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_seconds': round(end - self._start, 6),
+            'stages': self.stage_totals(),
+            'counters': dict(self.counters),
+            'spans': sorted(self.spans, key=lambda s: s['id']),
+        }
+        
+        if self._profiler:
+            import pstats
+            stats = pstats.Stats(self._profiler)
+            rows = []
+            for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+                rows.append({
+                    'function': f"{os.path.basename(filename)}:{line}({func})",
+                    'calls': nc,
+                    'self_seconds': round(tt, 6),
+                    'cumulative_seconds': round(ct, 6),
+                })
+            rows.sort(key=lambda r: r['cumulative_seconds'], reverse=True)
+            result['profile'] = rows[:profile_top]
+        
+        if self._memory:
+            result['memory'] = self._memory
+        
+        return result
+    
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+# 当前生效的追踪（未启用时为None，各埋点几乎无开销）
+_current_trace = None
+_NULL_SPAN = nullcontext()
+
+
+def start_trace(name='run', profile=False, trace_memory=False):
+    """开始一次运行的追踪，之后各阶段的埋点自动记录"""
+    global _current_trace
+    _current_trace = RunTrace(name, profile, trace_memory).start()
+    return _current_trace
+
+
+def finish_trace(path=None):
+    """结束当前追踪，可选保存为JSON，返回 RunTrace"""
+    global _current_trace
+    trace, _current_trace = _current_trace, None
+    if trace is None:
+        return None
+    trace.stop()
+    if path:
+        trace.save(path)
+        print(f"📈 性能追踪已保存: {path}")
+    return trace
+
+
+def trace_span(name, **attrs):
+    """当前追踪的计时区间；未启用追踪时返回空上下文"""
+    trace = _current_trace
+    if trace is None:
+        return _NULL_SPAN
+    return trace.span(name, **attrs)
+
+
+def trace_count(name, value=1):
+    """当前追踪的计数器；未启用追踪时忽略"""
+    trace = _current_trace
+    if trace is not None:
+        trace.count(name, value)
+
+
+def traced(name):
+    """装饰器：把函数调用记录为一个计时区间"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace
+            if trace is None:
+                return func(*args, **kwargs)
+            with trace.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ========================================================================
+# 样式预编译
+# ========================================================================
+
+# 直接生成XML时使用的标签
+_TAG_P = qn('a:p')
+_TAG_R = qn('a:r')
+_TAG_T = qn('a:t')
+
+# 与 python-pptx 相同的控制字符转义（_x001B_ 形式）
+_CTRL_CHARS = re.compile(r'([\x00-\x08\x0B-\x1F])')
+
+
+def _escape_ctrl_chars(text):
+    return _CTRL_CHARS.sub(lambda m: '_x%04X_' % ord(m.group(1)), text)
+
+
+class TextStyle:
+    """
+    预编译的文字样式（字号/粗体/斜体/颜色/对齐）
+    构建时用 python-pptx 在游离元素上设置一次，应用时整体复制XML，
+    替代每页逐项设置 font.size / bold / color
+    """
+    
+    __slots__ = ('_rPr', '_defRPr', 'alignment', 'spec')
+    
+    def __init__(self, size=None, bold=None, italic=None, color=None, alignment=None):
+        self._rPr = self._build('a:rPr', size, bold, italic, color)
+        self._defRPr = self._build('a:defRPr', size, bold, italic, color)
+        self.alignment = alignment
+        self.spec = (size, bold, italic, color, alignment)
+    
+    def resized(self, size):
+        """同样式、不同字号的新样式"""
+        return TextStyle(size, *self.spec[1:])
+    
+    @staticmethod
+    def _build(tag, size, bold, italic, color):
+        element = OxmlElement(tag)
+        font = Font(element)
+        if size is not None:
+            font.size = Pt(size)
+        if bold is not None:
+            font.bold = bold
+        if italic is not None:
+            font.italic = italic
+        if color is not None:
+            font.color.rgb = color
+        return element
+    
+    def apply_to_paragraph(self, paragraph):
+        """等价于设置 paragraph.font.* 和 paragraph.alignment（覆盖段落已有的默认字体）"""
+        self.apply_to_p(paragraph._p)
+    
+    def apply_to_p(self, p):
+        """同 apply_to_paragraph，直接作用于 a:p 元素"""
+        pPr = p.get_or_add_pPr()
+        pPr._remove_defRPr()
+        pPr._insert_defRPr(deepcopy(self._defRPr))
+        if self.alignment is not None:
+            pPr.algn = self.alignment
+    
+    def apply_to_run(self, run):
+        """等价于设置 run.font.*（覆盖文字段已有的字体）"""
+        r = run._r
+        r._remove_rPr()
+        r._insert_rPr(deepcopy(self._rPr))
+    
+    def append_run(self, p, text):
+        """在 a:p 末尾直接追加带本样式的 a:r（等价于 add_run + text + apply_to_run）"""
+        r = SubElement(p, _TAG_R)
+        r.append(deepcopy(self._rPr))
+        SubElement(r, _TAG_T).text = _escape_ctrl_chars(text)
+
+
+class ParagraphStyle:
+    """预编译的段落格式（级别/段前/段后/行距），应用时整体替换 a:pPr"""
+    
+    __slots__ = ('_pPr',)
+    
+    def __init__(self, level=0, space_before=None, space_after=None, line_spacing=None):
+        paragraph = _Paragraph(OxmlElement('a:p'), None)
+        paragraph.level = level
+        if space_before is not None:
+            paragraph.space_before = Pt(space_before)
+        if space_after is not None:
+            paragraph.space_after = Pt(space_after)
+        if line_spacing is not None:
+            paragraph.line_spacing = line_spacing
+        self._pPr = paragraph._p.pPr
+    
+    def apply(self, paragraph):
+        """覆盖段落的 a:pPr（仅用于新建段落）"""
+        p = paragraph._p
+        p._remove_pPr()
+        p._insert_pPr(deepcopy(self._pPr))
+    
+    def append_paragraph(self, txBody):
+        """在 txBody 末尾直接追加带本格式的空 a:p"""
+        p = SubElement(txBody, _TAG_P)
+        p.append(deepcopy(self._pPr))
+        return p
+
+
+class ShapeStyle:
+    """预编译的形状填充与边框，应用时把 a:solidFill / a:ln 追加到新建形状的 spPr"""
+    
+    __slots__ = ('_children',)
+    
+    def __init__(self, fill=None, line=None, line_width=None, dash_style=None):
+        spPr = OxmlElement('p:spPr')
+        if fill is not None:
+            fill_format = FillFormat.from_fill_parent(spPr)
+            fill_format.solid()
+            fill_format.fore_color.rgb = fill
+        line_format = LineFormat(spPr)
+        if line is not None:
+            line_format.color.rgb = line
+        if line_width is not None:
+            line_format.width = line_width
+        if dash_style is not None:
+            line_format.dash_style = dash_style
+        self._children = tuple(spPr)
+    
+    def apply(self, shape):
+        """应用到 add_shape 新建的形状"""
+        spPr = shape._element.spPr
+        for child in self._children:
+            spPr.append(deepcopy(child))
+
+
+class BackgroundStyle:
+    """预编译的纯色背景，应用时整体替换 p:bg"""
+    
+    __slots__ = ('_bg',)
+    
+    def __init__(self, color):
+        cSld = OxmlElement('p:cSld')
+        fill_format = FillFormat.from_fill_parent(cSld.get_or_add_bgPr())
+        fill_format.solid()
+        fill_format.fore_color.rgb = color
+        self._bg = cSld.bg
+    
+    def apply(self, slide):
+        cSld = slide._element.cSld
+        cSld._remove_bg()
+        cSld._insert_bg(deepcopy(self._bg))
+
+
+def _emu_rect(area):
+    """(左, 上, 宽, 高) 英寸 → EMU 元组"""
+    return tuple(Inches(v) for v in area)
+
+
+class CompiledTheme:
+    """
+    主题与布局的预编译结果，每个生成器构建一次：
+    - layouts: LAYOUTS 中每个布局的 EMU 几何（文字区、图片区）
+    - frames: 各页面固定位置的 EMU 矩形
+    - text / paragraph / shape / background: 按用途命名的样式包
+    - new_textbox: 快速文本模式下由模板复制文本框 p:sp
+    """
+    
+    # 各页面固定元素的位置（英寸）
+    FRAMES = {
+        'cover_title': (0.3, 1.5, 9.4, 1.5),
+        'cover_subtitle': (0.5, 3.2, 9, 0.8),
+        'cover_slogan': (2, 4.5, 6, 0.6),
+        'section_deco': (0, 2.3, 10, 1),
+        'section_title': (0.3, 2.3, 9.4, 1),
+        'content_title': (0.3, 0.3, 9.4, 0.8),
+        'content_underline': (0.3, 1.1, 2, 0),
+        'content_quote': (0.3, 5.15, 9.4, 0.4),
+        'chart_title': (0.5, 0.4, 9, 0.6),
+        'chart_area': (1.5, 1.5, 7, 3.5),
+        'chart_note': (1, 5.1, 8, 0.4),
+        'ending_title': (0.5, 0.6, 9, 0.8),
+        'ending_bullets': (1.5, 1.6, 7, 2.8),
+        'ending_quote': (1, 4.6, 8, 0.8),
+    }
+    
+    def __init__(self, theme, layouts):
+        white = RGBColor(255, 255, 255)
+        
+        self.layouts = {
+            key: {
+                'name': config['name'],
+                'text_area': _emu_rect(config['text_area']),
+                'image_area': _emu_rect(config['image_area']),
+            }
+            for key, config in layouts.items()
+        }
+        self.frames = {key: _emu_rect(area) for key, area in self.FRAMES.items()}
+        
+        self.background = {
+            'primary': BackgroundStyle(theme['primary']),
+            'bg': BackgroundStyle(theme['bg']),
+        }
+        
+        self.text = {
+            # 标题字号随长度变化，按字号各编译一份
+            **{f'cover_title_{size}': TextStyle(size, bold=True, color=white, alignment=PP_ALIGN.CENTER)
+               for size in (32, 36, 40)},
+            **{f'section_title_{size}': TextStyle(size, bold=True, color=white, alignment=PP_ALIGN.CENTER)
+               for size in (32, 38, 44)},
+            **{f'content_title_{size}': TextStyle(size, bold=True, color=theme['primary'])
+               for size in (24, 28, 32)},
+            'cover_subtitle': TextStyle(18, color=RGBColor(230, 230, 230), alignment=PP_ALIGN.CENTER),
+            'cover_slogan': TextStyle(14, italic=True, color=theme['accent'], alignment=PP_ALIGN.CENTER),
+            'content_quote': TextStyle(12, italic=True, color=theme['quote']),
+            'chart_title': TextStyle(32, bold=True, color=theme['primary']),
+            'chart_note': TextStyle(10, italic=True, color=RGBColor(120, 120, 120)),
+            'ending_title': TextStyle(36, bold=True, color=theme['primary']),
+            'ending_quote': TextStyle(16, bold=True, italic=True, color=theme['accent'], alignment=PP_ALIGN.CENTER),
+            # 要点
+            'bullet_heading': TextStyle(9, bold=True, color=theme['primary']),
+            'bullet_short': TextStyle(9, color=theme['text']),
+            'bullet_body': TextStyle(8, color=theme['text']),
+            # 图片占位符
+            'placeholder_icon': TextStyle(28, alignment=PP_ALIGN.CENTER),
+            'placeholder_desc': TextStyle(12, bold=True, color=theme['primary'], alignment=PP_ALIGN.CENTER),
+            'placeholder_hint': TextStyle(8, italic=True, color=RGBColor(120, 120, 120), alignment=PP_ALIGN.CENTER),
+            'placeholder_prompt': TextStyle(8, italic=True, color=RGBColor(80, 120, 160), alignment=PP_ALIGN.CENTER),
+            'prompt_text': TextStyle(8, italic=True, color=RGBColor(100, 100, 100)),
+        }
+        
+        self.paragraph = {
+            'bullet': ParagraphStyle(0, space_before=1, space_after=1, line_spacing=1.05),
+            'bullet_wrapped': ParagraphStyle(0, space_before=0, space_after=2, line_spacing=1.05),
+            'bullet_continued': ParagraphStyle(0, space_before=0, space_after=1),
+        }
+        
+        self.shape = {
+            'section_deco': ShapeStyle(fill=theme['primary'], line=theme['primary']),
+            'content_underline': ShapeStyle(line=theme['accent'], line_width=Pt(3)),
+            'placeholder_box': ShapeStyle(fill=RGBColor(245, 248, 250), line=theme['primary'],
+                                          line_width=Pt(2), dash_style=2),
+            'placeholder_icon': ShapeStyle(fill=theme['primary'], line=theme['primary']),
+        }
+        
+        self._textboxes = {}
+        self._sized = {}
+    
+    def text_at(self, key, size):
+        """按字号取 text[key] 的变体（字体排版选出的字号），按 (key, 字号) 缓存"""
+        style = self._sized.get((key, size))
+        if style is None:
+            style = self._sized[(key, size)] = self.text[key].resized(size)
+        return style
+    
+    def new_textbox(self, shape_id, rect, word_wrap=False, anchor=None):
+        """
+        复制文本框模板并设置编号与位置，返回不含段落的 p:sp
+        模板由 python-pptx 生成（与 add_textbox 结构一致），按 (自动换行, 垂直对齐) 缓存
+        """
+        key = (word_wrap, anchor)
+        template = self._textboxes.get(key)
+        if template is None:
+            template = CT_Shape.new_textbox_sp(0, '', 0, 0, 0, 0)
+            text_frame = TextFrame(template.txBody, None)
+            if word_wrap:
+                text_frame.word_wrap = True
+            if anchor is not None:
+                text_frame.vertical_anchor = anchor
+            for p in template.txBody.findall(_TAG_P):
+                template.txBody.remove(p)
+            self._textboxes[key] = template
+        
+        sp = deepcopy(template)
+        cNvPr = sp.nvSpPr.cNvPr
+        cNvPr.set('id', str(shape_id))
+        cNvPr.set('name', 'TextBox %d' % (shape_id - 1))
+        xfrm = sp.spPr.xfrm
+        xfrm.off.set('x', str(rect[0]))
+        xfrm.off.set('y', str(rect[1]))
+        xfrm.ext.set('cx', str(rect[2]))
+        xfrm.ext.set('cy', str(rect[3]))
+        return sp
+
+
+# ========================================================================
+# 媒体去重
+# ========================================================================
+
+def deduplicate_media(prs):
+    """
+    保证包内每张内容相同的图片只有一个媒体部件
+    python-pptx 的 add_picture 已按SHA1复用图片，这里再对整个演示文稿做一次检查，
+    覆盖其他途径复制进来的图片（例如模板页面克隆）；重复部件的引用改指向第一个部件，
+    不再被引用的部件在保存时不会写入
+    
+    Returns:
+        dict: references(图片引用数) / unique(唯一媒体数) / merged(合并的重复部件数)
+              / bytes_saved(合并掉的重复部件的字节数；add_picture 自身的复用不计入)
+    """
+    parts_by_digest = {}
+    digest_by_part = {}  # 同一部件被多页引用时只哈希一次
+    merged_parts = set()
+    report = {'references': 0, 'unique': 0, 'merged': 0, 'bytes_saved': 0}
+    
+    for slide in prs.slides:
+        slide_part = slide.part
+        image_rels = [
+            rel for rel in slide_part.rels.values()
+            if not rel.is_external and rel.reltype == RT.IMAGE
+        ]
+        
+        for rel in image_rels:
+            part = rel.target_part
+            digest = digest_by_part.get(id(part))
+            if digest is None:
+                digest = digest_by_part[id(part)] = hashlib.sha1(part.blob).hexdigest()
+            report['references'] += 1
+            
+            first = parts_by_digest.get(digest)
+            if first is None:
+                parts_by_digest[digest] = part
+                continue
+            
+            if part is first:
+                continue
+            if id(part) not in merged_parts:
+                merged_parts.add(id(part))
+                report['bytes_saved'] += len(part.blob)
+            
+            # 关系改指向第一个部件：新建关系、改写XML中的引用、删除旧关系
+            new_rId = slide_part.relate_to(first, RT.IMAGE)
+            for attr in (qn('r:embed'), qn('r:link')):
+                for element in slide_part._element.iter():
+                    if element.get(attr) == rel.rId:
+                        element.set(attr, new_rId)
+            slide_part.rels.pop(rel.rId)
+    
+    report['unique'] = len(parts_by_digest)
+    report['merged'] = len(merged_parts)
+    return report
 
 
 # ========================================================================
@@ -134,18 +704,61 @@ class AutoPPTGeneratorV3:
         }
     }
     
-    def __init__(self, theme='military_solemn'):
-        """初始化生成器"""
+    # 字体排版模式的字号范围（磅）：标题、要点正文（要点标题比正文大1pt）
+    FIT_TITLE_SIZES = (18, 32)
+    FIT_BULLET_SIZES = (8, 14)
+    
+    def __init__(self, theme='military_solemn', optimize_images=False, image_dpi=150, fast_text=False,
+                 fit_text=False, line_cache=None):
+        """
+        初始化生成器
+        
+        Args:
+            theme: 主题名称
+            optimize_images: 插入前按图片区域缩放并重新压缩图片（减小输出文件）
+            image_dpi: 图片优化的目标分辨率
+            fast_text: 文本框、要点直接生成XML（不经过 python-pptx 的文本对象），输出与默认模式一致
+            fit_text: 按字体度量排版要点与内容页标题，取文字区放得下的最大字号（默认按字数估算）
+            line_cache: fit_text 模式的断行缓存（text_layout.LineBreakCache），可在多个生成器间共享
+        """
         self.prs = Presentation()
         self.prs.slide_width = Inches(10)
         self.prs.slide_height = Inches(5.625)
         self.theme = self.THEMES.get(theme, self.THEMES['military_solemn'])
+        self.styles = CompiledTheme(self.theme, self.LAYOUTS)  # 预编译的几何与样式
+        self.fast_text = fast_text
+        self.text_layout = TextMeasurer(line_cache=line_cache) if fit_text and HAS_TEXT_LAYOUT else None
+        if fit_text and not HAS_TEXT_LAYOUT:
+            print("💡 提示：未找到 text_layout.py，按字数估算字号")
+        self._image_parts = {}  # (路径, 修改时间, 大小) -> 已加入包内的图片部件
         self.slide_index = 0
+        self.media_report = None
+        self.render_stats = {}  # 按页面类型统计 {'count', 'seconds'}
+        self.skipped_types = {}  # 没有渲染函数而跳过的页面类型 -> 页数
+        self.incremental_report = None
+        self.image_normalizer = None
+        if optimize_images and HAS_IMAGE_CACHE:
+            self.image_normalizer = ImageNormalizer(dpi=image_dpi)
         
         print(f"🎨 使用主题: {self.theme.get('name', theme)}")
     
-    def generate_from_json(self, json_path_or_data, output_path):
-        """从JSON生成完整PPT (支持文件路径或直接传入数据)"""
+    # 页面类型 -> 渲染函数，内置类型在类定义后注册，插件可追加自定义类型
+    RENDERERS = SlideRendererRegistry('AutoPPTGeneratorV3')
+    
+    # 增量生成：页面指纹写在 p:cSld 的 name 属性中，指纹算法变化时递增版本
+    FINGERPRINT_PREFIX = 'auto-ppt:'
+    FINGERPRINT_VERSION = 1
+    
+    def generate_from_json(self, json_path_or_data, output_path, image_futures=None, incremental=False):
+        """
+        从JSON生成完整PPT (支持文件路径或直接传入数据)
+        
+        Args:
+            image_futures: 可选，{幻灯片位置: Future}，Future结果为 (结果类型, 详情dict)；
+                           传入时启用流水线渲染，图文页等待各自的图片就绪
+            incremental: 增量生成：output_path 已有上次的输出时，内容未变的页面直接复用，
+                         只重新渲染变化的页面（增量模式下不做流水线，先等待全部图片）
+        """
         if isinstance(json_path_or_data, dict):
             # 直接传入的JSON数据
             data = json_path_or_data
@@ -161,30 +774,231 @@ class AutoPPTGeneratorV3:
         print(f"🚀 开始生成 PPT...")
         print(f"{'='*60}\n")
         
-        for slide_data in slides_data:
-            slide_type = slide_data.get('type')
-            
-            if slide_type == 'cover':
-                self.create_cover_slide(slide_data)
-            elif slide_type == 'section':
-                self.create_section_slide(slide_data)
-            elif slide_type == 'content_image':
-                self.create_content_with_image_slide(slide_data)
-            elif slide_type == 'chart':
-                self.create_chart_slide(slide_data)
-            elif slide_type == 'ending':
-                self.create_ending_slide(slide_data)
-        
-        self.prs.save(output_path)
+        previous = self._load_previous(output_path) if incremental else None
+        
+        with trace_span('render_slides', slides=len(slides_data)):
+            if incremental:
+                for pos, future in (image_futures or {}).items():
+                    _, detail = future.result()
+                    slides_data[pos]['image'] = detail['file']
+                self._render_incremental(slides_data, previous or {})
+            elif image_futures:
+                self._render_pipelined(slides_data, image_futures)
+            else:
+                for slide_data in slides_data:
+                    self._render_slide(slide_data)
+        
+        self._save_and_report(output_path)
+    
+    def generate_from_slides(self, slides, output_path):
+        """
+        逐页渲染任意页面数据的可迭代对象（如 iter_outline_slides 的输出），
+        解析与渲染交替进行，不需要先得到完整的页面列表
+        
+        示例：
+            with open('manual.md', encoding='utf-8') as f:
+                generator.generate_from_slides(iter_outline_slides(f), 'manual.pptx')
+        """
+        print(f"\n{'='*60}")
+        print(f"🚀 开始生成 PPT...")
+        print(f"{'='*60}\n")
+        
+        with trace_span('render_slides'):
+            for slide_data in slides:
+                self._render_slide(slide_data)
+        
+        self._save_and_report(output_path)
+    
+    def _save_and_report(self, output_path):
+        """媒体去重、保存并输出生成报告"""
+        with trace_span('dedupe_media'):
+            self.media_report = deduplicate_media(self.prs)
+        with trace_span('save'):
+            self.prs.save(output_path)
+        trace_count('decks_saved')
         
         print(f"\n{'='*60}")
         print(f"✅ PPT生成成功！")
         print(f"{'='*60}")
         print(f"📊 总页数: {len(self.prs.slides)}")
         print(f"🎨 主题: {self.theme.get('name', 'default')}")
+        if self.incremental_report:
+            report = self.incremental_report
+            print(f"♻️  增量生成: 复用 {report['reused']} 页，重新渲染 {report['rendered']} 页，"
+                  f"删除 {report['dropped']} 页")
+        if self.render_stats:
+            print(f"⏱️  渲染耗时: {format_render_stats(self.render_stats)}")
+        if self.skipped_types:
+            skipped = "，".join(f"{slide_type} {count}页" for slide_type, count in self.skipped_types.items())
+            print(f"⚠️  未注册的页面类型已跳过: {skipped}")
+        if self.media_report['references']:
+            saved = ""
+            if self.media_report['merged']:
+                saved = f"，去重节省 {self.media_report['bytes_saved'] / 1024:.1f} KB"
+            print(f"🖼️  图片: {self.media_report['references']} 处引用，"
+                  f"{self.media_report['unique']} 个媒体文件{saved}")
         print(f"📁 输出路径: {output_path}")
         print(f"{'='*60}\n")
     
+    def _render_slide(self, slide_data):
+        """按类型查注册表渲染单页，未注册的类型记录后返回None"""
+        slide_type = slide_data.get('type')
+        if self.RENDERERS.get(slide_type) is None:
+            self._skip_slide(slide_type)
+            return None
+        
+        if _current_trace is not None:
+            with trace_span('render_slide', type=slide_type):
+                slide = self.RENDERERS.render(self, slide_type, slide_data, self.render_stats)
+            trace_count('slides_rendered' if slide is not None else 'slides_skipped')
+            return slide
+        return self.RENDERERS.render(self, slide_type, slide_data, self.render_stats)
+    
+    def _skip_slide(self, slide_type):
+        """记录没有渲染函数的页面类型，每种类型首次出现时提示"""
+        if slide_type not in self.skipped_types:
+            print(f"  ⚠️ 页面类型未注册渲染函数，已跳过: {slide_type!r}")
+        self.skipped_types[slide_type] = self.skipped_types.get(slide_type, 0) + 1
+        trace_count('slides_skipped')
+    
+    def _render_pipelined(self, slides_data, image_futures):
+        """
+        流水线渲染：不依赖图片的页面立即渲染，图文页在图片就绪后渲染，
+        全部完成后按JSON顺序重排页面
+        """
+        first_slide = len(self.prs.slides)
+        
+        # 预先计算每页在顺序渲染时的 slide_index，保证自动布局与顺序模式一致
+        index_at = {}
+        next_index = self.slide_index
+        for pos, slide_data in enumerate(slides_data):
+            index_at[pos] = next_index
+            if slide_data.get('type') in self.RENDERERS:
+                next_index += 1
+        
+        rendered = []  # 实际生成页面的原始位置（按渲染顺序）
+        
+        def render_at(pos, future=None):
+            slide_data = slides_data[pos]
+            if future is not None:
+                _, detail = future.result()
+                slide_data['image'] = detail['file']
+            self.slide_index = index_at[pos]
+            if self._render_slide(slide_data) is not None:
+                rendered.append(pos)
+        
+        pending = {}
+        for pos in range(len(slides_data)):
+            future = image_futures.get(pos)
+            if future is not None and not future.done():
+                pending[future] = pos
+            else:
+                render_at(pos, future)
+        
+        if pending:
+            print(f"  ⏳ 等待 {len(pending)} 张图片...")
+        for future in as_completed(pending):
+            render_at(pending[future], future)
+        
+        self.slide_index = next_index
+        
+        # 按原始位置重排新生成的页面
+        sld_id_lst = self.prs.slides._sldIdLst
+        new_ids = list(sld_id_lst)[first_slide:]
+        for sld_id in new_ids:
+            sld_id_lst.remove(sld_id)
+        for _, sld_id in sorted(zip(rendered, new_ids), key=lambda item: item[0]):
+            sld_id_lst.append(sld_id)
+    
+    def slide_fingerprint(self, slide_data):
+        """
+        页面指纹：页面数据 + 主题 + 生效的布局 + 影响输出的选项 + 图片文件的修改时间和大小
+        自动布局取决于 slide_index，须在渲染该页之前调用
+        """
+        payload = {
+            'version': self.FINGERPRINT_VERSION,
+            'slide': slide_data,
+            'theme': self.theme,
+            'fit_text': self.text_layout is not None,
+            'image_dpi': self.image_normalizer.dpi if self.image_normalizer else None,
+        }
+        if slide_data.get('type') == 'content_image':
+            payload['layout'] = slide_data.get('layout', self.auto_select_layout(slide_data))
+        image_path = self._resolve_image_path(slide_data.get('image'))
+        if image_path:
+            st = os.stat(image_path)
+            payload['image_file'] = [st.st_mtime_ns, st.st_size]
+        
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+    
+    def _load_previous(self, output_path):
+        """
+        载入上次的输出作为本次的演示文稿，返回 {指纹: [p:sldId, ...]}（没有指纹的页面归在None下）
+        文件不存在、无法打开或生成器已有页面时返回None（全部重新渲染）
+        """
+        if len(self.prs.slides) or not os.path.exists(output_path):
+            return None
+        try:
+            prs = Presentation(output_path)
+        except Exception as e:
+            print(f"  ⚠️ 无法读取上次的输出，全部重新渲染: {e}")
+            return None
+        if (prs.slide_width, prs.slide_height) != (self.prs.slide_width, self.prs.slide_height):
+            return None
+        
+        previous = {}
+        for sld_id, slide in zip(prs.slides._sldIdLst, prs.slides):
+            name = slide._element.cSld.get('name', '')
+            fingerprint = name[len(self.FINGERPRINT_PREFIX):] if name.startswith(self.FINGERPRINT_PREFIX) else None
+            previous.setdefault(fingerprint, []).append(sld_id)
+        
+        self.prs = prs
+        self._image_parts = {}
+        return previous
+    
+    def _render_incremental(self, slides_data, previous):
+        """
+        增量渲染：指纹与上次相同的页面复用原有的页面部件，其余页面重新渲染并写入指纹，
+        上次有而本次没有的页面删除，最后按JSON顺序排列
+        """
+        sld_id_lst = self.prs.slides._sldIdLst
+        old_ids = [sld_id for sld_ids in previous.values() for sld_id in sld_ids]
+        order = []
+        report = {'reused': 0, 'rendered': 0, 'dropped': 0}
+        
+        for slide_data in slides_data:
+            if slide_data.get('type') not in self.RENDERERS:
+                self._skip_slide(slide_data.get('type'))
+                continue
+            fingerprint = self.slide_fingerprint(slide_data)
+            candidates = previous.get(fingerprint)
+            if candidates:  # 同一指纹有多页时按顺序取用
+                order.append(candidates.pop(0))
+                self.slide_index += 1
+                report['reused'] += 1
+                trace_count('slides_reused')
+                continue
+            
+            slide = self._render_slide(slide_data)
+            if slide is not None:
+                slide._element.cSld.set('name', self.FINGERPRINT_PREFIX + fingerprint)
+                order.append(sld_id_lst[-1])
+                report['rendered'] += 1
+        
+        # 删除不再使用的旧页面（页面部件不再被引用，保存时不会写入）
+        kept = set(order)
+        for sld_id in old_ids:
+            if sld_id not in kept:
+                sld_id_lst.remove(sld_id)
+                self.prs.part.drop_rel(sld_id.rId)
+                report['dropped'] += 1
+        
+        for sld_id in order:
+            sld_id_lst.append(sld_id)  # lxml 的 append 会移动已有元素
+        
+        self.incremental_report = report
+    
     def auto_select_layout(self, data):
         """智能选择布局（循环切换）"""
         layouts = list(self.LAYOUTS.keys())
@@ -193,17 +1007,21 @@ class AutoPPTGeneratorV3:
     def add_structured_bullets(self, text_frame, bullets):
         """添加结构化文字（支持"标题：内容"格式）- 智能换行和字号"""
         text_frame.word_wrap = True
-        
-        # 更小的字体大小，避免溢出
-        title_size = 9
-        content_size = 8
-        
-        for i, bullet in enumerate(bullets):
-            if i == 0:
-                p = text_frame.paragraphs[0]
-                p.text = ''  # 清空默认文本
-            else:
-                p = text_frame.add_paragraph()
+        self._fill_bullets(text_frame._txBody, bullets)
+    
+    @staticmethod
+    def _plan_bullets(bullets):
+        """
+        把要点拆成段落：[(段落格式, [(文字样式, 文本), ...]), ...]
+        标题9pt、正文8pt（更小的字体避免溢出）；"标题：内容"格式标题加粗，
+        内容超过25字另起一段；无标题的要点超过35字按标点拆成多段
+        （拆分出的首段不设段落格式，段落格式为None）
+        """
+        plan = []
+        
+        for bullet in bullets:
+            runs = []
+            wrapped = None
             
             # 检测"标题：内容"格式
             if '：' in bullet or ':' in bullet:
@@ -214,41 +1032,23 @@ class AutoPPTGeneratorV3:
                     content_text = parts[1].strip()
                     
                     # 标题部分（加粗）
-                    run1 = p.add_run()
-                    run1.text = title_text + '：'
-                    run1.font.bold = True
-                    run1.font.size = Pt(title_size)
-                    run1.font.color.rgb = self.theme['primary']
+                    runs.append(('bullet_heading', title_text + '：'))
                     
                     # 如果内容过长（超过25字），强制换行到新段落
                     if len(content_text) > 25:
-                        # 添加换行，内容放在下一行
-                        p2 = text_frame.add_paragraph()
-                        run2 = p2.add_run()
-                        run2.text = '  ' + content_text  # 缩进
-                        run2.font.size = Pt(content_size)
-                        run2.font.color.rgb = self.theme['text']
-                        p2.level = 0
-                        p2.space_before = Pt(0)
-                        p2.space_after = Pt(2)
-                        p2.line_spacing = 1.05
+                        wrapped = ('bullet_wrapped', [('bullet_body', '  ' + content_text)])  # 缩进
                     else:
                         # 内容部分（普通，同一行）
-                        run2 = p.add_run()
-                        run2.text = content_text
-                        run2.font.size = Pt(content_size)
-                        run2.font.color.rgb = self.theme['text']
+                        runs.append(('bullet_body', content_text))
                 else:
                     # 普通文字
-                    run = p.add_run()
-                    run.text = bullet
-                    run.font.size = Pt(title_size)
-                    run.font.color.rgb = self.theme['text']
+                    runs.append(('bullet_short', bullet))
             else:
                 # 普通文字 - 超长也要换行
                 if len(bullet) > 35:
                     # 分割成多行
                     words = bullet
+                    para_key = None
                     while len(words) > 35:
                         # 找到合适的分割点
                         split_pos = 35
@@ -258,198 +1058,238 @@ class AutoPPTGeneratorV3:
                                 split_pos = pos + 1
                                 break
                         
-                        run = p.add_run()
-                        run.text = words[:split_pos]
-                        run.font.size = Pt(content_size)
-                        run.font.color.rgb = self.theme['text']
+                        runs.append(('bullet_body', words[:split_pos]))
                         
                         words = words[split_pos:]
                         if words:
-                            p = text_frame.add_paragraph()
-                            p.level = 0
-                            p.space_before = Pt(0)
-                            p.space_after = Pt(1)
+                            plan.append((para_key, runs))
+                            runs = []
+                            para_key = 'bullet_continued'
                     
                     if words:
-                        run = p.add_run()
-                        run.text = words
-                        run.font.size = Pt(content_size)
-                        run.font.color.rgb = self.theme['text']
+                        runs.append(('bullet_body', words))
                 else:
-                    run = p.add_run()
-                    run.text = bullet
-                    run.font.size = Pt(title_size)
-                    run.font.color.rgb = self.theme['text']
+                    runs.append(('bullet_short', bullet))
             
-            p.level = 0
-            p.space_before = Pt(1)
-            p.space_after = Pt(1)
-            p.line_spacing = 1.05
+            plan.append(('bullet', runs))
+            if wrapped:
+                plan.append(wrapped)
+        
+        return plan
+    
+    def _plan_fitted_bullets(self, bullets, rect):
+        """
+        按字体度量排版要点：每条要点一段，由文本框自动换行，
+        在 FIT_BULLET_SIZES 范围内二分查找能放下全部要点的最大字号
+        
+        Returns:
+            tuple: (段落计划, 按选定字号编译的文字样式dict)
+        """
+        plan = []
+        paragraphs = []
+        
+        for bullet in bullets:
+            if '：' in bullet or ':' in bullet:
+                title_text, content_text = bullet.split('：', 1) if '：' in bullet else bullet.split(':', 1)
+                runs = [('bullet_heading', title_text.strip() + '：'), ('bullet_body', content_text.strip())]
+            else:
+                runs = [('bullet_body', bullet)]
+            plan.append(('bullet', runs))
+            paragraphs.append([(run_text, 1 if style_key == 'bullet_heading' else 0, style_key == 'bullet_heading')
+                               for style_key, run_text in runs])
+        
+        size = self.text_layout.fit_size(paragraphs, rect[2].pt, rect[3].pt, *self.FIT_BULLET_SIZES,
+                                         line_spacing=1.05, space_before=1, space_after=1)
+        text = {
+            'bullet_heading': self.styles.text_at('bullet_heading', size + 1),
+            'bullet_body': self.styles.text_at('bullet_body', size),
+        }
+        return plan, text
+    
+    def _fill_bullets(self, txBody, bullets, rect=None):
+        """
+        按段落计划写入要点，fast_text 模式直接生成XML
+        
+        Args:
+            rect: 文本框 (左, 上, 宽, 高) EMU；字体排版模式据此选字号，None 时按字数估算
+        """
+        if self.text_layout is not None and rect is not None:
+            plan, text = self._plan_fitted_bullets(bullets, rect)
+        else:
+            plan, text = self._plan_bullets(bullets), self.styles.text
+        if not plan:
+            return
+        
+        paragraph = self.styles.paragraph
+        
+        if self.fast_text:
+            for p in txBody.findall(_TAG_P):
+                txBody.remove(p)
+            for para_key, runs in plan:
+                if para_key is None:
+                    p = SubElement(txBody, _TAG_P)
+                else:
+                    p = paragraph[para_key].append_paragraph(txBody)
+                for style_key, run_text in runs:
+                    text[style_key].append_run(p, run_text)
+            return
+        
+        text_frame = TextFrame(txBody, None)
+        for i, (para_key, runs) in enumerate(plan):
+            if i == 0:
+                p = text_frame.paragraphs[0]
+                p.text = ''  # 清空默认文本
+            else:
+                p = text_frame.add_paragraph()
+            for style_key, run_text in runs:
+                run = p.add_run()
+                run.text = run_text
+                text[style_key].apply_to_run(run)
+            if para_key is not None:
+                paragraph[para_key].apply(p)
+    
+    def _add_blank_slide(self):
+        """添加空白页；fast_text 模式开启 python-pptx 的 turbo_add，形状编号无需每次扫描整页"""
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        if self.fast_text:
+            slide.shapes.turbo_add_enabled = True
+        return slide
+    
+    def _add_text_box(self, slide, rect, text=None, style=None, word_wrap=False, anchor=None):
+        """
+        添加文本框，写入文字并对首段应用样式，返回 txBody 元素
+        
+        Args:
+            rect: (左, 上, 宽, 高) EMU
+            text: 文本（按换行拆分段落，同 text_frame.text）；None 时保留一个空段落
+            style: 首段的 TextStyle
+        """
+        if not self.fast_text:
+            tf = slide.shapes.add_textbox(*rect).text_frame
+            if word_wrap:
+                tf.word_wrap = True
+            if text is not None:
+                tf.text = text
+            if style is not None:
+                style.apply_to_paragraph(tf.paragraphs[0])
+            if anchor is not None:
+                tf.vertical_anchor = anchor
+            return tf._txBody
+        
+        shapes = slide.shapes
+        sp = self.styles.new_textbox(shapes._next_shape_id, rect, word_wrap, anchor)
+        txBody = sp.txBody
+        for line in (text or '').split('\n'):
+            SubElement(txBody, _TAG_P).append_text(line)
+        if style is not None:
+            style.apply_to_p(txBody.find(_TAG_P))
+        shapes._spTree.insert_element_before(sp, 'p:extLst')
+        return txBody
     
     def create_cover_slide(self, data):
         """封面页"""
-        layout = self.prs.slide_layouts[6]
-        slide = self.prs.slides.add_slide(layout)
+        slide = self._add_blank_slide()
+        
+        styles = self.styles
         
         # 背景
-        background = slide.background
-        fill = background.fill
-        fill.solid()
-        fill.fore_color.rgb = self.theme['primary']
+        styles.background['primary'].apply(slide)
         
         # 主标题 - 自动调整字号
         title_text = data.get('title', '')
-        title_box = slide.shapes.add_textbox(
-            Inches(0.3), Inches(1.5), Inches(9.4), Inches(1.5)
-        )
-        tf = title_box.text_frame
-        tf.word_wrap = True
-        tf.text = title_text
-        
-        p = tf.paragraphs[0]
         # 根据标题长度自动调整字号
         if len(title_text) > 20:
-            p.font.size = Pt(32)
+            size = 32
         elif len(title_text) > 15:
-            p.font.size = Pt(36)
+            size = 36
         else:
-            p.font.size = Pt(40)
-        p.font.bold = True
-        p.font.color.rgb = RGBColor(255, 255, 255)
-        p.alignment = PP_ALIGN.CENTER
+            size = 40
+        self._add_text_box(slide, styles.frames['cover_title'], title_text,
+                           styles.text[f'cover_title_{size}'], word_wrap=True)
         
         # 副标题
         if data.get('subtitle'):
-            subtitle_box = slide.shapes.add_textbox(
-                Inches(0.5), Inches(3.2), Inches(9), Inches(0.8)
-            )
-            tf = subtitle_box.text_frame
-            tf.word_wrap = True
-            tf.text = data['subtitle']
-            
-            p = tf.paragraphs[0]
-            p.font.size = Pt(18)
-            p.font.color.rgb = RGBColor(230, 230, 230)
-            p.alignment = PP_ALIGN.CENTER
+            self._add_text_box(slide, styles.frames['cover_subtitle'], data['subtitle'],
+                               styles.text['cover_subtitle'], word_wrap=True)
         
         # 口号
         if data.get('slogan'):
-            slogan_box = slide.shapes.add_textbox(
-                Inches(2), Inches(4.5), Inches(6), Inches(0.6)
-            )
-            tf = slogan_box.text_frame
-            tf.text = data['slogan']
-            
-            p = tf.paragraphs[0]
-            p.font.size = Pt(14)
-            p.font.italic = True
-            p.font.color.rgb = self.theme['accent']
-            p.alignment = PP_ALIGN.CENTER
+            self._add_text_box(slide, styles.frames['cover_slogan'], data['slogan'],
+                               styles.text['cover_slogan'])
         
         self.slide_index += 1
         return slide
     
     def create_section_slide(self, data):
         """章节页"""
-        layout = self.prs.slide_layouts[6]
-        slide = self.prs.slides.add_slide(layout)
+        slide = self._add_blank_slide()
+        
+        styles = self.styles
         
         # 背景
-        background = slide.background
-        fill = background.fill
-        fill.solid()
-        fill.fore_color.rgb = self.theme['bg']
+        styles.background['bg'].apply(slide)
         
         # 装饰条
-        deco = slide.shapes.add_shape(
-            1, Inches(0), Inches(2.3),
-            Inches(10), Inches(1)
-        )
-        deco.fill.solid()
-        deco.fill.fore_color.rgb = self.theme['primary']
-        deco.line.color.rgb = self.theme['primary']
+        deco = slide.shapes.add_shape(1, *styles.frames['section_deco'])
+        styles.shape['section_deco'].apply(deco)
         
         # 标题 - 自动调整字号
         title_text = data.get('title', '')
-        title_box = slide.shapes.add_textbox(
-            Inches(0.3), Inches(2.3), Inches(9.4), Inches(1)
-        )
-        tf = title_box.text_frame
-        tf.word_wrap = True
-        tf.text = title_text
-        
-        p = tf.paragraphs[0]
         # 根据标题长度自动调整字号
         if len(title_text) > 16:
-            p.font.size = Pt(32)
+            size = 32
         elif len(title_text) > 12:
-            p.font.size = Pt(38)
+            size = 38
         else:
-            p.font.size = Pt(44)
-        p.font.bold = True
-        p.font.color.rgb = RGBColor(255, 255, 255)
-        p.alignment = PP_ALIGN.CENTER
-        tf.vertical_anchor = MSO_ANCHOR.MIDDLE
+            size = 44
+        self._add_text_box(slide, styles.frames['section_title'], title_text,
+                           styles.text[f'section_title_{size}'], word_wrap=True, anchor=MSO_ANCHOR.MIDDLE)
         
         self.slide_index += 1
         return slide
     
     def create_content_with_image_slide(self, data):
         """图文混排页（智能布局）"""
-        layout = self.prs.slide_layouts[6]
-        slide = self.prs.slides.add_slide(layout)
+        slide = self._add_blank_slide()
+        
+        styles = self.styles
         
         # 背景
-        background = slide.background
-        fill = background.fill
-        fill.solid()
-        fill.fore_color.rgb = self.theme['bg']
+        styles.background['bg'].apply(slide)
         
         # 标题 - 自动调整字号
         title_text = data.get('title', '')
-        title_box = slide.shapes.add_textbox(
-            Inches(0.3), Inches(0.3), Inches(9.4), Inches(0.8)
-        )
-        tf = title_box.text_frame
-        tf.word_wrap = True
-        tf.text = title_text
-        
-        p = tf.paragraphs[0]
-        # 根据标题长度自动调整字号
-        if len(title_text) > 18:
-            p.font.size = Pt(24)
-        elif len(title_text) > 12:
-            p.font.size = Pt(28)
+        frame = styles.frames['content_title']
+        if self.text_layout is not None:
+            # 按字体度量取标题框放得下的最大字号
+            size = self.text_layout.fit_size([[(title_text, 0, True)]], frame[2].pt, frame[3].pt,
+                                             *self.FIT_TITLE_SIZES, step=1)
+            title_style = styles.text_at('content_title_32', size)
         else:
-            p.font.size = Pt(32)
-        p.font.bold = True
-        p.font.color.rgb = self.theme['primary']
+            # 根据标题长度自动调整字号
+            if len(title_text) > 18:
+                size = 24
+            elif len(title_text) > 12:
+                size = 28
+            else:
+                size = 32
+            title_style = styles.text[f'content_title_{size}']
+        self._add_text_box(slide, frame, title_text, title_style, word_wrap=True)
         
         # 标题下划线
-        line = slide.shapes.add_shape(
-            1, Inches(0.3), Inches(1.1),
-            Inches(2), Inches(0)
-        )
-        line.line.color.rgb = self.theme['accent']
-        line.line.width = Pt(3)
+        line = slide.shapes.add_shape(1, *styles.frames['content_underline'])
+        styles.shape['content_underline'].apply(line)
         
         # 智能选择布局
         layout_type = data.get('layout', self.auto_select_layout(data))
         layout_config = self.LAYOUTS[layout_type]
+        layout_emu = styles.layouts[layout_type]
         
         print(f"  → 第{self.slide_index+1}页使用布局: {layout_config['name']}")
         
         # 文字区域
-        text_area = layout_config['text_area']
-        content_box = slide.shapes.add_textbox(
-            Inches(text_area[0]), Inches(text_area[1]),
-            Inches(text_area[2]), Inches(text_area[3])
-        )
-        tf = content_box.text_frame
-        tf.word_wrap = True
-        
-        bullets = data.get('bullets', [])
-        self.add_structured_bullets(tf, bullets)
+        txBody = self._add_text_box(slide, layout_emu['text_area'], word_wrap=True)
+        self._fill_bullets(txBody, data.get('bullets', []), layout_emu['text_area'])
         
         # 图片区域
         image_area = layout_config['image_area']
@@ -457,33 +1297,18 @@ class AutoPPTGeneratorV3:
         image_prompt = data.get('image_prompt', '')
         
         # 检查图片路径是否存在（尝试多个可能的路径）
-        image_exists = False
-        actual_path = None
+        actual_path = self._resolve_image_path(image_path)
         
-        if image_path:
-            # 尝试的路径列表
-            possible_paths = [
-                image_path,                                    # 原始路径
-                os.path.basename(image_path),                  # 当前目录
-                os.path.join(os.getcwd(), os.path.basename(image_path)),  # 工作目录
-                os.path.join('C:\\Users\\王波', os.path.basename(image_path)),  # 用户目录
-            ]
-            
-            for p in possible_paths:
-                if os.path.exists(p):
-                    actual_path = p
-                    image_exists = True
-                    break
-        
-        if image_exists and actual_path:
+        if actual_path:
             try:
                 print(f"  📷 插入图片: {os.path.basename(actual_path)}")
-                slide.shapes.add_picture(
-                    actual_path,  # 使用找到的实际路径
-                    Inches(image_area[0]), Inches(image_area[1]),
-                    width=Inches(image_area[2]),
-                    height=Inches(image_area[3])
-                )
+                if self.image_normalizer:
+                    # 按图片区域缩放、压缩（结果有缓存）
+                    actual_path = self.image_normalizer.normalize(
+                        actual_path, image_area[2], image_area[3]
+                    )
+                trace_count('images_embedded')
+                self._add_picture(slide, actual_path, *layout_emu['image_area'])
                 # 不再显示提示词（避免与金句重叠）
             except Exception as e:
                 print(f"  ⚠️ 图片插入失败: {e}")
@@ -496,6 +1321,7 @@ class AutoPPTGeneratorV3:
         else:
             if image_path:
                 print(f"  ⚠️ 图片不存在: {image_path}")
+            trace_count('image_placeholders')
             self._add_image_placeholder(
                 slide,
                 data.get('image_desc', '图片'),
@@ -506,60 +1332,76 @@ class AutoPPTGeneratorV3:
         # 金句（智能避让） - 放在页面底部固定位置，不与图片重叠
         if data.get('quote') and layout_type not in ['large_image_small_text']:
             # 金句固定在页面最底部
-            quote_y = 5.15
-            
-            quote_box = slide.shapes.add_textbox(
-                Inches(0.3), Inches(quote_y), 
-                Inches(9.4), Inches(0.4)
-            )
-            tf = quote_box.text_frame
-            tf.word_wrap = True
-            
             # 截断过长的金句
             quote_text = data["quote"]
             if len(quote_text) > 60:
                 quote_text = quote_text[:57] + '...'
-            tf.text = f'💡 {quote_text}'
-            tf.word_wrap = True
-            
-            p = tf.paragraphs[0]
-            p.font.size = Pt(12)
-            p.font.italic = True
-            p.font.color.rgb = self.theme['quote']
+            self._add_text_box(slide, styles.frames['content_quote'], f'💡 {quote_text}',
+                               styles.text['content_quote'], word_wrap=True)
         
         self.slide_index += 1
         return slide
     
+    @staticmethod
+    def _resolve_image_path(image_path):
+        """按原始路径、当前目录、工作目录、用户目录的顺序查找图片，找不到返回None"""
+        if not image_path:
+            return None
+        
+        # 尝试的路径列表
+        possible_paths = [
+            image_path,                                    # 原始路径
+            os.path.basename(image_path),                  # 当前目录
+            os.path.join(os.getcwd(), os.path.basename(image_path)),  # 工作目录
+            os.path.join('C:\\Users\\王波', os.path.basename(image_path)),  # 用户目录
+        ]
+        
+        for p in possible_paths:
+            if os.path.exists(p):
+                return p
+        return None
+    
+    def _add_picture(self, slide, image_path, left, top, width, height):
+        """
+        插入图片；同一文件在多页重复使用时复用已有的图片部件，
+        省去 add_picture 每次读取文件并计算SHA1的开销
+        """
+        st = os.stat(image_path)
+        key = (os.path.abspath(image_path), st.st_mtime_ns, st.st_size)
+        image_part = self._image_parts.get(key)
+        
+        if image_part is None:
+            picture = slide.shapes.add_picture(image_path, left, top, width=width, height=height)
+            self._image_parts[key] = slide.part.related_part(picture._element.blip_rId)
+            return picture
+        
+        shapes = slide.shapes
+        rId = slide.part.relate_to(image_part, RT.IMAGE)
+        pic = shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+        shapes._recalculate_extents()
+        return shapes._shape_factory(pic)
+    
     def _add_prompt_text(self, slide, area_config, prompt):
         """在图片下方显示生成提示词"""
-        prompt_box = slide.shapes.add_textbox(
+        rect = (
             Inches(area_config[0]),
             Inches(area_config[1] + area_config[3] + 0.05),
             Inches(area_config[2]),
             Inches(0.4)
         )
-        tf = prompt_box.text_frame
-        tf.text = f"Prompt: {prompt}"
-        tf.word_wrap = True
-        
-        p = tf.paragraphs[0]
-        p.font.size = Pt(8)
-        p.font.italic = True
-        p.font.color.rgb = RGBColor(100, 100, 100)
+        self._add_text_box(slide, rect, f"Prompt: {prompt}", self.styles.text['prompt_text'], word_wrap=True)
     
     def _add_image_placeholder(self, slide, description, area_config, prompt=None):
         """添加专业图片占位符 + 显示生成提示词"""
+        styles = self.styles
+        
         # 背景框
         placeholder = slide.shapes.add_shape(
             1,
             Inches(area_config[0]), Inches(area_config[1]),
             Inches(area_config[2]), Inches(area_config[3])
         )
-        placeholder.fill.solid()
-        placeholder.fill.fore_color.rgb = RGBColor(245, 248, 250)
-        placeholder.line.color.rgb = self.theme['primary']
-        placeholder.line.width = Pt(2)
-        placeholder.line.dash_style = 2
+        styles.shape['placeholder_box'].apply(placeholder)
         
         # 图标框
         icon_size = 0.5
@@ -569,78 +1411,45 @@ class AutoPPTGeneratorV3:
             Inches(area_config[1] + area_config[3]/2 - icon_size - 0.3),
             Inches(icon_size), Inches(icon_size)
         )
-        icon_box.fill.solid()
-        icon_box.fill.fore_color.rgb = self.theme['primary']
-        icon_box.line.color.rgb = self.theme['primary']
+        styles.shape['placeholder_icon'].apply(icon_box)
         
         # 图标文字
-        icon_text = slide.shapes.add_textbox(
+        rect = (
             Inches(area_config[0] + area_config[2]/2 - icon_size/2),
             Inches(area_config[1] + area_config[3]/2 - icon_size - 0.3),
             Inches(icon_size), Inches(icon_size)
         )
-        tf = icon_text.text_frame
-        tf.text = "🖼️"
-        p = tf.paragraphs[0]
-        p.font.size = Pt(28)
-        p.alignment = PP_ALIGN.CENTER
-        tf.vertical_anchor = MSO_ANCHOR.MIDDLE
+        self._add_text_box(slide, rect, "🖼️", styles.text['placeholder_icon'], anchor=MSO_ANCHOR.MIDDLE)
         
         # 描述文字
-        text_box = slide.shapes.add_textbox(
+        rect = (
             Inches(area_config[0] + 0.3), 
             Inches(area_config[1] + area_config[3]/2 + 0.1),
             Inches(area_config[2] - 0.6), Inches(0.8)
         )
-        tf = text_box.text_frame
-        tf.text = description
-        tf.word_wrap = True
-        
-        p = tf.paragraphs[0]
-        p.font.size = Pt(12)
-        p.font.bold = True
-        p.font.color.rgb = self.theme['primary']
-        p.alignment = PP_ALIGN.CENTER
+        self._add_text_box(slide, rect, description, styles.text['placeholder_desc'], word_wrap=True)
         
         # 提示文字 - 显示实际提示词（如果有）
         hint_text = prompt if prompt else "(参考提示词替换图片)"
-        hint_box = slide.shapes.add_textbox(
+        rect = (
             Inches(area_config[0] + 0.3),
             Inches(area_config[1] + area_config[3]/2 + 0.7),
             Inches(area_config[2] - 0.6), Inches(0.6)
         )
-        tf = hint_box.text_frame
-        tf.text = hint_text
-        tf.word_wrap = True
-        
-        p = tf.paragraphs[0]
-        p.font.size = Pt(8)
-        p.font.italic = True
-        p.font.color.rgb = RGBColor(80, 120, 160) if prompt else RGBColor(120, 120, 120)
-        p.alignment = PP_ALIGN.CENTER
+        self._add_text_box(slide, rect, hint_text,
+                           styles.text['placeholder_prompt' if prompt else 'placeholder_hint'], word_wrap=True)
     
     def create_chart_slide(self, data):
         """图表页"""
-        layout = self.prs.slide_layouts[6]
-        slide = self.prs.slides.add_slide(layout)
+        slide = self._add_blank_slide()
+        
+        styles = self.styles
         
         # 背景
-        background = slide.background
-        fill = background.fill
-        fill.solid()
-        fill.fore_color.rgb = self.theme['bg']
+        styles.background['bg'].apply(slide)
         
         # 标题
-        title_box = slide.shapes.add_textbox(
-            Inches(0.5), Inches(0.4), Inches(9), Inches(0.6)
-        )
-        tf = title_box.text_frame
-        tf.text = data.get('title', '')
-        
-        p = tf.paragraphs[0]
-        p.font.size = Pt(32)
-        p.font.bold = True
-        p.font.color.rgb = self.theme['primary']
+        self._add_text_box(slide, styles.frames['chart_title'], data.get('title', ''), styles.text['chart_title'])
         
         # 图表
         chart_data_config = data.get('chart_data', {})
@@ -652,7 +1461,7 @@ class AutoPPTGeneratorV3:
         for dataset in chart_data_config.get('datasets', []):
             chart_data.add_series(dataset['name'], dataset['values'])
         
-        x, y, cx, cy = Inches(1.5), Inches(1.5), Inches(7), Inches(3.5)
+        x, y, cx, cy = styles.frames['chart_area']
         
         if chart_type == 'column':
             chart = slide.shapes.add_chart(
@@ -661,99 +1470,210 @@ class AutoPPTGeneratorV3:
         
         # 备注
         if data.get('note'):
-            note_box = slide.shapes.add_textbox(
-                Inches(1), Inches(5.1), Inches(8), Inches(0.4)
-            )
-            tf = note_box.text_frame
-            tf.text = data['note']
-            
-            p = tf.paragraphs[0]
-            p.font.size = Pt(10)
-            p.font.italic = True
-            p.font.color.rgb = RGBColor(120, 120, 120)
+            self._add_text_box(slide, styles.frames['chart_note'], data['note'], styles.text['chart_note'])
         
         self.slide_index += 1
         return slide
     
     def create_ending_slide(self, data):
         """结束页"""
-        layout = self.prs.slide_layouts[6]
-        slide = self.prs.slides.add_slide(layout)
+        slide = self._add_blank_slide()
+        
+        styles = self.styles
         
         # 背景
-        background = slide.background
-        fill = background.fill
-        fill.solid()
-        fill.fore_color.rgb = self.theme['bg']
+        styles.background['bg'].apply(slide)
         
         # 标题
-        title_box = slide.shapes.add_textbox(
-            Inches(0.5), Inches(0.6), Inches(9), Inches(0.8)
-        )
-        tf = title_box.text_frame
-        tf.text = data.get('title', '')
-        
-        p = tf.paragraphs[0]
-        p.font.size = Pt(36)
-        p.font.bold = True
-        p.font.color.rgb = self.theme['primary']
+        self._add_text_box(slide, styles.frames['ending_title'], data.get('title', ''), styles.text['ending_title'])
         
         # 要点列表
         if data.get('bullets'):
-            content_box = slide.shapes.add_textbox(
-                Inches(1.5), Inches(1.6), Inches(7), Inches(2.8)
-            )
-            tf = content_box.text_frame
-            tf.word_wrap = True
-            
-            self.add_structured_bullets(tf, data['bullets'])
+            txBody = self._add_text_box(slide, styles.frames['ending_bullets'], word_wrap=True)
+            self._fill_bullets(txBody, data['bullets'], styles.frames['ending_bullets'])
         
         # 金句
         if data.get('quote'):
-            quote_box = slide.shapes.add_textbox(
-                Inches(1), Inches(4.6), Inches(8), Inches(0.8)
-            )
-            tf = quote_box.text_frame
-            tf.text = f'💡 {data["quote"]}'
-            
-            p = tf.paragraphs[0]
-            p.font.size = Pt(16)
-            p.font.italic = True
-            p.font.bold = True
-            p.font.color.rgb = self.theme['accent']
-            p.alignment = PP_ALIGN.CENTER
+            self._add_text_box(slide, styles.frames['ending_quote'], f'💡 {data["quote"]}', styles.text['ending_quote'])
         
         self.slide_index += 1
         return slide
 
 
+# 内置页面类型
+AutoPPTGeneratorV3.RENDERERS.register('cover', AutoPPTGeneratorV3.create_cover_slide)
+AutoPPTGeneratorV3.RENDERERS.register('section', AutoPPTGeneratorV3.create_section_slide)
+AutoPPTGeneratorV3.RENDERERS.register('content_image', AutoPPTGeneratorV3.create_content_with_image_slide)
+AutoPPTGeneratorV3.RENDERERS.register('chart', AutoPPTGeneratorV3.create_chart_slide)
+AutoPPTGeneratorV3.RENDERERS.register('ending', AutoPPTGeneratorV3.create_ending_slide)
+
+# 外部渲染器插件（逗号分隔的模块名）
+if os.environ.get('PPT_RENDERER_PLUGINS'):
+    AutoPPTGeneratorV3.RENDERERS.load_plugins(os.environ['PPT_RENDERER_PLUGINS'])
+
+
 # ========================================================================
 # 图片下载模块
 # ========================================================================
 
-def download_single_image_unsplash(query, api_key, filename):
+# 硅基流动生成参数（同时作为图片缓存键的一部分）
+SILICONFLOW_MODEL = "black-forest-labs/FLUX.1-schnell"
+SILICONFLOW_IMAGE_SIZE = "1024x1024"
+SILICONFLOW_STEPS = 20
+
+# Unsplash搜索参数（同时作为图片缓存键的一部分）
+UNSPLASH_ORIENTATION = "landscape"
+UNSPLASH_IMAGE_SIZE = "regular"
+
+# 图片提供方接口地址（测试时可指向本地桩服务）
+SILICONFLOW_API_URL = "https://api.siliconflow.cn/v1/images/generations"
+UNSPLASH_API_URL = "https://api.unsplash.com/search/photos"
+
+
+class ProviderClient:
+    """
+    图片提供方HTTP客户端
+    每个主机一个 requests.Session（连接池 + keep-alive + 自动重试），
+    在一次运行的所有任务之间以及常驻进程的多次运行之间复用
+    """
+    
+    def __init__(self, pool_size=10, max_retries=2, backoff_factor=0.5):
+        """
+        Args:
+            pool_size: 每个主机的连接池大小（应不小于并发数）
+            max_retries: 连接错误和5xx的自动重试次数（POST只重试连接错误）
+            backoff_factor: 重试退避系数（秒）
+        """
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._sessions = {}
+        self._lock = threading.Lock()
+    
+    def _create_session(self):
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def session_for(self, url):
+        """获取该URL所属主机的会话（按需创建）"""
+        parsed = urlparse(url)
+        host = f"{parsed.scheme}://{parsed.netloc}"
+        
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._create_session()
+                self._sessions[host] = session
+            return session
+    
+    def get(self, url, **kwargs):
+        return self.session_for(url).get(url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.session_for(url).post(url, **kwargs)
+    
+    def close(self):
+        """关闭所有连接"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_provider_client():
+    """获取进程内共享的默认客户端"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = ProviderClient()
+        return _default_client
+
+
+def _atomic_write_chunks(filename, chunks):
+    """
+    把数据块写入同目录的临时文件，写完后原子重命名为 filename
+    出错时删除临时文件，目标路径上永远不会出现写了一半的图片
+    """
+    dir_path = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix='.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if chunk:
+                    f.write(chunk)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _download_to_file(client, url, filename, timeout=15, chunk_size=64 * 1024):
+    """流式下载URL到文件（iter_content分块写盘），返回是否成功"""
+    with client.get(url, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            return False
+        _atomic_write_chunks(filename, response.iter_content(chunk_size))
+    return True
+
+
+def _iter_b64_decode(b64_text, chunk_size=64 * 1024):
+    """
+    分块解码base64字符串，避免一次性生成完整字节串
+    换行等空白（按行折断的编码器常见）先去掉；每块只解码4的倍数个字符，余下的并入下一块
+    """
+    chunk_size -= chunk_size % 4
+    pending = ''
+    for i in range(0, len(b64_text), chunk_size):
+        pending += ''.join(b64_text[i:i + chunk_size].split())
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            yield base64.b64decode(pending[:usable])
+            pending = pending[usable:]
+    if pending:
+        yield base64.b64decode(pending)  # 总长度不合法时与整体解码一样抛出 binascii.Error
+
+
+@traced('unsplash_download')
+def download_single_image_unsplash(query, api_key, filename, client=None):
     """从Unsplash下载单张图片"""
+    client = client or get_provider_client()
     try:
-        url = "https://api.unsplash.com/search/photos"
+        url = UNSPLASH_API_URL
         params = {
             'query': query,
             'client_id': api_key,
             'per_page': 1,
-            'orientation': 'landscape'
+            'orientation': UNSPLASH_ORIENTATION
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = client.get(url, params=params, timeout=15)
         
         if response.status_code == 200:
             data = response.json()
             if data.get('results'):
-                img_url = data['results'][0]['urls']['regular']
+                img_url = data['results'][0]['urls'][UNSPLASH_IMAGE_SIZE]
                 photographer = data['results'][0]['user']['name']
                 
-                img_response = requests.get(img_url, timeout=15)
-                if img_response.status_code == 200:
-                    with open(filename, 'wb') as f:
-                        f.write(img_response.content)
+                if _download_to_file(client, img_url, filename):
                     return True, f"成功 (摄影师: {photographer})"
         
         return False, f"API返回错误: {response.status_code}"
@@ -764,50 +1684,66 @@ def download_single_image_unsplash(query, api_key, filename):
         return False, f"异常: {str(e)}"
 
 
-def generate_single_image_siliconflow(prompt, api_key, filename, max_retries=3):
-    """使用硅基流动API生成单张图片（带重试机制）"""
+@traced('siliconflow_generate')
+def generate_single_image_siliconflow(prompt, api_key, filename, max_retries=3, client=None,
+                                      limiter=None):
+    """
+    使用硅基流动API生成单张图片（带重试机制）
+    
+    传入 limiter（AdaptiveRateLimiter）时，每次请求前取令牌，
+    并把成功/限流结果反馈给限速器，由其统一调度所有并发任务的等待
+    """
+    client = client or get_provider_client()
     
     for attempt in range(max_retries):
         try:
-            url = "https://api.siliconflow.cn/v1/images/generations"
+            if limiter:
+                limiter.acquire()
+            
+            url = SILICONFLOW_API_URL
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
             }
             data = {
-                "model": "black-forest-labs/FLUX.1-schnell",
+                "model": SILICONFLOW_MODEL,
                 "prompt": prompt,
-                "image_size": "1024x1024",
-                "num_inference_steps": 20
+                "image_size": SILICONFLOW_IMAGE_SIZE,
+                "num_inference_steps": SILICONFLOW_STEPS
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=120)
+            response = client.post(url, headers=headers, json=data, timeout=120)
             
             if response.status_code == 200:
+                if limiter:
+                    limiter.on_success(response.headers)
                 result = response.json()
                 
                 if 'images' in result and len(result['images']) > 0:
                     img_data = result['images'][0]
                     if 'url' in img_data:
-                        img_response = requests.get(img_data['url'], timeout=15)
-                        with open(filename, 'wb') as f:
-                            f.write(img_response.content)
+                        if not _download_to_file(client, img_data['url'], filename):
+                            return False, "图片下载失败"
                         return True, "AI生成成功"
                     elif 'b64_json' in img_data:
-                        import base64
-                        img_bytes = base64.b64decode(img_data['b64_json'])
-                        with open(filename, 'wb') as f:
-                            f.write(img_bytes)
+                        _atomic_write_chunks(filename, _iter_b64_decode(img_data['b64_json']))
                         return True, "AI生成成功"
                 
                 return False, "返回格式不支持"
             
             elif response.status_code == 429:
-                # API限流，等待后重试
-                wait_time = 5 * (attempt + 1)  # 5秒、10秒、15秒
+                # API限流：优先遵循 Retry-After，否则抖动指数退避
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                if limiter:
+                    # 限速器负责暂停，下次 acquire() 时等待
+                    wait_time = limiter.on_throttle(retry_after, attempt)
+                else:
+                    wait_time = retry_after if retry_after is not None else _backoff_delay(attempt)
+                
                 if attempt < max_retries - 1:
-                    print(f"  ⏳ API限流，等待{wait_time}秒后重试...")
-                    time.sleep(wait_time)
+                    print(f"  ⏳ API限流，等待{wait_time:.1f}秒后重试...")
+                    if not limiter:
+                        time.sleep(wait_time)
                     continue
                 return False, "API限流，重试失败"
             
@@ -816,7 +1752,7 @@ def generate_single_image_siliconflow(prompt, api_key, filename, max_retries=3):
         except requests.exceptions.Timeout:
             if attempt < max_retries - 1:
                 print(f"  ⏳ 请求超时，重试中...")
-                time.sleep(3)
+                time.sleep(_backoff_delay(attempt, base=1.5))
                 continue
             return False, "生成超时"
         except Exception as e:
@@ -825,6 +1761,7 @@ def generate_single_image_siliconflow(prompt, api_key, filename, max_retries=3):
     return False, "重试次数用尽"
 
 
+@traced('prompt_generation')
 def generate_smart_prompt(title, bullets, desc):
     """
     根据幻灯片标题和内容智能生成高质量AI图片提示词
@@ -996,206 +1933,262 @@ def get_text_from_gui():
     return result['text']
 
 
-def parse_outline_to_json(text):
+# 大纲行分类：对去掉首尾空白的行只匹配一次，分支顺序即判断优先级
+_OUTLINE_TOKEN = re.compile(r"""
+    (?P<separator>---)                              # 分隔符（以---开头）
+  | (?P<level>\#{1,3})\x20(?P<heading>.*)           # # / ## / ### 标题
+  | [-*](?:\s+(?P<bullet>.*)|(?P<bare_bullet>$))   # - 或 * 要点
+  | >\x20(?P<quote>.*)                              # > 金句
+  | (?P<emphasis>\*\*.*\*\*)                        # **理解类比**：内容
+""", re.VERBOSE | re.DOTALL)
+
+# 大纲解析使用的预编译模式
+_OUTLINE_PAGE_TITLE = re.compile(r'第.+[页节][\s：:]+(.+)')
+_OUTLINE_BRACKETS = re.compile(r'\[.*?\]')
+_OUTLINE_LAYOUTS = ('left_text_right_image', 'right_text_left_image')
+
+
+def _clean_outline_text(s):
+    """清理Markdown格式"""
+    s = s.replace('**', '').replace('*', '')
+    s = _OUTLINE_BRACKETS.sub('', s)  # 移除[内容]
+    s = s.replace('"', '')
+    return s.strip()
+
+
+def tokenize_outline_line(line):
     """
-    智能解析大纲文本转换为JSON结构
-    支持多种格式：
-    # 标题 / # XXX大纲         -> 提取标题
-    ## 第X页：标题 / ## 章节名  -> section 或 content_image
-    ### 内容标题              -> content_image
-    - **标题**：内容 / - 内容  -> bullets
-    > 金句                    -> quote
-    ---                       -> 分隔符（忽略）
+    把一行大纲分类为 (类型, 标题级别, 文本)，整行只扫描一次
+    类型：blank / separator / heading / bullet / quote / emphasis / text
     """
-    import re
+    stripped = line.strip()
+    if not stripped:
+        return ('blank', 0, '')
+    
+    match = _OUTLINE_TOKEN.match(stripped)
+    if match is None:
+        return ('text', 0, stripped)
+    
+    kind = match.lastgroup
+    if kind == 'heading':
+        return ('heading', len(match.group('level')), match.group('heading'))
+    if kind == 'bullet':
+        return ('bullet', 0, match.group('bullet'))
+    if kind == 'bare_bullet':
+        # 只有 "-" 或 "*"：后面跟着空白（含换行符）才算空要点
+        return ('bullet', 0, '') if line != line.rstrip() else ('text', 0, stripped)
+    if kind == 'quote':
+        return ('quote', 0, match.group('quote'))
+    return (kind, 0, stripped)
+
+
+def iter_outline_tokens(lines):
+    """逐行产出 tokenize_outline_line 的结果（跳过空行；文件读出的行末换行符不参与判断）"""
+    for line in lines:
+        token = tokenize_outline_line(line.rstrip('\n'))
+        if token[0] != 'blank':
+            yield token
+
+
+def _outline_section_title(line):
+    """从 '第X页：标题' 或 '标题'（二级标题 ## 之后的文本）提取标题"""
+    line = line.strip()
+    # 匹配 "第X页：标题" 或 "第X页:标题"
+    match = _OUTLINE_PAGE_TITLE.match(line)
+    if match:
+        return _clean_outline_text(match.group(1))
+    # 匹配 "封面" "总结" 等特殊页
+    if '封面' in line or '结语' in line or '结尾' in line:
+        return None  # 封面/结尾特殊处理
+    return _clean_outline_text(line)
+
+
+def _outline_content_slide(title, layout_index):
+    """大纲中的内容页（带图片）"""
+    return {
+        'type': 'content_image',
+        'title': title,
+        'bullets': [],
+        'layout': _OUTLINE_LAYOUTS[layout_index % 2],
+        'image_desc': f'{title}示意图',
+        'image': f'images/slide_{layout_index + 1}.png'
+    }
+
+
+def iter_outline_slides(lines):
+    """
+    流式解析大纲：逐行读取，每完成一页就产出该页的dict，不保留全文和已产出的页面
     
-    lines = text.strip().split('\n')
+    Args:
+        lines: 行的可迭代对象（文件对象、sys.stdin、字符串列表等）
     
-    slides = []
+    Yields:
+        dict: 页面数据；封面总是第一个产出，没有结尾页时最后补一个
+              封面在第一页内容完成时产出，之后不再修改；出现得更晚的封面信息
+              （如 "# 标题"、"## 封面" 下的要点）流式时不生效，需要时用 parse_outline_to_json
+    """
+    return _iter_outline_slides(lines, _outline_cover())
+
+
+def _outline_cover():
+    """大纲的默认封面"""
+    return {'type': 'cover', 'title': '演示文稿', 'subtitle': '专业培训课程', 'slogan': ''}
+
+
+def _iter_outline_slides(lines, cover):
+    """iter_outline_slides 的实现；cover 在整个解析过程中持续更新，产出的是当时的副本"""
+    cover_sent = False
+    has_subtitle = False
+    has_ending = False
     current_slide = None
-    cover_title = "演示文稿"
-    cover_subtitle = ""
     layout_index = 0
-    layouts = ['left_text_right_image', 'right_text_left_image']
-    
-    def clean_text(s):
-        """清理Markdown格式"""
-        s = s.replace('**', '').replace('*', '')
-        s = re.sub(r'\[.*?\]', '', s)  # 移除[内容]
-        s = s.replace('"', '').replace('"', '').replace('"', '')
-        return s.strip()
-    
-    def extract_title_from_section(line):
-        """从 '## 第X页：标题' 或 '## 标题' 提取标题"""
-        line = line.lstrip('#').strip()
-        # 匹配 "第X页：标题" 或 "第X页:标题"
-        match = re.match(r'第.+[页节][\s：:]+(.+)', line)
-        if match:
-            return clean_text(match.group(1))
-        # 匹配 "封面" "总结" 等特殊页
-        if '封面' in line or '结语' in line or '结尾' in line:
-            return None  # 封面/结尾特殊处理
-        return clean_text(line)
-    
-    def is_section_only(title):
-        """判断是否只是章节页（没有具体内容的）"""
-        keywords = ['目录', '章节', '第一部分', '第二部分', '第三部分', '第四部分', '概述', '引言']
-        return any(kw in title for kw in keywords)
+    ready = []  # 本行处理后完成的页面
     
-    for line in lines:
-        original_line = line
-        line = line.strip()
-        
-        # 跳过空行和分隔符
-        if not line or line == '---' or line.startswith('---'):
+    def set_subtitle(text):
+        nonlocal has_subtitle
+        has_subtitle = bool(text)
+        cover['subtitle'] = text or '专业培训课程'
+    
+    for kind, level, text in iter_outline_tokens(lines):
+        if kind == 'separator':
             continue
         
-        # 主标题 (# 开头，但不是##)
-        if line.startswith('# ') and not line.startswith('## '):
-            title = line[2:].strip()
-            # 处理 "# XXX大纲" 格式
-            title = re.sub(r'大纲$', '', title).strip()
-            title = clean_text(title)
+        if kind == 'heading' and level == 1:
+            # 主标题；处理 "# XXX大纲" 格式
+            title = text.strip()
+            if title.endswith('大纲'):
+                title = title[:-2].strip()
+            title = _clean_outline_text(title)
             if title:
-                cover_title = title
+                cover['title'] = title
             continue
         
-        # 二级标题 (## 开头)
-        if line.startswith('## ') and not line.startswith('### '):
-            # 保存上一个slide
-            if current_slide:
-                slides.append(current_slide)
+        if kind == 'heading' and level == 2:
+            # 二级标题：保存上一个slide
+            if current_slide and current_slide['type'] != '_cover_placeholder':
+                ready.append(current_slide)
             
-            section_title = extract_title_from_section(line)
+            section_title = _outline_section_title(text)
             
-            # 检查是否是封面
-            if section_title is None or '封面' in line:
+            if section_title is None or '封面' in text:
+                # 封面
                 current_slide = {'type': '_cover_placeholder'}
-                continue
-            
-            # 检查是否是总结/结尾
-            if '总结' in section_title or '结语' in section_title or '结尾' in section_title:
+            elif '总结' in section_title or '结语' in section_title or '结尾' in section_title:
+                # 总结/结尾
                 current_slide = {
                     'type': 'ending',
                     'title': section_title,
                     'bullets': [],
                     'quote': ''
                 }
-                continue
-            
-            # 普通内容页（带图片）
-            current_slide = {
-                'type': 'content_image',
-                'title': section_title,
-                'bullets': [],
-                'layout': layouts[layout_index % 2],
-                'image_desc': f'{section_title}示意图',
-                'image': f'images/slide_{layout_index + 1}.png'
-            }
-            layout_index += 1
-            continue
-        
-        # 三级标题 (### 开头)
-        if line.startswith('### '):
-            # 保存上一个slide
-            if current_slide and current_slide.get('type') != '_cover_placeholder':
-                slides.append(current_slide)
-            
-            title = clean_text(line[4:])
-            current_slide = {
-                'type': 'content_image',
-                'title': title,
-                'bullets': [],
-                'layout': layouts[layout_index % 2],
-                'image_desc': f'{title}示意图',
-                'image': f'images/slide_{layout_index + 1}.png'
-            }
+            else:
+                # 普通内容页（带图片）
+                current_slide = _outline_content_slide(section_title, layout_index)
+                layout_index += 1
+        
+        elif kind == 'heading':
+            # 三级标题：保存上一个slide
+            if current_slide and current_slide['type'] != '_cover_placeholder':
+                ready.append(current_slide)
+            current_slide = _outline_content_slide(_clean_outline_text(text), layout_index)
             layout_index += 1
-            continue
         
-        # 要点 (- 或 * 开头，支持缩进)
-        if re.match(r'^[\s]*[-*]\s+', original_line):
-            bullet_text = re.sub(r'^[\s]*[-*]\s+', '', original_line)
-            bullet_text = clean_text(bullet_text)
-            
+        elif kind == 'bullet':
+            # 要点 (- 或 * 开头，支持缩进)
+            bullet_text = _clean_outline_text(text)
             if current_slide:
-                if current_slide.get('type') == '_cover_placeholder':
+                if current_slide['type'] == '_cover_placeholder':
                     # 封面的要点提取为副标题/演讲人等
                     if '标题' in bullet_text and '：' in bullet_text:
-                        cover_title = bullet_text.split('：', 1)[1].strip()
+                        cover['title'] = bullet_text.split('：', 1)[1].strip()
                     elif '副标题' in bullet_text and '：' in bullet_text:
-                        cover_subtitle = bullet_text.split('：', 1)[1].strip()
+                        set_subtitle(bullet_text.split('：', 1)[1].strip())
                 elif 'bullets' in current_slide and bullet_text:
                     current_slide['bullets'].append(bullet_text)
-            continue
         
-        # 金句 (> 开头)
-        if line.startswith('> '):
-            if current_slide and current_slide.get('type') not in [None, '_cover_placeholder']:
-                current_slide['quote'] = clean_text(line[2:])
-            continue
+        elif kind == 'quote':
+            # 金句
+            if current_slide and current_slide['type'] != '_cover_placeholder':
+                current_slide['quote'] = _clean_outline_text(text)
         
-        # 理解类比等特殊段落
-        if line.startswith('**') and '**' in line[2:]:
-            # 可能是 **理解类比**：内容
-            continue
+        elif kind == 'emphasis':
+            # 理解类比等特殊段落（**理解类比**：内容），忽略
+            pass
         
-        # 其他文本
-        if current_slide is None:
-            if not cover_subtitle:
-                cover_subtitle = clean_text(line)
+        elif current_slide is None:
+            # 其他文本：第一页之前的作为副标题
+            if not has_subtitle:
+                set_subtitle(_clean_outline_text(text))
         elif 'bullets' in current_slide:
-            cleaned = clean_text(line)
+            cleaned = _clean_outline_text(text)
             if cleaned and not cleaned.startswith('**'):
                 current_slide['bullets'].append(cleaned)
-    
-    # 保存最后一个slide
-    if current_slide and current_slide.get('type') not in [None, '_cover_placeholder']:
-        slides.append(current_slide)
-    
-    # 过滤掉占位符
-    slides = [s for s in slides if s.get('type') != '_cover_placeholder']
-    
-    # 添加封面
-    cover_slide = {
-        'type': 'cover',
-        'title': cover_title,
-        'subtitle': cover_subtitle or '专业培训课程',
-        'slogan': ''
-    }
-    
-    # 检查是否已有ending
-    has_ending = any(s.get('type') == 'ending' for s in slides)
+        
+        if ready:
+            if not cover_sent:
+                cover_sent = True
+                yield dict(cover)
+            for slide in ready:
+                has_ending = has_ending or slide['type'] == 'ending'
+                yield slide
+            ready = []
+    
+    # 最后一个slide
+    if current_slide and current_slide['type'] != '_cover_placeholder':
+        ready.append(current_slide)
+    if not cover_sent:
+        yield dict(cover)
+    for slide in ready:
+        has_ending = has_ending or slide['type'] == 'ending'
+        yield slide
     
     # 如果没有ending，添加一个
     if not has_ending:
-        ending_slide = {
+        yield {
             'type': 'ending',
             'title': '谢谢观看',
             'bullets': ['欢迎交流讨论'],
             'quote': '合规运作，价值创造'
         }
-        slides.append(ending_slide)
+
+
+@traced('outline_parse')
+def parse_outline_to_json(text):
+    """
+    智能解析大纲文本转换为JSON结构
+    支持多种格式：
+    # 标题 / # XXX大纲         -> 提取标题
+    ## 第X页：标题 / ## 章节名  -> section 或 content_image
+    ### 内容标题              -> content_image
+    - **标题**：内容 / - 内容  -> bullets
+    > 金句                    -> quote
+    ---                       -> 分隔符（忽略）
+    
+    逐行解析见 iter_outline_slides（大文档可直接流式交给 generate_from_slides）；
+    一次性解析时内容之后才出现的封面信息同样生效
+    """
+    cover = _outline_cover()
+    slides = list(_iter_outline_slides(text.strip().split('\n'), cover))
+    slides[0] = cover
     
     # 组装完整JSON
-    result = {
+    return {
         'metadata': {
-            'title': cover_title,
+            'title': slides[0]['title'],
             'theme': 'business_gray',
             'version': '3.9',
-            'total_slides': len(slides) + 1
+            'total_slides': len(slides)
         },
-        'slides': [cover_slide] + slides
+        'slides': slides
     }
-    
-    return result
 
 
+@traced('extract_image_tasks')
 def extract_image_prompts_from_json(json_data):
     """从JSON中提取所有图片提示词和路径"""
     image_tasks = []
     
-    for slide in json_data.get('slides', []):
+    for slide_position, slide in enumerate(json_data.get('slides', [])):
         if slide.get('type') == 'content_image':
             # 优先使用image_prompt，如果没有则根据slide内容智能生成
             prompt = slide.get('image_prompt', '')
@@ -1221,107 +2214,379 @@ def extract_image_prompts_from_json(json_data):
                     'prompt': prompt,
                     'path': image_path,
                     'desc': desc,
-                    'title': title
+                    'title': title,
+                    'slide_position': slide_position
                 })
     
     return image_tasks
 
 
-def download_images_from_json(image_tasks, unsplash_key=None, siliconflow_key=None):
-    """根据JSON中的任务列表下载图片"""
-    if not image_tasks:
-        print("ℹ️  JSON中没有图片提示词，跳过下载\n")
-        return True
+class RateLimiter:
+    """
+    令牌桶限速器（线程安全）
+    所有并发任务共享同一个桶，替代固定的 time.sleep 间隔
+    """
     
+    def __init__(self, requests_per_second=1.0, burst=1):
+        """
+        Args:
+            requests_per_second: 每秒允许的请求数（<=0 表示不限速）
+            burst: 桶容量，允许的瞬时突发请求数
+        """
+        self.rate = float(requests_per_second)
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """取一个令牌，不足时阻塞等待"""
+        if self.rate <= 0:
+            return
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+# 单次限流暂停的上限（异常的 Retry-After / X-RateLimit-Reset 不应让所有任务长期阻塞）
+MAX_RATE_LIMIT_PAUSE = 300.0
+
+# 大于该值的数字按Unix时间戳（绝对时间）处理，否则按秒数
+_EPOCH_THRESHOLD = 1e9
+
+
+def _parse_retry_after(value):
+    """
+    解析 Retry-After / X-RateLimit-Reset 头（秒数、Unix时间戳或HTTP日期）
+    
+    Returns:
+        float: 需要等待的秒数（不超过 MAX_RATE_LIMIT_PAUSE），无效时返回None
+    """
+    if not value:
+        return None
+    
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    else:
+        if not math.isfinite(seconds):
+            return None
+        if seconds >= _EPOCH_THRESHOLD:
+            seconds -= time.time()
+    
+    return min(MAX_RATE_LIMIT_PAUSE, max(0.0, seconds))
+
+
+def _backoff_delay(attempt, base=2.0, cap=60.0):
+    """带抖动的指数退避：在 [d/2, d] 内随机，d = base * 2^attempt"""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    自适应限速器（AIMD）
+    成功时线性提速（不超过配置上限），遇到429时速率减半并按 Retry-After 暂停所有任务，
+    从而逐步逼近提供方可持续的请求速率
+    """
+    
+    def __init__(self, requests_per_second=1.0, burst=1, min_rate=0.05,
+                 increase_step=0.05, decrease_factor=0.5):
+        """
+        Args:
+            requests_per_second: 初始速率，同时也是速率上限
+            min_rate: 速率下限
+            increase_step: 每次成功请求增加的速率
+            decrease_factor: 每次限流后速率乘以的系数
+        """
+        super().__init__(requests_per_second, burst)
+        self.max_rate = self.rate
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._paused_until = 0.0
+        self.success_count = 0
+        self.throttle_count = 0
+        self.total_wait = 0.0
+    
+    def acquire(self):
+        """取一个令牌；处于 Retry-After 暂停期时先等待暂停结束"""
+        start = time.monotonic()
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_time = self._paused_until - now
+                elif self.rate <= 0:
+                    break
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                    self._last = now
+                    
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    
+                    wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+        
+        with self._lock:
+            self.total_wait += time.monotonic() - start
+    
+    def on_success(self, headers=None):
+        """请求成功：线性提速，并参考 X-RateLimit-* 头"""
+        with self._lock:
+            self.success_count += 1
+            if self.rate > 0:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+            
+            # 配额已用尽时，暂停到重置时间
+            if headers and headers.get('X-RateLimit-Remaining') == '0':
+                reset = _parse_retry_after(headers.get('X-RateLimit-Reset'))
+                if reset:
+                    self._pause(reset)
+    
+    def on_throttle(self, retry_after=None, attempt=0):
+        """
+        遇到429：速率减半，并让所有任务暂停
+        
+        Returns:
+            float: 本次暂停的秒数（Retry-After 优先，否则为抖动退避）
+        """
+        delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+        
+        trace_count('rate_limit_throttles')
+        with self._lock:
+            self.throttle_count += 1
+            if self.rate > 0:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self._tokens = 0.0
+            delay = self._pause(delay)
+        
+        return delay
+    
+    def _pause(self, seconds):
+        """让所有任务暂停 seconds 秒（截断到 MAX_RATE_LIMIT_PAUSE，调用方持有锁），返回实际暂停秒数"""
+        seconds = min(MAX_RATE_LIMIT_PAUSE, seconds)
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        return seconds
+    
+    def metrics(self):
+        """当前速率与限流统计"""
+        with self._lock:
+            return {
+                'current_rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'success_count': self.success_count,
+                'throttle_count': self.throttle_count,
+                'total_wait': round(self.total_wait, 2),
+            }
+
+
+def _acquire_single_image(task, unsplash_key, siliconflow_key, limiter, cache=None, client=None):
+    """
+    获取单张图片（缓存优先，其次AI，Unsplash备用）
+    
+    Returns:
+        tuple: (结果类型, 详情dict, 日志行列表)
+               结果类型为 'ai' / 'unsplash' / 'failed'
+    """
+    prompt = task['prompt']
+    filepath = task['path']
+    desc = task['desc']
+    log = [f"  📝 描述: {desc}"]
+    
+    # 确保目录存在
+    dir_path = os.path.dirname(filepath)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    
+    # 优先使用AI生成（使用JSON中的prompt）
+    if siliconflow_key and prompt:
+        cache_key = None
+        if cache:
+            cache_key = cache.make_key(
+                'siliconflow', SILICONFLOW_MODEL, prompt,
+                SILICONFLOW_IMAGE_SIZE, SILICONFLOW_STEPS
+            )
+            if cache.fetch(cache_key, filepath):
+                log.append(f"  ♻️  命中缓存，跳过AI生成")
+                return 'ai', {
+                    'file': filepath,
+                    'source': 'SiliconFlow AI (缓存)',
+                    'status': 'success',
+                    'prompt': prompt,
+                    'cached': True
+                }, log
+        
+        log.append("  🤖 使用AI生成图片...")
+        log.append(f"  📝 提示词: {prompt[:60]}{'...' if len(prompt) > 60 else ''}")
+        success, msg = generate_single_image_siliconflow(
+            prompt,
+            siliconflow_key,
+            filepath,
+            client=client,
+            limiter=limiter
+        )
+        
+        if success:
+            log.append(f"  ✅ AI生成成功")
+            if cache_key:
+                cache.store(cache_key, filepath)
+            return 'ai', {
+                'file': filepath,
+                'source': 'SiliconFlow AI',
+                'status': 'success',
+                'prompt': prompt
+            }, log
+        log.append(f"  ⚠️  AI生成失败: {msg}")
+    
+    # AI失败，尝试Unsplash备用
+    if unsplash_key:
+        cache_key = cache.make_key(
+            'unsplash', 'search', desc, f"{UNSPLASH_IMAGE_SIZE}/{UNSPLASH_ORIENTATION}"
+        ) if cache else None
+        if cache_key and cache.fetch(cache_key, filepath):
+            log.append(f"  ♻️  命中缓存，跳过Unsplash下载")
+            return 'unsplash', {
+                'file': filepath,
+                'source': 'Unsplash (缓存)',
+                'status': 'success',
+                'cached': True
+            }, log
+        
+        log.append("  🔄 尝试Unsplash备用...")
+        limiter.acquire()
+        success, msg = download_single_image_unsplash(
+            desc,  # 使用描述作为搜索词
+            unsplash_key,
+            filepath,
+            client=client
+        )
+        
+        if success:
+            log.append(f"  ✅ Unsplash {msg}")
+            if cache_key:
+                cache.store(cache_key, filepath)
+            return 'unsplash', {
+                'file': filepath,
+                'source': 'Unsplash',
+                'status': 'success'
+            }, log
+        log.append(f"  ⚠️  Unsplash失败: {msg}")
+    
+    # 都失败
+    log.append(f"  ❌ 所有下载源都失败，将使用占位图")
+    return 'failed', {
+        'file': filepath,
+        'source': 'None',
+        'status': 'failed'
+    }, log
+
+
+def start_image_downloads(image_tasks, unsplash_key=None, siliconflow_key=None,
+                          max_workers=4, requests_per_second=1.0,
+                          use_cache=True, cache_dir=None, client=None, limiter=None):
+    """
+    启动后台并发下载，立即返回（参数同 download_images_from_json）
+    
+    Returns:
+        tuple: (executor, futures)
+               futures 与 image_tasks 一一对应，结果为 (结果类型, 详情dict)；
+               调用方负责在使用完后调用 executor.shutdown()
+    """
     print("\n" + "=" * 70)
     print(f"🚀 智能图片下载系统 - 基于JSON配置")
     print("=" * 70)
     print(f"📅 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"📊 待下载图片数: {len(image_tasks)}")
+    print(f"⚡ 并发数: {max_workers}，限速: {requests_per_second} 请求/秒")
     print()
     
+    cache = ImageCache(cache_dir) if use_cache and HAS_IMAGE_CACHE else None
+    limiter = limiter or AdaptiveRateLimiter(requests_per_second)
+    client = client or get_provider_client()
+    print_lock = threading.Lock()
+    
+    def run_task(index):
+        task = image_tasks[index]
+        try:
+            with trace_span('image_task', file=os.path.basename(task['path'])):
+                kind, detail, log = _acquire_single_image(
+                    task, unsplash_key, siliconflow_key, limiter, cache, client
+                )
+        except Exception as e:
+            kind, detail, log = 'failed', {
+                'file': task['path'],
+                'source': 'None',
+                'status': 'failed'
+            }, [f"  ❌ 任务异常: {e}"]
+        # 每个任务的日志整体输出，避免并发时交错
+        with print_lock:
+            print(f"[{index + 1}/{len(image_tasks)}] {os.path.basename(task['path'])}")
+            print("\n".join(log))
+        return kind, detail
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    futures = [executor.submit(run_task, i) for i in range(len(image_tasks))]
+    return executor, futures
+
+
+def _collect_download_stats(futures):
+    """按任务顺序汇总下载结果"""
     stats = {
         'unsplash_success': 0,
         'ai_success': 0,
         'failed': 0,
+        'cache_hits': 0,
         'details': []
     }
     
-    for i, task in enumerate(image_tasks, 1):
-        prompt = task['prompt']
-        filepath = task['path']
-        desc = task['desc']
-        
-        print(f"[{i}/{len(image_tasks)}] {os.path.basename(filepath)}")
-        print(f"  📝 描述: {desc}")
-        
-        # 确保目录存在
-        dir_path = os.path.dirname(filepath)
-        if dir_path:
-            os.makedirs(dir_path, exist_ok=True)
-        
-        # 优先使用AI生成（使用JSON中的prompt）
-        if siliconflow_key and prompt:
-            print("  🤖 使用AI生成图片...")
-            print(f"  📝 提示词: {prompt[:60]}{'...' if len(prompt) > 60 else ''}")
-            success, msg = generate_single_image_siliconflow(
-                prompt,
-                siliconflow_key,
-                filepath
-            )
-            
-            if success:
-                print(f"  ✅ AI生成成功")
-                stats['ai_success'] += 1
-                stats['details'].append({
-                    'file': filepath,
-                    'source': 'SiliconFlow AI',
-                    'status': 'success',
-                    'prompt': prompt
-                })
-                time.sleep(2)
-                continue
-            else:
-                print(f"  ⚠️  AI生成失败: {msg}")
-        
-        # AI失败，尝试Unsplash备用
-        if unsplash_key:
-            print("  🔄 尝试Unsplash备用...")
-            success, msg = download_single_image_unsplash(
-                desc,  # 使用描述作为搜索词
-                unsplash_key,
-                filepath
-            )
-            
-            if success:
-                print(f"  ✅ Unsplash {msg}")
-                stats['unsplash_success'] += 1
-                stats['details'].append({
-                    'file': filepath,
-                    'source': 'Unsplash',
-                    'status': 'success'
-                })
-                time.sleep(1)
-                continue
-            else:
-                print(f"  ⚠️  Unsplash失败: {msg}")
-        
-        # 都失败
-        print(f"  ❌ 所有下载源都失败，将使用占位图")
-        stats['failed'] += 1
-        stats['details'].append({
-            'file': filepath,
-            'source': 'None',
-            'status': 'failed'
-        })
-    
-    # 生成报告
+    for future in futures:
+        kind, detail = future.result()
+        trace_count(f'images_{kind}')
+        if kind == 'ai':
+            stats['ai_success'] += 1
+        elif kind == 'unsplash':
+            stats['unsplash_success'] += 1
+        else:
+            stats['failed'] += 1
+        if detail.get('cached'):
+            stats['cache_hits'] += 1
+        stats['details'].append(detail)
+    
+    return stats
+
+
+def _print_download_report(stats):
+    """打印下载报告"""
     print("\n" + "=" * 70)
     print("📊 下载报告")
     print("=" * 70)
     print(f"✅ Unsplash成功: {stats['unsplash_success']}")
     print(f"✅ AI生成成功: {stats['ai_success']}")
     print(f"❌ 失败（使用占位图）: {stats['failed']}")
+    if stats['cache_hits']:
+        print(f"♻️  缓存命中: {stats['cache_hits']}")
+    rate_limit = stats.get('rate_limit')
+    if rate_limit:
+        print(f"🚦 限速: 当前 {rate_limit['current_rate']} 请求/秒，"
+              f"限流 {rate_limit['throttle_count']} 次，累计等待 {rate_limit['total_wait']}秒")
     print()
     
     if stats['details']:
@@ -1332,12 +2597,83 @@ def download_images_from_json(image_tasks, unsplash_key=None, siliconflow_key=No
     
     print("=" * 70)
     print()
+
+
+@traced('image_fetch')
+def download_images_from_json(image_tasks, unsplash_key=None, siliconflow_key=None,
+                              max_workers=4, requests_per_second=1.0,
+                              use_cache=True, cache_dir=None, client=None):
+    """
+    根据JSON中的任务列表下载图片（并发执行）
+    
+    Args:
+        image_tasks: extract_image_prompts_from_json 返回的任务列表
+        unsplash_key: Unsplash Access Key（可选）
+        siliconflow_key: 硅基流动API Key（可选）
+        max_workers: 最大并发任务数
+        requests_per_second: 所有任务共享的API请求速率上限（<=0 不限速）
+        use_cache: 是否启用图片缓存（相同提示词与参数不重复调用API）
+        cache_dir: 缓存目录（默认 ~/.ppt_auto_cache/images）
+        client: ProviderClient（默认使用进程内共享客户端）
+    """
+    if not image_tasks:
+        print("ℹ️  JSON中没有图片提示词，跳过下载\n")
+        return True
+    
+    limiter = AdaptiveRateLimiter(requests_per_second)
+    executor, futures = start_image_downloads(
+        image_tasks, unsplash_key, siliconflow_key,
+        max_workers, requests_per_second, use_cache, cache_dir, client, limiter
+    )
+    executor.shutdown(wait=True)
+    
+    stats = _collect_download_stats(futures)
+    stats['rate_limit'] = limiter.metrics()
+    _print_download_report(stats)
     
     # 返回成功的路径列表
     success_paths = [item['file'] for item in stats['details'] if item['status'] == 'success']
     return success_paths
 
 
+@traced('pipeline_generation')
+def generate_with_image_pipeline(json_data, output_path, image_tasks, theme='military_solemn',
+                                 unsplash_key=None, siliconflow_key=None,
+                                 max_workers=4, requests_per_second=1.0,
+                                 use_cache=True, cache_dir=None, client=None):
+    """
+    流水线模式：边下载图片边生成PPT
+    不依赖图片的页面立即渲染，图文页在各自图片就绪后渲染，
+    总耗时接近 max(网络, 渲染) 而非两者之和
+    
+    Returns:
+        list: 成功下载的图片路径（同 download_images_from_json）
+    """
+    limiter = AdaptiveRateLimiter(requests_per_second)
+    executor, futures = start_image_downloads(
+        image_tasks, unsplash_key, siliconflow_key,
+        max_workers, requests_per_second, use_cache, cache_dir, client, limiter
+    )
+    
+    try:
+        # 按幻灯片位置索引图片任务
+        image_futures = {
+            task['slide_position']: future
+            for task, future in zip(image_tasks, futures)
+            if 'slide_position' in task
+        }
+        generator = AutoPPTGeneratorV3(theme=theme)
+        generator.generate_from_json(json_data, output_path, image_futures=image_futures)
+    finally:
+        executor.shutdown(wait=True)
+    
+    stats = _collect_download_stats(futures)
+    stats['rate_limit'] = limiter.metrics()
+    _print_download_report(stats)
+    
+    return [item['file'] for item in stats['details'] if item['status'] == 'success']
+
+
 # ========================================================================
 # 主函数 v3.9
 # ========================================================================
@@ -1364,7 +2700,30 @@ def select_template_file():
 
 
 def main():
-    """主函数 v4.0 - 支持模板导入"""
+    """
+    主函数入口
+    设置环境变量 PPT_TRACE=<trace.json>（或 1）时输出分阶段性能追踪，
+    PPT_PROFILE=1 附加 cProfile 热点，PPT_TRACE_MEMORY=1 附加 tracemalloc 峰值内存
+    """
+    trace_path = os.environ.get('PPT_TRACE')
+    if not trace_path:
+        return run_interactive()
+    
+    if trace_path == '1':
+        trace_path = f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    start_trace(
+        'main',
+        profile=os.environ.get('PPT_PROFILE') == '1',
+        trace_memory=os.environ.get('PPT_TRACE_MEMORY') == '1'
+    )
+    try:
+        return run_interactive()
+    finally:
+        finish_trace(trace_path)
+
+
+def run_interactive():
+    """交互式流程 v4.0 - 支持模板导入"""
     print("=" * 70)
     print("PPT自动生成器 v4.0 - 模板版")
     print("=" * 70)
@@ -1527,7 +2886,8 @@ def main():
         # 分析模板
         print("\n📊 正在分析模板样式...")
         try:
-            template_style = analyze_template(template_path)
+            with trace_span('template_analysis'):
+                template_style = analyze_template(template_path)
         except Exception as e:
             print(f"❌ 模板分析失败: {e}")
             return
@@ -1565,7 +2925,8 @@ def main():
         
         # 使用模板生成
         try:
-            generate_from_template(template_path, json_data, output_path, mode=mode)
+            with trace_span('template_generation', mode=mode):
+                generate_from_template(template_path, json_data, output_path, mode=mode)
             print("=" * 70)
             print(f"✅ 完成！文件已保存到: {output_path}")
             print("=" * 70)
@@ -1588,7 +2949,8 @@ def main():
             return
         
         try:
-            analyze_template(template_path)
+            with trace_span('template_analysis'):
+                analyze_template(template_path)
             
             # 询问是否导出主题配置
             export_choice = input("\n是否导出为自定义主题配置？[y/N]: ").strip().lower()
@@ -1628,6 +2990,8 @@ def main():
         print("\n⚠️  JSON中没有图片配置（没有type为content_image的幻灯片）")
     
     # ===== 步骤3：询问是否下载图片 =====
+    pipeline_download = False
+    
     if image_tasks:
         print("\n" + "=" * 70)
         print("🖼️  步骤2：AI图片生成")
@@ -1665,8 +3029,14 @@ def main():
                 print("⚠️  未提供Unsplash Key，仅使用AI生成")
                 unsplash_key = None
         
-        # 执行下载
         if download_choice in ["1", "2", "3"]:
+            pipeline_choice = input("\n启用流水线模式（边下载图片边生成PPT）? [Y/n]: ").strip().lower()
+            pipeline_download = pipeline_choice != 'n'
+        
+        # 执行下载
+        if pipeline_download:
+            print("\n✅ 流水线模式：图片将在生成PPT时同步下载\n")
+        elif download_choice in ["1", "2", "3"]:
             success_paths = download_images_from_json(image_tasks, unsplash_key, siliconflow_key)
             
             # 更新JSON中的图片路径（使用绝对路径）
@@ -1725,9 +3095,16 @@ def main():
         output_path += '.pptx'
     
     print()
-    generator = AutoPPTGeneratorV3(theme=theme)
-    # 直接传入更新后的json_data（包含正确的图片路径）
-    generator.generate_from_json(json_data, output_path)
+    if pipeline_download:
+        generate_with_image_pipeline(
+            json_data, output_path, image_tasks, theme,
+            unsplash_key, siliconflow_key
+        )
+    else:
+        generator = AutoPPTGeneratorV3(theme=theme)
+        # 直接传入更新后的json_data（包含正确的图片路径）
+        with trace_span('generation'):
+            generator.generate_from_json(json_data, output_path)
     
     print("=" * 70)
     print(f"✅ 完成！文件已保存到: {output_path}")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+幻灯片渲染器注册表 v1.0
+功能：
+1. 页面类型 -> 渲染函数的映射，替代生成器中的 if/elif 分派
+2. 支持外部插件模块注册自定义页面类型，无需修改生成器
+3. 按页面类型统计渲染次数与耗时，便于定位慢的页面类型
+
+渲染函数签名：renderer(generator, slide_data) -> slide 或 None
+生成器的实例方法（未绑定）可以直接注册，例如 AutoPPTGeneratorV3.create_cover_slide
+
+插件模块约定：导入时调用注册函数，或定义 register_renderers(registry)，
+加载时会以目标注册表为参数调用
+
+作者：AI资源指挥官
+版本：1.0
+更新：2026-01-12
+"""
+
+import time
+import importlib
+
+
+# ========================================================================
+# 渲染器注册表
+# ========================================================================
+
+class SlideRendererRegistry:
+    """页面类型到渲染函数的映射"""
+
+    def __init__(self, name, default=None):
+        """
+        Args:
+            name: 注册表名称（用于日志）
+            default: 未注册类型的兜底渲染函数；为None时未知类型被跳过
+        """
+        self.name = name
+        self.default = default
+        self._renderers = {}
+
+    def register(self, slide_type, renderer=None, replace=True):
+        """
+        注册页面类型的渲染函数，可作为装饰器使用：
+
+            @registry.register('timeline')
+            def render_timeline(generator, data): ...
+
+        Args:
+            replace: 为False时类型已存在则报错
+        """
+        def decorator(func):
+            if not replace and slide_type in self._renderers:
+                raise ValueError(f"页面类型已注册: {slide_type}")
+            self._renderers[slide_type] = func
+            return func
+
+        if renderer is None:
+            return decorator
+        return decorator(renderer)
+
+    def unregister(self, slide_type):
+        """移除页面类型，返回原渲染函数（不存在时返回None）"""
+        return self._renderers.pop(slide_type, None)
+
+    def get(self, slide_type):
+        """查找渲染函数，未注册时返回兜底函数"""
+        return self._renderers.get(slide_type, self.default)
+
+    def types(self):
+        """已注册的页面类型（按注册顺序）"""
+        return tuple(self._renderers)
+
+    def __contains__(self, slide_type):
+        return slide_type in self._renderers
+
+    def render(self, generator, slide_type, slide_data, stats=None):
+        """
+        渲染单页
+
+        Args:
+            generator: 生成器实例，作为渲染函数的第一个参数
+            stats: 可选的统计dict，按类型累计 {'count', 'seconds'}
+
+        Returns:
+            渲染函数的返回值；没有可用渲染函数时返回None
+        """
+        renderer = self._renderers.get(slide_type, self.default)
+        if renderer is None:
+            return None
+        if stats is None:
+            return renderer(generator, slide_data)
+
+        start = time.perf_counter()
+        try:
+            return renderer(generator, slide_data)
+        finally:
+            item = stats.get(slide_type)
+            if item is None:
+                item = stats[slide_type] = {'count': 0, 'seconds': 0.0}
+            item['count'] += 1
+            item['seconds'] += time.perf_counter() - start
+
+    def load_plugins(self, module_names):
+        """
+        导入插件模块并注册其中的渲染器
+
+        Args:
+            module_names: 模块名列表或逗号分隔的字符串
+
+        Returns:
+            list: 成功加载的模块名
+        """
+        if isinstance(module_names, str):
+            module_names = [n.strip() for n in module_names.split(',')]
+
+        loaded = []
+        for module_name in filter(None, module_names):
+            try:
+                module = importlib.import_module(module_name)
+                hook = getattr(module, 'register_renderers', None)
+                if callable(hook):
+                    hook(self)
+                loaded.append(module_name)
+            except Exception as e:
+                print(f"⚠️  渲染器插件加载失败 ({self.name}): {module_name} - {type(e).__name__}: {e}")
+        return loaded
+
+
+def format_render_stats(stats):
+    """把按类型统计的渲染耗时格式化为一行文本"""
+    return "，".join(
+        f"{slide_type} {item['count']}页/{item['seconds'] * 1000:.0f}ms"
+        for slide_type, item in sorted(stats.items(), key=lambda kv: kv[1]['seconds'], reverse=True)
+    )
@@ -1,83 +1,85 @@
 #!/usr/bin/env python3
 """
-PPT模板解析器模块 v1.0
+PPT模板解析器模块 v1.1
 功能：
 1. 从现有PPT模板中提取样式要素（颜色、字体、布局）
 2. 识别模板中的占位符类型
 3. 支持基于模板生成新PPT（两种模式）
+4. 【新】样式提取只遍历一次模板，颜色/字体/布局/背景收集器共享同一次遍历
+5. 【新】颜色/字体直接读页面XML，主题色（schemeClr）与主题字体按母版主题解析
+6. 【新】分析结果按模板内容哈希缓存到磁盘（~/.ppt_auto_cache/templates），模板不变时跳过分析
+7. 【新】模板句柄延迟加载并在提取器、生成器与多次生成之间共享（open_template）
+8. 【新】填充模式按XML整页克隆模板页面（形状、图片、图表原样保留），文字原位替换
 
 作者：AI资源指挥官
-版本：1.0
-更新：2025-12-31
+版本：1.1
+更新：2026-01-17
 """
 
+import io
 import os
 import re
+import json
+import hashlib
+import weakref
+import colorsys
+import tempfile
 from copy import deepcopy
+from lxml import etree
+from lxml.etree import SubElement
 from pptx import Presentation
 from pptx.util import Inches, Pt, Emu
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+from pptx.enum.dml import MSO_FILL
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
+from pptx.parts.slide import SlidePart
+
+from slide_registry import SlideRendererRegistry, format_render_stats
 
 
 # ========================================================================
-# 模板样式提取器
+# 样式收集器（由 TemplateStyleExtractor._walk_slides 单次遍历驱动）
 # ========================================================================
 
-class TemplateStyleExtractor:
+class _StyleCollector:
     """
-    从PPT模板中提取样式要素
-    提取内容：主题色、强调色、字体、布局等
+    样式收集器基类
+    子类只需实现关心的钩子，遍历时按 页面→形状→段落→run 的顺序回调
     """
     
-    def __init__(self, template_path):
-        """
-        初始化提取器
-        
-        Args:
-            template_path: 模板PPT文件路径
-        """
-        if not os.path.exists(template_path):
-            raise FileNotFoundError(f"模板文件不存在: {template_path}")
-        
-        self.template_path = template_path
-        self.prs = Presentation(template_path)
-        self.extracted_style = None
-        
-    def extract_all(self):
-        """
-        提取模板的所有样式信息
-        
-        Returns:
-            dict: 包含颜色、字体、布局等的完整样式配置
-        """
-        self.extracted_style = {
-            'slide_size': self._extract_slide_size(),
-            'colors': self._extract_colors(),
-            'fonts': self._extract_fonts(),
-            'layouts': self._extract_layouts(),
-            'backgrounds': self._extract_backgrounds(),
-            'slide_masters': self._extract_slide_masters_info(),
-        }
-        
-        return self.extracted_style
+    def start_slide(self, idx, slide):
+        """开始一个页面"""
     
-    def _extract_slide_size(self):
-        """提取幻灯片尺寸"""
-        return {
-            'width': self.prs.slide_width,
-            'height': self.prs.slide_height,
-            'width_inches': self.prs.slide_width.inches,
-            'height_inches': self.prs.slide_height.inches,
-        }
+    def visit_shape(self, shape, has_text):
+        """页面中的一个（顶层）形状"""
     
-    def _extract_colors(self):
-        """
-        从模板中提取主要使用的颜色
-        分析所有形状和文本的颜色使用情况
-        """
-        colors = {
+    def visit_paragraph(self, paragraph):
+        """文本形状中的一个段落"""
+    
+    def visit_run(self, run, font):
+        """段落中的一个run（font 为共享的 run.font）"""
+    
+    def end_slide(self):
+        """页面结束"""
+    
+    def result(self):
+        """遍历结束后返回收集结果"""
+        raise NotImplementedError
+
+
+class _ColorCollector(_StyleCollector):
+    """
+    统计填充色、文字色与背景色，推断主色/强调色/文字色
+    （xml后端不参与遍历，只通过 add_* 累计颜色并共用 result 的推断）
+    """
+    
+    def __init__(self, rgb_to_tuple=None):
+        self._rgb_to_tuple = rgb_to_tuple
+        self.colors = {
             'fill_colors': [],      # 填充色
             'text_colors': [],      # 文字颜色
             'line_colors': [],      # 边框颜色
@@ -86,231 +88,942 @@ class TemplateStyleExtractor:
             'text': None,           # 推断的文字色
             'background': None,     # 推断的背景色
         }
-        
-        fill_color_count = {}
-        text_color_count = {}
-        bg_colors = []
-        
-        for slide in self.prs.slides:
-            # 分析背景
-            try:
-                bg = slide.background
-                if bg.fill and bg.fill.type is not None:
-                    try:
-                        if bg.fill.fore_color and bg.fill.fore_color.type is not None:
-                            rgb = bg.fill.fore_color.rgb
-                            if rgb:
-                                bg_tuple = self._rgb_to_tuple(rgb)
-                                if bg_tuple:
-                                    bg_colors.append(bg_tuple)
-                    except:
-                        pass
-            except:
-                pass
-            
-            # 分析形状
-            for shape in slide.shapes:
-                # 填充色 - 更健壮的检测方式
+        self.fill_color_count = {}
+        self.text_color_count = {}
+        self.bg_colors = []
+    
+    def add_fill(self, rgb_tuple):
+        self.colors['fill_colors'].append(rgb_tuple)
+        self.fill_color_count[rgb_tuple] = self.fill_color_count.get(rgb_tuple, 0) + 1
+    
+    def add_text(self, rgb_tuple):
+        self.colors['text_colors'].append(rgb_tuple)
+        self.text_color_count[rgb_tuple] = self.text_color_count.get(rgb_tuple, 0) + 1
+    
+    def add_line(self, rgb_tuple):
+        self.colors['line_colors'].append(rgb_tuple)
+    
+    def add_background(self, rgb_tuple):
+        self.bg_colors.append(rgb_tuple)
+    
+    def start_slide(self, idx, slide):
+        # 分析背景
+        try:
+            fill = slide.background.fill
+            if fill and fill.type is not None:
                 try:
-                    if hasattr(shape, 'fill') and shape.fill:
-                        fill = shape.fill
-                        if fill.type is not None and hasattr(fill, 'fore_color'):
-                            try:
-                                if fill.fore_color and fill.fore_color.type is not None:
-                                    rgb = fill.fore_color.rgb
-                                    if rgb:
-                                        rgb_tuple = self._rgb_to_tuple(rgb)
-                                        if rgb_tuple:
-                                            colors['fill_colors'].append(rgb_tuple)
-                                            fill_color_count[rgb_tuple] = fill_color_count.get(rgb_tuple, 0) + 1
-                            except:
-                                pass
+                    fore_color = fill.fore_color
+                    if fore_color and fore_color.type is not None:
+                        rgb = fore_color.rgb
+                        if rgb:
+                            bg_tuple = self._rgb_to_tuple(rgb)
+                            if bg_tuple:
+                                self.add_background(bg_tuple)
                 except:
                     pass
-                
-                # 文字颜色 - 更健壮的检测方式
+        except:
+            pass
+    
+    def visit_shape(self, shape, has_text):
+        # 填充色 - 更健壮的检测方式
+        try:
+            fill = getattr(shape, 'fill', None)
+            if fill and fill.type is not None and hasattr(fill, 'fore_color'):
                 try:
-                    if hasattr(shape, 'has_text_frame') and shape.has_text_frame:
-                        for paragraph in shape.text_frame.paragraphs:
-                            # 检查段落级别字体颜色
-                            try:
-                                if paragraph.font and paragraph.font.color:
-                                    if paragraph.font.color.type is not None:
-                                        rgb = paragraph.font.color.rgb
-                                        if rgb:
-                                            rgb_tuple = self._rgb_to_tuple(rgb)
-                                            if rgb_tuple:
-                                                colors['text_colors'].append(rgb_tuple)
-                                                text_color_count[rgb_tuple] = text_color_count.get(rgb_tuple, 0) + 1
-                            except:
-                                pass
-                            
-                            # 检查run级别字体颜色
-                            for run in paragraph.runs:
-                                try:
-                                    if run.font and run.font.color:
-                                        if run.font.color.type is not None:
-                                            rgb = run.font.color.rgb
-                                            if rgb:
-                                                rgb_tuple = self._rgb_to_tuple(rgb)
-                                                if rgb_tuple:
-                                                    colors['text_colors'].append(rgb_tuple)
-                                                    text_color_count[rgb_tuple] = text_color_count.get(rgb_tuple, 0) + 1
-                                except:
-                                    pass
+                    fore_color = fill.fore_color
+                    if fore_color and fore_color.type is not None:
+                        rgb = fore_color.rgb
+                        if rgb:
+                            rgb_tuple = self._rgb_to_tuple(rgb)
+                            if rgb_tuple:
+                                self.add_fill(rgb_tuple)
                 except:
                     pass
+        except:
+            pass
+    
+    def _add_text_color(self, font):
+        try:
+            if font:
+                color = font.color
+                if color and color.type is not None:
+                    rgb = color.rgb
+                    if rgb:
+                        rgb_tuple = self._rgb_to_tuple(rgb)
+                        if rgb_tuple:
+                            self.add_text(rgb_tuple)
+        except:
+            pass
+    
+    def visit_paragraph(self, paragraph):
+        # 段落级别字体颜色
+        try:
+            font = paragraph.font
+        except:
+            return
+        self._add_text_color(font)
+    
+    def visit_run(self, run, font):
+        # run级别字体颜色
+        self._add_text_color(font)
+    
+    def result(self):
+        colors = self.colors
         
         # 保存背景色
-        if bg_colors:
-            colors['background'] = bg_colors[0]
+        if self.bg_colors:
+            colors['background'] = self.bg_colors[0]
         
         # 去重
         colors['fill_colors'] = list(set(colors['fill_colors']))
         colors['text_colors'] = list(set(colors['text_colors']))
+        colors['line_colors'] = list(set(colors['line_colors']))
         
         # 推断主要颜色
-        if fill_color_count:
+        if self.fill_color_count:
             # 排除白色和接近白色的颜色作为主色
-            valid_fills = {k: v for k, v in fill_color_count.items() 
+            valid_fills = {k: v for k, v in self.fill_color_count.items() 
                           if sum(k) < 700}  # 排除接近白色的
             if valid_fills:
                 colors['primary'] = max(valid_fills, key=valid_fills.get)
         
-        if text_color_count:
+        if self.text_color_count:
             # 找最常用的深色文字
-            dark_texts = {k: v for k, v in text_color_count.items() 
+            dark_texts = {k: v for k, v in self.text_color_count.items() 
                          if sum(k) < 400}  # 深色文字
             if dark_texts:
                 colors['text'] = max(dark_texts, key=dark_texts.get)
             
             # 找强调色（非黑非白的鲜艳颜色）
-            accent_candidates = {k: v for k, v in text_color_count.items() 
+            accent_candidates = {k: v for k, v in self.text_color_count.items() 
                                 if 150 < sum(k) < 600 and 
                                 max(k) - min(k) > 50}  # 有色彩的
             if accent_candidates:
                 colors['accent'] = max(accent_candidates, key=accent_candidates.get)
         
         return colors
+
+
+class _FontCollector(_StyleCollector):
+    """统计字体名与字号（>=24pt 视为标题）"""
     
-    def _extract_fonts(self):
-        """提取模板中使用的字体信息"""
-        fonts = {
+    def __init__(self):
+        self.fonts = {
             'title_fonts': [],
             'body_fonts': [],
             'all_fonts': set(),
             'title_size': None,
             'body_size': None,
         }
-        
-        title_sizes = []
-        body_sizes = []
-        
-        for slide in self.prs.slides:
-            for shape in slide.shapes:
-                if not shape.has_text_frame:
-                    continue
-                
-                for paragraph in shape.text_frame.paragraphs:
-                    for run in paragraph.runs:
-                        try:
-                            if run.font.name:
-                                fonts['all_fonts'].add(run.font.name)
-                            
-                            # 根据字号判断是标题还是正文
-                            if run.font.size:
-                                size_pt = run.font.size.pt
-                                if size_pt >= 24:
-                                    title_sizes.append(size_pt)
-                                    if run.font.name:
-                                        fonts['title_fonts'].append(run.font.name)
-                                else:
-                                    body_sizes.append(size_pt)
-                                    if run.font.name:
-                                        fonts['body_fonts'].append(run.font.name)
-                        except:
-                            pass
+        self.title_sizes = []
+        self.body_sizes = []
+    
+    def add_name(self, name):
+        self.fonts['all_fonts'].add(name)
+    
+    def add_size(self, size_pt, name):
+        """根据字号判断是标题还是正文"""
+        if size_pt >= 24:
+            self.title_sizes.append(size_pt)
+            if name:
+                self.fonts['title_fonts'].append(name)
+        else:
+            self.body_sizes.append(size_pt)
+            if name:
+                self.fonts['body_fonts'].append(name)
+    
+    def visit_run(self, run, font):
+        try:
+            name = font.name
+            if name:
+                self.add_name(name)
+            
+            size = font.size
+            if size:
+                self.add_size(size.pt, name)
+        except:
+            pass
+    
+    def result(self):
+        fonts = self.fonts
         
         # 转换为列表
         fonts['all_fonts'] = list(fonts['all_fonts'])
         
         # 计算平均字号
-        if title_sizes:
-            fonts['title_size'] = sum(title_sizes) / len(title_sizes)
-        if body_sizes:
-            fonts['body_size'] = sum(body_sizes) / len(body_sizes)
+        if self.title_sizes:
+            fonts['title_size'] = sum(self.title_sizes) / len(self.title_sizes)
+        if self.body_sizes:
+            fonts['body_size'] = sum(self.body_sizes) / len(self.body_sizes)
         
         return fonts
+
+
+class _LayoutCollector(_StyleCollector):
+    """记录每页形状的位置尺寸，以及是否有标题、正文、占位符"""
     
-    def _extract_layouts(self):
-        """提取模板的布局信息"""
-        layouts = []
+    def __init__(self):
+        self.layouts = []
+        self.slide_layout = None
+    
+    def start_slide(self, idx, slide):
+        self.slide_layout = {
+            'index': idx,
+            'shapes': [],
+            'has_title': False,
+            'has_content': False,
+            'has_image_placeholder': False,
+        }
+    
+    def visit_shape(self, shape, has_text):
+        slide_layout = self.slide_layout
+        shape_type = shape.shape_type
+        name = shape.name
+        shape_info = {
+            'type': str(shape_type),
+            'left': shape.left,
+            'top': shape.top,
+            'width': shape.width,
+            'height': shape.height,
+            'name': name,
+            'has_text': has_text,
+        }
         
-        for idx, slide in enumerate(self.prs.slides):
-            slide_layout = {
-                'index': idx,
-                'shapes': [],
-                'has_title': False,
-                'has_content': False,
-                'has_image_placeholder': False,
-            }
+        # 判断是否为标题
+        if has_text:
+            text = shape.text_frame.text.strip()
+            lower_name = name.lower()
+            if '标题' in lower_name or 'title' in lower_name:
+                slide_layout['has_title'] = True
+            elif text:
+                slide_layout['has_content'] = True
+        
+        # 判断是否有图片占位符
+        if shape_type == MSO_SHAPE_TYPE.PLACEHOLDER:
+            slide_layout['has_image_placeholder'] = True
+        
+        slide_layout['shapes'].append(shape_info)
+    
+    def end_slide(self):
+        self.layouts.append(self.slide_layout)
+    
+    def result(self):
+        return self.layouts
+
+
+class _BackgroundCollector(_StyleCollector):
+    """记录每页背景的填充类型（纯色时附带颜色）"""
+    
+    def __init__(self, rgb_to_tuple):
+        self._rgb_to_tuple = rgb_to_tuple
+        self.backgrounds = []
+    
+    def start_slide(self, idx, slide):
+        bg_info = {'index': idx, 'type': 'unknown'}
+        
+        try:
+            fill = slide.background.fill
             
-            for shape in slide.shapes:
-                shape_info = {
-                    'type': str(shape.shape_type),
-                    'left': shape.left,
-                    'top': shape.top,
-                    'width': shape.width,
-                    'height': shape.height,
-                    'name': shape.name,
-                    'has_text': shape.has_text_frame,
-                }
-                
-                # 判断是否为标题
-                if shape.has_text_frame:
-                    text = shape.text_frame.text.strip()
-                    if '标题' in shape.name.lower() or 'title' in shape.name.lower():
-                        slide_layout['has_title'] = True
-                    elif text:
-                        slide_layout['has_content'] = True
-                
-                # 判断是否有图片占位符
-                if shape.shape_type == MSO_SHAPE_TYPE.PLACEHOLDER:
-                    slide_layout['has_image_placeholder'] = True
-                
-                slide_layout['shapes'].append(shape_info)
+            if fill.type == MSO_FILL.SOLID:
+                bg_info['type'] = 'solid'
+                rgb = fill.fore_color.rgb
+                if rgb:
+                    bg_info['color'] = self._rgb_to_tuple(rgb)
+            elif fill.type == MSO_FILL.GRADIENT:
+                bg_info['type'] = 'gradient'
+            elif fill.type == MSO_FILL.PICTURE:
+                bg_info['type'] = 'picture'
+            elif fill.type == MSO_FILL.PATTERNED:
+                bg_info['type'] = 'pattern'
+        except:
+            pass
+        
+        self.backgrounds.append(bg_info)
+    
+    def result(self):
+        return self.backgrounds
+
+
+# ========================================================================
+# 原始XML样式收集（xml后端：直接读页面XML，不经过python-pptx代理对象）
+# ========================================================================
+
+_COLOR_TAGS = (qn('a:srgbClr'), qn('a:schemeClr'), qn('a:sysClr'))
+_SOLID_FILL = qn('a:solidFill')
+_FILL_TAGS = frozenset(qn(t) for t in ('a:noFill', 'a:solidFill', 'a:gradFill', 'a:blipFill',
+                                       'a:pattFill', 'a:grpFill'))
+_FILL_OWNERS = frozenset((qn('p:spPr'), qn('a:tcPr')))
+_LINE_OWNERS = frozenset(qn(t) for t in ('a:ln', 'a:lnL', 'a:lnR', 'a:lnT', 'a:lnB'))
+_TEXT_OWNERS = frozenset((qn('a:rPr'), qn('a:defRPr')))
+_BG_PR = qn('p:bgPr')
+_FILL_REF = qn('a:fillRef')
+_LN_REF = qn('a:lnRef')
+_RUN = qn('a:r')
+_R_PR = qn('a:rPr')
+_RUN_FONT_TAGS = (qn('a:latin'), qn('a:ea'))
+_SP_PR = qn('p:spPr')
+_LN = qn('a:ln')
+_BG_PR_PATH = f"{qn('p:cSld')}/{qn('p:bg')}/{_BG_PR}"
+_BG_REF_PATH = f"{qn('p:cSld')}/{qn('p:bg')}/{qn('p:bgRef')}"
+_CLR_MAP_OVERRIDE_PATH = f"{qn('p:clrMapOvr')}/{qn('a:overrideClrMapping')}"
+_BG_FILL_TYPES = {qn('a:solidFill'): 'solid', qn('a:gradFill'): 'gradient',
+                  qn('a:blipFill'): 'picture', qn('a:pattFill'): 'pattern'}
+
+
+def _hex_to_tuple(value):
+    """'1F497D' -> (31, 73, 125)，无效值返回None"""
+    try:
+        rgb = tuple(bytes.fromhex(value))
+    except (TypeError, ValueError):
+        return None
+    return rgb if len(rgb) == 3 else None
+
+
+def _apply_color_mods(rgb, color_el):
+    """按颜色元素的 lumMod/lumOff/tint/shade 调整颜色（近似PowerPoint的算法，其他变换忽略）"""
+    mods = {}
+    for child in color_el:
+        if isinstance(child.tag, str):
+            try:
+                mods[child.tag.rpartition('}')[2]] = int(child.get('val')) / 100000
+            except (TypeError, ValueError):
+                pass
+    
+    if 'lumMod' in mods or 'lumOff' in mods:
+        h, l, s = colorsys.rgb_to_hls(*(c / 255 for c in rgb))
+        l = min(max(l * mods.get('lumMod', 1) + mods.get('lumOff', 0), 0.0), 1.0)
+        rgb = tuple(round(c * 255) for c in colorsys.hls_to_rgb(h, l, s))
+    if 'tint' in mods:
+        rgb = tuple(round(c + (255 - c) * (1 - mods['tint'])) for c in rgb)
+    if 'shade' in mods:
+        rgb = tuple(round(c * mods['shade']) for c in rgb)
+    return rgb
+
+
+class _ThemeInfo:
+    """母版的配色方案、主题字体与颜色映射（解析 schemeClr 与 +mj-lt 等主题字体引用）"""
+    
+    def __init__(self, master):
+        self.colors = {}        # 'accent1' -> (r, g, b)
+        self.fonts = {}         # '+mj-lt' -> 'Calibri'
+        self.fill_styles = []   # 主题 fillStyleLst 各项的填充元素tag
+        self.bg_fill_styles = []  # 主题 bgFillStyleLst 各项的填充元素tag
+        clr_map = master.element.find(qn('p:clrMap'))
+        self.color_map = dict(clr_map.attrib) if clr_map is not None else {}
+        
+        try:
+            theme = etree.fromstring(master.part.part_related_by(RT.THEME).blob)
+        except (KeyError, etree.XMLSyntaxError):
+            return
+        
+        scheme = theme.find(f"{qn('a:themeElements')}/{qn('a:clrScheme')}")
+        for slot in (scheme if scheme is not None else ()):
+            if not isinstance(slot.tag, str) or not len(slot):
+                continue
+            color_el = slot[0]
+            value = color_el.get('lastClr') if color_el.tag == qn('a:sysClr') else color_el.get('val')
+            rgb = _hex_to_tuple(value)
+            if rgb:
+                self.colors[slot.tag.rpartition('}')[2]] = rgb
+        
+        fmt_scheme = theme.find(f"{qn('a:themeElements')}/{qn('a:fmtScheme')}")
+        if fmt_scheme is not None:
+            for attr, tag in (('fill_styles', 'a:fillStyleLst'), ('bg_fill_styles', 'a:bgFillStyleLst')):
+                style_lst = fmt_scheme.find(qn(tag))
+                if style_lst is not None:
+                    setattr(self, attr, [child.tag for child in style_lst if isinstance(child.tag, str)])
+        
+        font_scheme = theme.find(f"{qn('a:themeElements')}/{qn('a:fontScheme')}")
+        for prefix, group_tag in (('+mj', 'a:majorFont'), ('+mn', 'a:minorFont')):
+            group = font_scheme.find(qn(group_tag)) if font_scheme is not None else None
+            if group is None:
+                continue
+            for suffix, tag in (('lt', 'a:latin'), ('ea', 'a:ea'), ('cs', 'a:cs')):
+                font = group.find(qn(tag))
+                if font is not None and font.get('typeface'):
+                    self.fonts[f'{prefix}-{suffix}'] = font.get('typeface')
+    
+    def resolve_color(self, color_el, color_map):
+        """srgbClr/schemeClr/sysClr 元素 -> (r, g, b)，无法解析时返回None"""
+        tag = color_el.tag
+        if tag == _COLOR_TAGS[0]:
+            rgb = _hex_to_tuple(color_el.get('val'))
+        elif tag == _COLOR_TAGS[1]:
+            name = color_el.get('val')
+            rgb = self.colors.get(color_map.get(name, name))
+        else:
+            rgb = _hex_to_tuple(color_el.get('lastClr'))
+        
+        if rgb and len(color_el):
+            rgb = _apply_color_mods(rgb, color_el)
+        return rgb
+    
+    def background_type(self, bg_ref):
+        """p:bgRef 引用的主题背景填充类型（idx 1-999 取 fillStyleLst，1001起取 bgFillStyleLst），0 为无背景"""
+        try:
+            idx = int(bg_ref.get('idx', '0'))
+        except ValueError:
+            return None
+        if idx <= 0:
+            return None
+        styles, pos = (self.bg_fill_styles, idx - 1001) if idx >= 1001 else (self.fill_styles, idx - 1)
+        if 0 <= pos < len(styles):
+            return _BG_FILL_TYPES.get(styles[pos])
+        return 'solid'  # 主题缺少格式方案时按纯色处理
+    
+    def resolve_font(self, typeface):
+        """主题字体引用（+mj-lt 等）换成实际字体名"""
+        if typeface and typeface.startswith('+'):
+            return self.fonts.get(typeface)
+        return typeface or None
+
+
+class _XmlStyleCollector(_StyleCollector):
+    """
+    xml后端：每页直接遍历页面XML，一次收集颜色、字体与背景
+    
+    - 颜色：a:srgbClr / a:schemeClr / a:sysClr，按所在位置分为填充、边框、文字、背景；
+      主题色按母版配色方案与颜色映射解析，形状未设置填充/边框时取 p:style 引用的主题色
+    - 字体：run 的 a:latin / a:ea（主题字体引用按母版主题解析）与 sz
+    - 只读XML，不修改模板
+    
+    result() 返回 (colors, fonts, backgrounds)，结构与代理对象收集器相同
+    """
+    
+    def __init__(self):
+        self.colors = _ColorCollector()
+        self.fonts = _FontCollector()
+        self.backgrounds = []
+        self._themes = {}   # 母版part -> _ThemeInfo
+    
+    def _theme_for(self, slide):
+        master = slide.slide_layout.slide_master
+        theme = self._themes.get(master.part)
+        if theme is None:
+            theme = self._themes[master.part] = _ThemeInfo(master)
+        return theme
+    
+    def start_slide(self, idx, slide):
+        root = slide.element
+        theme = self._theme_for(slide)
+        override = root.find(_CLR_MAP_OVERRIDE_PATH)
+        color_map = dict(override.attrib) if override is not None else theme.color_map
+        
+        # 背景
+        bg_info = {'index': idx, 'type': 'unknown'}
+        bg_pr = root.find(_BG_PR_PATH)
+        if bg_pr is not None:
+            for child in bg_pr:
+                bg_type = _BG_FILL_TYPES.get(child.tag)
+                if bg_type:
+                    bg_info['type'] = bg_type
+                    if bg_type == 'solid' and len(child):
+                        rgb = theme.resolve_color(child[0], color_map)
+                        if rgb:
+                            bg_info['color'] = rgb
+                    break
+        else:
+            # 主题背景：bgRef 引用主题的背景填充样式，颜色由其中的 schemeClr 等子元素给出
+            bg_ref = root.find(_BG_REF_PATH)
+            if bg_ref is not None:
+                bg_type = theme.background_type(bg_ref)
+                if bg_type:
+                    bg_info['type'] = bg_type
+                    color_el = next((child for child in bg_ref if child.tag in _COLOR_TAGS), None)
+                    if bg_type == 'solid' and color_el is not None:
+                        rgb = theme.resolve_color(color_el, color_map)
+                        if rgb:
+                            bg_info['color'] = rgb
+                            self.colors.add_background(rgb)
+        self.backgrounds.append(bg_info)
+        
+        for el in root.iter(_RUN, *_COLOR_TAGS):
+            if el.tag == _RUN:
+                self._add_run(el, theme)
+                continue
+            
+            parent = el.getparent()
+            if parent.tag == _SOLID_FILL:
+                owner = parent.getparent().tag
+                if owner in _FILL_OWNERS:
+                    add = self.colors.add_fill
+                elif owner in _TEXT_OWNERS:
+                    add = self.colors.add_text
+                elif owner in _LINE_OWNERS:
+                    add = self.colors.add_line
+                elif owner == _BG_PR:
+                    add = self.colors.add_background
+                else:
+                    continue
+            elif parent.tag == _FILL_REF and self._uses_style(parent, None):
+                add = self.colors.add_fill
+            elif parent.tag == _LN_REF and self._uses_style(parent, _LN):
+                add = self.colors.add_line
+            else:
+                continue
             
-            layouts.append(slide_layout)
+            rgb = theme.resolve_color(el, color_map)
+            if rgb:
+                add(rgb)
+    
+    @staticmethod
+    def _uses_style(ref, line_tag):
+        """形状自身未设置填充（或边框）且样式引用非0时，生效的是 p:style 中的主题色"""
+        if ref.get('idx', '0') == '0':
+            return False
+        shape = ref.getparent().getparent()
+        sp_pr = shape.find(_SP_PR)
+        if sp_pr is None:
+            return True
+        if line_tag is not None:
+            sp_pr = sp_pr.find(line_tag)
+            if sp_pr is None:
+                return True
+        return not any(child.tag in _FILL_TAGS for child in sp_pr)
+    
+    def _add_run(self, run, theme):
+        r_pr = run.find(_R_PR)
+        if r_pr is None:
+            return
+        
+        names = []
+        for tag in _RUN_FONT_TAGS:
+            font = r_pr.find(tag)
+            if font is not None:
+                name = theme.resolve_font(font.get('typeface'))
+                if name:
+                    names.append(name)
+                    self.fonts.add_name(name)
+        
+        sz = r_pr.get('sz')
+        if sz and sz.isdigit():
+            self.fonts.add_size(int(sz) / 100, names[0] if names else None)
+    
+    def result(self):
+        return self.colors.result(), self.fonts.result(), self.backgrounds
+
+
+# ========================================================================
+# 模板分析缓存
+# ========================================================================
+
+# 样式提取逻辑（提取结果）变化时递增，旧的分析缓存随之失效
+EXTRACTOR_VERSION = 2
+
+DEFAULT_TEMPLATE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.ppt_auto_cache', 'templates')
+DEFAULT_TEMPLATE_CACHE_ENTRIES = 64
+
+
+def _style_from_json(style):
+    """把JSON读回的样式还原为 extract_all() 的原始类型（颜色元组、Emu长度）"""
+    def color(value):
+        return tuple(value) if value else value
+    
+    def length(value):
+        return Emu(value) if value is not None else None
+    
+    colors = style['colors']
+    for key in ('fill_colors', 'text_colors', 'line_colors'):
+        colors[key] = [tuple(c) for c in colors[key]]
+    for key in ('primary', 'accent', 'text', 'background'):
+        colors[key] = color(colors[key])
+    
+    size = style['slide_size']
+    size['width'] = length(size['width'])
+    size['height'] = length(size['height'])
+    
+    for layout in style['layouts']:
+        for shape in layout['shapes']:
+            for key in ('left', 'top', 'width', 'height'):
+                shape[key] = length(shape[key])
+    
+    for bg in style['backgrounds']:
+        if 'color' in bg:
+            bg['color'] = color(bg['color'])
+    
+    return style
+
+
+class TemplateAnalysisCache:
+    """
+    模板分析结果的磁盘缓存（JSON）
+    每个模板对应一个文件：<cache_dir>/<模板内容sha256>-<提取方式>.json
+    模板内容或 EXTRACTOR_VERSION 变化即视为未命中；条目数超过上限时淘汰最久未使用的条目
+    """
+    
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_TEMPLATE_CACHE_ENTRIES):
+        """
+        Args:
+            cache_dir: 缓存目录（默认 ~/.ppt_auto_cache/templates）
+            max_entries: 最多保留的条目数（模板每修改一次产生一个新条目）
+        """
+        self.cache_dir = cache_dir or DEFAULT_TEMPLATE_CACHE_DIR
+        self.max_entries = max_entries
+    
+    @staticmethod
+    def file_hash(path):
+        """模板文件内容的sha256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _entry_path(self, template_hash, backend):
+        return os.path.join(self.cache_dir, f"{template_hash}-{backend}.json")
+    
+    def load(self, template_hash, backend):
+        """
+        读取缓存（不存在、损坏或版本不符时返回None）
         
-        return layouts
+        Returns:
+            tuple: (样式字典, 主题配置字典) 或 None
+        """
+        entry = self._entry_path(template_hash, backend)
+        try:
+            with open(entry, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != EXTRACTOR_VERSION:
+                return None
+            os.utime(entry)  # 刷新访问时间，用于LRU
+            theme = {'name': data['theme']['name']}
+            theme.update((key, RGBColor.from_string(value)) for key, value in data['theme']['colors'].items())
+            return _style_from_json(data['style']), theme
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
     
-    def _extract_backgrounds(self):
-        """提取各页面的背景设置"""
-        backgrounds = []
+    def save(self, template_hash, backend, style, theme):
+        """原子写入缓存，返回是否成功"""
+        data = {
+            'version': EXTRACTOR_VERSION,
+            'backend': backend,
+            'style': style,
+            'theme': {
+                'name': theme['name'],
+                'colors': {key: str(value) for key, value in theme.items() if isinstance(value, RGBColor)},
+            },
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self._entry_path(template_hash, backend))
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self.evict()
+        return True
+    
+    def _entries(self):
+        """列出所有缓存条目 (路径, 访问时间)"""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((path, os.stat(path).st_mtime))
+            except OSError:
+                pass
+        return entries
+    
+    def evict(self):
+        """条目数超限时，按最久未使用顺序删除，返回删除的条目数"""
+        entries = self._entries()
+        removed = 0
+        for path, _ in sorted(entries, key=lambda e: e[1])[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+    
+    def clear(self):
+        """删除所有缓存条目"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+# ========================================================================
+# 模板句柄（提取器与生成器共享同一份已加载的模板）
+# ========================================================================
+
+class TemplateHandle:
+    """
+    模板文件的句柄：首次访问 prs 时才加载 Presentation，之后提取器、生成器共用这一份
+    分析缓存命中且使用克隆模式时，模板文件不会被加载
+    模板文件只读盘一次；填充模式需要可修改的输出底稿时，从内存中的文件内容另外解析一份（working_copy）
+    """
+    
+    def __init__(self, template_path):
+        """
+        Args:
+            template_path: 模板PPT文件路径
+        """
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(f"模板文件不存在: {template_path}")
+        
+        self.path = template_path
+        self.loads = 0          # 共享演示文稿的加载次数（0 或 1）
+        self.copies = 0         # 解析的输出底稿份数（填充模式每次生成一份）
+        self._blob = None
+        self._prs = None
+        self._content_hash = None
+    
+    @property
+    def blob(self):
+        """模板文件内容（首次访问时读盘）"""
+        if self._blob is None:
+            with open(self.path, 'rb') as f:
+                self._blob = f.read()
+        return self._blob
+    
+    @property
+    def prs(self):
+        """已加载的模板演示文稿（首次访问时加载）"""
+        if self._prs is None:
+            self._prs = Presentation(io.BytesIO(self.blob))
+            self.loads += 1
+        return self._prs
+    
+    @property
+    def loaded(self):
+        return self._prs is not None
+    
+    def working_copy(self):
+        """解析一份独立、可修改的模板演示文稿（不影响共享的 prs，也不重新读盘）"""
+        self.copies += 1
+        return Presentation(io.BytesIO(self.blob))
+    
+    @property
+    def content_hash(self):
+        """模板文件内容的sha256（分析缓存的键，只计算一次）"""
+        if self._content_hash is None:
+            if self._blob is not None:
+                self._content_hash = hashlib.sha256(self._blob).hexdigest()
+            else:
+                self._content_hash = TemplateAnalysisCache.file_hash(self.path)
+        return self._content_hash
+
+
+def open_template(template_path):
+    """
+    按路径取得共享的模板句柄（同一文件多次调用返回同一句柄，文件修改后重新打开）
+    
+    只要还有提取器、生成器或调用方持有句柄就一直共享；不再被引用时句柄及其加载的演示文稿随之释放
+    
+    Args:
+        template_path: 模板PPT文件路径
+    
+    Returns:
+        TemplateHandle: 模板句柄
+    """
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"模板文件不存在: {template_path}")
+    st = os.stat(template_path)
+    key = (os.path.abspath(template_path), st.st_mtime_ns, st.st_size)
+    handle = _shared_templates.get(key)
+    if handle is None:
+        handle = _shared_templates[key] = TemplateHandle(key[0])
+    return handle
+
+
+# (绝对路径, 修改时间, 大小) -> 模板句柄（弱引用，不延长句柄的生命周期）
+_shared_templates = weakref.WeakValueDictionary()
+
+
+def close_templates():
+    """不再共享 open_template 已打开的模板（之后的调用重新打开）"""
+    _shared_templates.clear()
+
+
+# ========================================================================
+# 模板样式提取器
+# ========================================================================
+
+class TemplateStyleExtractor:
+    """
+    从PPT模板中提取样式要素
+    提取内容：主题色、强调色、字体、布局等
+    """
+    
+    # 颜色/字体/背景的提取方式：
+    #   'xml'   - 直接读页面XML，解析主题色与主题字体（默认，快）
+    #   'proxy' - 逐个访问python-pptx代理对象（只识别显式RGB颜色）
+    BACKENDS = ('xml', 'proxy')
+    
+    def __init__(self, template_path, backend='xml', use_cache=True, cache_dir=None):
+        """
+        初始化提取器（模板在需要遍历时才加载，分析缓存命中时不加载）
+        
+        Args:
+            template_path: 模板PPT文件路径，或共享的 TemplateHandle
+            backend: 颜色/字体/背景的提取方式（'xml' 或 'proxy'，布局始终经由代理对象）
+            use_cache: 是否使用分析缓存（同一模板文件不重复分析）
+            cache_dir: 分析缓存目录（默认 ~/.ppt_auto_cache/templates）
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"未知的提取方式: {backend}（可选: {', '.join(self.BACKENDS)}）")
+        
+        self.template = template_path if isinstance(template_path, TemplateHandle) else TemplateHandle(template_path)
+        self.template_path = self.template.path
+        self.backend = backend
+        self.cache = TemplateAnalysisCache(cache_dir) if use_cache else None
+        self.cache_hit = False
+        self.extracted_style = None
+        self._theme = None
+    
+    @property
+    def prs(self):
+        return self.template.prs
+        
+    def extract_all(self):
+        """
+        提取模板的所有样式信息
+        
+        颜色、字体、布局、背景在同一次遍历（页面→形状→段落→run）中收集
+        
+        Returns:
+            dict: 包含颜色、字体、布局等的完整样式配置
+        """
+        template_hash = None
+        if self.cache is not None:
+            template_hash = self.template.content_hash
+            cached = self.cache.load(template_hash, self.backend)
+            if cached:
+                self.extracted_style, self._theme = cached
+                self.cache_hit = True
+                return self.extracted_style
+        
+        if self.backend == 'xml':
+            (colors, fonts, backgrounds), layouts = self._walk_slides([
+                _XmlStyleCollector(),
+                _LayoutCollector(),
+            ])
+        else:
+            colors, fonts, layouts, backgrounds = self._walk_slides([
+                _ColorCollector(self._rgb_to_tuple),
+                _FontCollector(),
+                _LayoutCollector(),
+                _BackgroundCollector(self._rgb_to_tuple),
+            ])
+        
+        self.extracted_style = {
+            'slide_size': self._extract_slide_size(),
+            'colors': colors,
+            'fonts': fonts,
+            'layouts': layouts,
+            'backgrounds': backgrounds,
+            'slide_masters': self._extract_slide_masters_info(),
+        }
+        self._theme = self._build_theme_config()
+        
+        if template_hash:
+            self.cache.save(template_hash, self.backend, self.extracted_style, self._theme)
+        
+        return self.extracted_style
+    
+    def _walk_slides(self, collectors):
+        """
+        遍历一次所有页面，把页面、形状、段落、run 依次交给各收集器
+        
+        形状的文本框、段落与run的字体对象只创建一次，由各收集器共享
+        
+        Args:
+            collectors: _StyleCollector 列表（回调顺序即列表顺序）
+        
+        Returns:
+            list: 各收集器的结果，顺序与 collectors 一致
+        """
+        # 只回调收集器实际实现的钩子
+        def hooks(name):
+            return [getattr(c, name) for c in collectors
+                    if getattr(type(c), name) is not getattr(_StyleCollector, name)]
+        
+        on_slide = hooks('start_slide')
+        on_shape = hooks('visit_shape')
+        on_paragraph = hooks('visit_paragraph')
+        on_run = hooks('visit_run')
+        on_slide_end = hooks('end_slide')
+        wants_text = bool(on_paragraph or on_run)
+        wants_shapes = bool(on_shape) or wants_text
         
         for idx, slide in enumerate(self.prs.slides):
-            bg_info = {'index': idx, 'type': 'unknown'}
+            for hook in on_slide:
+                hook(idx, slide)
             
-            try:
-                bg = slide.background
-                fill = bg.fill
+            for shape in (slide.shapes if wants_shapes else ()):
+                has_text = shape.has_text_frame
+                for hook in on_shape:
+                    hook(shape, has_text)
                 
-                if fill.type == 1:  # 纯色
-                    bg_info['type'] = 'solid'
-                    if fill.fore_color.rgb:
-                        bg_info['color'] = self._rgb_to_tuple(fill.fore_color.rgb)
-                elif fill.type == 2:  # 渐变
-                    bg_info['type'] = 'gradient'
-                elif fill.type == 3:  # 图片
-                    bg_info['type'] = 'picture'
-                elif fill.type == 4:  # 图案
-                    bg_info['type'] = 'pattern'
-            except:
-                pass
+                if not (has_text and wants_text):
+                    continue
+                
+                for paragraph in shape.text_frame.paragraphs:
+                    for hook in on_paragraph:
+                        hook(paragraph)
+                    if on_run:
+                        for run in paragraph.runs:
+                            font = run.font
+                            for hook in on_run:
+                                hook(run, font)
             
-            backgrounds.append(bg_info)
+            for hook in on_slide_end:
+                hook()
         
-        return backgrounds
+        return [c.result() for c in collectors]
+    
+    def _extract_slide_size(self):
+        """提取幻灯片尺寸"""
+        return {
+            'width': self.prs.slide_width,
+            'height': self.prs.slide_height,
+            'width_inches': self.prs.slide_width.inches,
+            'height_inches': self.prs.slide_height.inches,
+        }
+    
+    def _extract_colors(self):
+        """
+        从模板中提取主要使用的颜色
+        分析所有形状和文本的颜色使用情况
+        """
+        if self.backend == 'xml':
+            return self._walk_slides([_XmlStyleCollector()])[0][0]
+        return self._walk_slides([_ColorCollector(self._rgb_to_tuple)])[0]
+    
+    def _extract_fonts(self):
+        """提取模板中使用的字体信息"""
+        if self.backend == 'xml':
+            return self._walk_slides([_XmlStyleCollector()])[0][1]
+        return self._walk_slides([_FontCollector()])[0]
+    
+    def _extract_layouts(self):
+        """提取模板的布局信息"""
+        return self._walk_slides([_LayoutCollector()])[0]
+    
+    def _extract_backgrounds(self):
+        """提取各页面的背景设置"""
+        if self.backend == 'xml':
+            return self._walk_slides([_XmlStyleCollector()])[0][2]
+        return self._walk_slides([_BackgroundCollector(self._rgb_to_tuple)])[0]
+    
     
     def _extract_slide_masters_info(self):
         """提取母版信息"""
@@ -328,7 +1041,7 @@ class TemplateStyleExtractor:
     def _rgb_to_tuple(self, rgb):
         """将RGBColor转换为元组"""
         if isinstance(rgb, RGBColor):
-            return (rgb.red, rgb.green, rgb.blue)
+            return tuple(rgb)
         return None
     
     def get_theme_config(self):
@@ -340,7 +1053,13 @@ class TemplateStyleExtractor:
         """
         if not self.extracted_style:
             self.extract_all()
+        if self._theme is None:
+            self._theme = self._build_theme_config()
         
+        return dict(self._theme)
+    
+    def _build_theme_config(self):
+        """由提取的颜色推断主题配置（未识别的颜色使用默认值）"""
         colors = self.extracted_style['colors']
         
         # 构建主题配置
@@ -414,6 +1133,145 @@ class TemplateStyleExtractor:
         print("\n" + "="*60)
 
 
+# ========================================================================
+# 页面克隆（填充模式按XML部件复制模板页面）
+# ========================================================================
+
+# 不随页面复制的关系：版式由新页面自带，备注与批注属于模板页面本身
+_CLONE_SKIPPED_RELTYPES = frozenset((RT.SLIDE_LAYOUT, RT.NOTES_SLIDE, RT.COMMENTS))
+# 可以被多个页面共用的部件直接共享，其余（图表、内嵌工作簿、SmartArt等）随页面复制一份
+_CLONE_SHARED_RELTYPES = frozenset((RT.IMAGE, RT.MEDIA, RT.VIDEO, RT.AUDIO, RT.SLIDE))
+_R_NAMESPACE = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_SECTION_LIST = '{http://schemas.microsoft.com/office/powerpoint/2010/main}sectionLst'
+
+
+def _partname_template(partname):
+    """'/ppt/charts/chart3.xml' -> '/ppt/charts/chart%d.xml'（供 package.next_partname 编号）"""
+    return re.sub(r'\d*(\.\w+)$', r'%d\1', str(partname))
+
+
+def _remap_rids(element, rid_map):
+    """把元素树中所有 r:id / r:embed / r:link 等关系引用换成新的rId"""
+    for el in element.iter():
+        for name, value in el.attrib.items():
+            if name.startswith(_R_NAMESPACE) and value in rid_map:
+                el.set(name, rid_map[value])
+
+
+def _clone_rels(source_part, target_part, package, copies):
+    """
+    把 source_part 的关系复制到 target_part
+    
+    Args:
+        copies: 已复制的部件 {原部件: 新部件}（同一部件被多处引用时只复制一次）
+    
+    Returns:
+        dict: {原rId: 新rId}
+    """
+    rid_map = {}
+    for rId, rel in source_part.rels.items():
+        if rel.reltype in _CLONE_SKIPPED_RELTYPES:
+            continue
+        if rel.is_external:
+            rid_map[rId] = target_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+        elif rel.reltype in _CLONE_SHARED_RELTYPES:
+            rid_map[rId] = target_part.relate_to(rel.target_part, rel.reltype)
+        else:
+            part = rel.target_part
+            copied = copies.get(part)
+            if copied is None:
+                partname = package.next_partname(_partname_template(part.partname))
+                copied = copies[part] = type(part).load(partname, part.content_type, package, part.blob)
+                # 先建立关系使新部件可达，后续编号才不会重复
+                rid_map[rId] = target_part.relate_to(copied, rel.reltype)
+                nested = _clone_rels(part, copied, package, copies)
+                if nested and hasattr(copied, '_element'):
+                    _remap_rids(copied._element, nested)
+            else:
+                rid_map[rId] = target_part.relate_to(copied, rel.reltype)
+    return rid_map
+
+
+def _clone_slide(prs, source_slide):
+    """
+    在 prs 末尾追加 source_slide 的副本（source_slide 须属于 prs）
+    
+    整棵页面XML（形状树、背景、动画等）深拷贝；图片共享原部件，图表等页面私有部件复制一份
+    """
+    source_part = source_slide.part
+    package = prs.part.package
+    slide_part = SlidePart(prs.part._next_slide_partname, source_part.content_type, package,
+                           deepcopy(source_slide._element))
+    slide_part.relate_to(source_slide.slide_layout.part, RT.SLIDE_LAYOUT)
+    _remap_rids(slide_part._element, _clone_rels(source_part, slide_part, package, {}))
+    
+    rId = prs.part.relate_to(slide_part, RT.SLIDE)
+    prs.slides._sldIdLst.add_sldId(rId)
+    return slide_part.slide
+
+
+# 填充模式按占位符类型决定替换哪段文字；日期、页脚、页码等其余占位符保持模板原样
+_TITLE_PLACEHOLDERS = frozenset((PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE, PP_PLACEHOLDER.VERTICAL_TITLE))
+_BODY_PLACEHOLDERS = frozenset((PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT,
+                                PP_PLACEHOLDER.VERTICAL_BODY, PP_PLACEHOLDER.VERTICAL_OBJECT))
+_BODY_NAME_KEYWORDS = ('body', 'content', '正文', '内容')
+
+
+def _text_role(shape):
+    """
+    填充模式中文本形状的角色：'title' / 'subtitle' / 'body'
+    占位符按类型判断，普通形状按名称判断；其余形状（页脚、说明文字、装饰标签等）返回None，文字不动
+    """
+    if shape.is_placeholder:
+        ph_type = shape.placeholder_format.type
+        if ph_type == PP_PLACEHOLDER.SUBTITLE:
+            return 'subtitle'
+        if ph_type in _TITLE_PLACEHOLDERS:
+            return 'title'
+        if ph_type in _BODY_PLACEHOLDERS:
+            return 'body'
+        return None
+    
+    name = shape.name.lower()
+    if 'subtitle' in name or '副标题' in name:
+        return 'subtitle'
+    if 'title' in name or '标题' in name:
+        return 'title'
+    if any(keyword in name for keyword in _BODY_NAME_KEYWORDS):
+        return 'body'
+    return None
+
+
+def _replace_text(txBody, lines):
+    """
+    原位替换文本框内容：第i行沿用模板第i段（超出时沿用最后一段）的段落格式与首个run的字符格式
+    """
+    # 与生成器共用控制字符转义；ppt_generator 在导入时加载本模块，只能在调用时导入
+    from ppt_generator import _escape_ctrl_chars
+    
+    paragraphs = txBody.findall(qn('a:p'))
+    for p in paragraphs:
+        txBody.remove(p)
+    if not paragraphs:
+        paragraphs = [OxmlElement('a:p')]
+    
+    for i, line in enumerate(lines or ['']):
+        source = paragraphs[min(i, len(paragraphs) - 1)]
+        p = SubElement(txBody, qn('a:p'))
+        pPr = source.find(qn('a:pPr'))
+        if pPr is not None:
+            p.append(deepcopy(pPr))
+        if line:
+            r = SubElement(p, qn('a:r'))
+            rPr = source.find(f"{qn('a:r')}/{qn('a:rPr')}")
+            if rPr is not None:
+                r.append(deepcopy(rPr))
+            SubElement(r, qn('a:t')).text = _escape_ctrl_chars(line)
+        end = source.find(qn('a:endParaRPr'))
+        if end is not None:
+            p.append(deepcopy(end))
+
+
 # ========================================================================
 # 基于模板的PPT生成器
 # ========================================================================
@@ -426,30 +1284,48 @@ class TemplateBasedGenerator:
     2. 样式克隆模式：使用模板样式，但重新生成页面结构
     """
     
-    def __init__(self, template_path):
+    # 页面类型 -> 渲染函数，未注册类型按内容页生成（类定义后注册内置类型）
+    RENDERERS = SlideRendererRegistry('TemplateBasedGenerator')
+    
+    def __init__(self, template_path, use_cache=True, cache_dir=None):
         """
         初始化生成器
         
+        同一个生成器可以多次调用 generate_from_json，模板只加载一次（克隆模式且分析缓存命中时不加载）
+        
         Args:
-            template_path: 模板PPT文件路径
+            template_path: 模板PPT文件路径，或共享的 TemplateHandle（见 open_template）
+            use_cache: 是否使用模板分析缓存
+            cache_dir: 分析缓存目录（默认 ~/.ppt_auto_cache/templates）
         """
-        if not os.path.exists(template_path):
-            raise FileNotFoundError(f"模板文件不存在: {template_path}")
-        
-        self.template_path = template_path
-        self.template_prs = Presentation(template_path)
+        self.template = template_path if isinstance(template_path, TemplateHandle) else TemplateHandle(template_path)
+        self.template_path = self.template.path
         
-        # 提取模板样式
-        self.extractor = TemplateStyleExtractor(template_path)
+        # 提取模板样式（与生成器共用同一模板句柄）
+        self.extractor = TemplateStyleExtractor(self.template, use_cache=use_cache, cache_dir=cache_dir)
         self.style = self.extractor.extract_all()
         self.theme = self.extractor.get_theme_config()
         
         # 用于生成的演示文稿
         self.prs = None
         self.slide_index = 0
+        self.render_stats = {}  # 按页面类型统计 {'count', 'seconds'}
+        self._template_slides = None  # 填充模式的模板页面分析（多次生成共用）
+        self._slide_clones = {}
         
-        print(f"✅ 模板加载成功: {template_path}")
-        print(f"📄 模板包含 {len(self.template_prs.slides)} 个页面")
+        print(f"✅ 模板加载成功: {self.template_path}{'（样式分析来自缓存）' if self.extractor.cache_hit else ''}")
+        print(f"📄 模板包含 {len(self.style['layouts'])} 个页面")
+    
+    @property
+    def template_prs(self):
+        """模板演示文稿（首次访问时加载）"""
+        return self.template.prs
+    
+    def _new_presentation(self):
+        """按模板尺寸创建输出用的演示文稿"""
+        self.prs = Presentation()
+        self.prs.slide_width = self.style['slide_size']['width']
+        self.prs.slide_height = self.style['slide_size']['height']
     
     def generate_from_json(self, json_path_or_data, output_path, mode='clone'):
         """
@@ -471,6 +1347,8 @@ class TemplateBasedGenerator:
                 data = json.load(f)
         
         slides_data = data.get('slides', [])
+        self.slide_index = 0
+        self.render_stats = {}
         
         print(f"\n{'='*60}")
         print(f"🚀 开始基于模板生成PPT (模式: {mode})")
@@ -484,6 +1362,8 @@ class TemplateBasedGenerator:
         print(f"\n{'='*60}")
         print(f"✅ PPT生成成功！")
         print(f"📊 总页数: {len(self.prs.slides)}")
+        if self.render_stats:
+            print(f"⏱️  渲染耗时: {format_render_stats(self.render_stats)}")
         print(f"📁 输出路径: {output_path}")
         print(f"{'='*60}\n")
     
@@ -491,21 +1371,18 @@ class TemplateBasedGenerator:
         """
         填充模式：复制模板页面，填充内容
         
-        适用于模板有明确占位符结构的情况
+        适用于模板有明确占位符结构的情况。输出以模板文件为底稿（保留母版、版式与主题），
+        匹配到的模板页面按XML整页克隆后原位替换文字，最后删除模板原有页面
         """
-        # 创建模板的副本
-        self.prs = Presentation(self.template_path)
+        # 获取模板中的页面类型映射（同一生成器多次生成时只分析一次）
+        if self._template_slides is None:
+            self._template_slides = self._analyze_template_slides()
+        template_slides = self._template_slides
         
-        # 获取模板中的页面类型映射
-        template_slides = self._analyze_template_slides()
-        
-        # 清空现有内容（保留第一页作为模板）
-        # 注意：python-pptx不支持直接删除幻灯片，我们需要另一种方式
-        
-        # 创建新的演示文稿，但使用模板的母版
-        self.prs = Presentation()
-        self.prs.slide_width = self.template_prs.slide_width
-        self.prs.slide_height = self.template_prs.slide_height
+        # 以模板为底稿创建新的演示文稿
+        self.prs = self.template.working_copy()
+        original_ids = list(self.prs.slides._sldIdLst)
+        self._slide_clones = {}  # 模板页面部件 -> 克隆出的页面部件列表
         
         for slide_data in slides_data:
             slide_type = slide_data.get('type')
@@ -522,6 +1399,8 @@ class TemplateBasedGenerator:
             
             self.slide_index += 1
         
+        self._relink_slide_jumps()
+        self._drop_template_slides(original_ids)
         self.prs.save(output_path)
     
     def _generate_clone_mode(self, slides_data, output_path):
@@ -531,9 +1410,7 @@ class TemplateBasedGenerator:
         这是更通用的方式，提取模板的颜色/字体等样式后生成
         """
         # 创建新的演示文稿
-        self.prs = Presentation()
-        self.prs.slide_width = self.template_prs.slide_width
-        self.prs.slide_height = self.template_prs.slide_height
+        self._new_presentation()
         
         for slide_data in slides_data:
             self._create_slide_with_style(slide_data)
@@ -619,117 +1496,79 @@ class TemplateBasedGenerator:
     def _copy_and_fill_slide(self, template_slide, data):
         """
         复制模板页面并填充内容
-        """
-        # 添加空白页
-        layout = self.prs.slide_layouts[6]  # 空白布局
-        new_slide = self.prs.slides.add_slide(layout)
         
-        # 复制背景
-        try:
-            bg = template_slide.background
-            new_bg = new_slide.background
-            if bg.fill.type == 1:  # 纯色
-                new_bg.fill.solid()
-                new_bg.fill.fore_color.rgb = bg.fill.fore_color.rgb
-        except:
-            pass
-        
-        # 复制并填充形状
-        title_text = data.get('title', '')
-        subtitle_text = data.get('subtitle', '')
-        bullets = data.get('bullets', [])
-        
-        for shape in template_slide.shapes:
-            try:
-                # 复制形状的位置和尺寸
-                left = shape.left
-                top = shape.top
-                width = shape.width
-                height = shape.height
-                
-                shape_name = shape.name.lower()
-                
-                if shape.has_text_frame:
-                    # 创建文本框
-                    new_shape = new_slide.shapes.add_textbox(left, top, width, height)
-                    new_tf = new_shape.text_frame
-                    
-                    # 填充内容
-                    if 'title' in shape_name or '标题' in shape_name:
-                        new_tf.text = title_text
-                    elif 'subtitle' in shape_name or '副标题' in shape_name:
-                        new_tf.text = subtitle_text
-                    elif bullets:
-                        # 填充要点
-                        for i, bullet in enumerate(bullets):
-                            if i == 0:
-                                new_tf.paragraphs[0].text = bullet
-                            else:
-                                p = new_tf.add_paragraph()
-                                p.text = bullet
-                    
-                    # 复制样式
-                    self._copy_text_style(shape.text_frame, new_tf)
-                    
-            except Exception as e:
-                print(f"  ⚠️ 复制形状时出错: {e}")
+        template_slide 来自模板句柄，按 slide_id 找到输出底稿中的同一页面后整页克隆
+        （形状、图片、图表、背景原样保留），再替换标题、副标题与正文占位符的文字
+        """
+        source = self.prs.slides.get(template_slide.slide_id)
+        new_slide = _clone_slide(self.prs, source)
+        self._slide_clones.setdefault(source.part, []).append(new_slide.part)
+        
+        # 标题、副标题、正文各替换第一个对应的形状，其余文本形状保持模板原样
+        texts = {
+            'title': data.get('title', '').split('\n'),
+            'subtitle': data.get('subtitle', '').split('\n'),
+            'body': data.get('bullets', []),
+        }
+        for shape in new_slide.shapes:
+            if not shape.has_text_frame:
+                continue
+            role = _text_role(shape)
+            if role in texts:
+                _replace_text(shape.text_frame._txBody, texts.pop(role))
         
         return new_slide
     
-    def _copy_text_style(self, source_tf, target_tf):
+    def _relink_slide_jumps(self):
         """
-        复制文本框的样式
+        克隆页面中指向模板页面的跳转链接改指向该页面的（第一份）克隆；该页面未被克隆时去掉链接，
+        否则模板原有页面（及其图表、备注）会作为不在页面列表中的孤立页面被一并保存
         """
-        try:
-            for i, src_para in enumerate(source_tf.paragraphs):
-                if i >= len(target_tf.paragraphs):
-                    break
-                
-                tgt_para = target_tf.paragraphs[i]
-                tgt_para.alignment = src_para.alignment
-                
-                for j, src_run in enumerate(src_para.runs):
-                    if j < len(tgt_para.runs):
-                        tgt_run = tgt_para.runs[j]
-                    else:
-                        continue
-                    
-                    try:
-                        if src_run.font.size:
-                            tgt_run.font.size = src_run.font.size
-                        if src_run.font.bold is not None:
-                            tgt_run.font.bold = src_run.font.bold
-                        if src_run.font.color.rgb:
-                            tgt_run.font.color.rgb = src_run.font.color.rgb
-                        if src_run.font.name:
-                            tgt_run.font.name = src_run.font.name
-                    except:
-                        pass
-        except:
-            pass
+        for slide_part in [part for parts in self._slide_clones.values() for part in parts]:
+            for rId, rel in list(slide_part.rels.items()):
+                if rel.reltype != RT.SLIDE or rel.is_external:
+                    continue
+                clones = self._slide_clones.get(rel.target_part)
+                if not clones:
+                    for element in list(slide_part._element.iter()):
+                        if element.get(qn('r:id')) == rId:
+                            element.getparent().remove(element)
+                else:
+                    _remap_rids(slide_part._element, {rId: slide_part.relate_to(clones[0], RT.SLIDE)})
+                slide_part.drop_rel(rId)
+    
+    def _drop_template_slides(self, sld_ids):
+        """删除输出底稿中模板原有的页面（页面部件不再被引用，保存时不会写入）"""
+        sld_id_lst = self.prs.slides._sldIdLst
+        for sld_id in sld_ids:
+            sld_id_lst.remove(sld_id)
+            self.prs.part.drop_rel(sld_id.rId)
+        
+        # 自定义放映与分节（p:extLst 中的 p14:sectionLst）引用的是模板原有页面，一并去掉
+        prs_element = self.prs.part._element
+        for element in list(prs_element.iter(qn('p:custShowLst'))):
+            element.getparent().remove(element)
+        for element in list(prs_element.iter(_SECTION_LIST)):
+            ext = element.getparent()
+            ext.getparent().remove(ext)
+    
+    def _blank_layout(self):
+        """输出演示文稿中的空白版式（优先按名称，否则取占位符最少的版式）"""
+        layouts = list(self.prs.slide_layouts)
+        for layout in layouts:
+            if layout.name.lower() in ('blank', '空白'):
+                return layout
+        return min(layouts, key=lambda layout: len(layout.placeholders))
     
     def _create_slide_with_style(self, data):
         """
-        使用提取的样式创建新页面
+        使用提取的样式创建新页面（按类型查注册表，未知类型按内容页生成）
         """
-        slide_type = data.get('type')
-        
-        if slide_type == 'cover':
-            self._create_cover_slide(data)
-        elif slide_type == 'section':
-            self._create_section_slide(data)
-        elif slide_type == 'content_image':
-            self._create_content_slide(data)
-        elif slide_type == 'chart':
-            self._create_chart_slide(data)
-        elif slide_type == 'ending':
-            self._create_ending_slide(data)
-        else:
-            self._create_content_slide(data)
+        return self.RENDERERS.render(self, data.get('type'), data, self.render_stats)
     
     def _create_cover_slide(self, data):
         """创建封面页（使用模板样式）"""
-        layout = self.prs.slide_layouts[6]
+        layout = self._blank_layout()
         slide = self.prs.slides.add_slide(layout)
         
         # 背景
@@ -771,7 +1610,7 @@ class TemplateBasedGenerator:
     
     def _create_section_slide(self, data):
         """创建章节页（使用模板样式）"""
-        layout = self.prs.slide_layouts[6]
+        layout = self._blank_layout()
         slide = self.prs.slides.add_slide(layout)
         
         # 背景
@@ -807,7 +1646,7 @@ class TemplateBasedGenerator:
     
     def _create_content_slide(self, data):
         """创建内容页（使用模板样式）"""
-        layout = self.prs.slide_layouts[6]
+        layout = self._blank_layout()
         slide = self.prs.slides.add_slide(layout)
         
         # 背景
@@ -883,7 +1722,7 @@ class TemplateBasedGenerator:
     
     def _create_chart_slide(self, data):
         """创建图表页"""
-        layout = self.prs.slide_layouts[6]
+        layout = self._blank_layout()
         slide = self.prs.slides.add_slide(layout)
         
         # 背景
@@ -908,7 +1747,7 @@ class TemplateBasedGenerator:
     
     def _create_ending_slide(self, data):
         """创建结束页"""
-        layout = self.prs.slide_layouts[6]
+        layout = self._blank_layout()
         slide = self.prs.slides.add_slide(layout)
         
         # 背景
@@ -932,41 +1771,56 @@ class TemplateBasedGenerator:
         return slide
 
 
+# 内置页面类型
+TemplateBasedGenerator.RENDERERS.default = TemplateBasedGenerator._create_content_slide
+TemplateBasedGenerator.RENDERERS.register('cover', TemplateBasedGenerator._create_cover_slide)
+TemplateBasedGenerator.RENDERERS.register('section', TemplateBasedGenerator._create_section_slide)
+TemplateBasedGenerator.RENDERERS.register('content_image', TemplateBasedGenerator._create_content_slide)
+TemplateBasedGenerator.RENDERERS.register('chart', TemplateBasedGenerator._create_chart_slide)
+TemplateBasedGenerator.RENDERERS.register('ending', TemplateBasedGenerator._create_ending_slide)
+
+# 外部渲染器插件（逗号分隔的模块名）
+if os.environ.get('PPT_TEMPLATE_RENDERER_PLUGINS'):
+    TemplateBasedGenerator.RENDERERS.load_plugins(os.environ['PPT_TEMPLATE_RENDERER_PLUGINS'])
+
+
 # ========================================================================
 # 便捷接口函数
 # ========================================================================
 
-def analyze_template(template_path):
+def analyze_template(template_path, use_cache=True):
     """
     分析PPT模板，打印样式报告
     
     Args:
         template_path: 模板文件路径
+        use_cache: 是否使用模板分析缓存
     
     Returns:
         dict: 提取的样式信息
     """
-    extractor = TemplateStyleExtractor(template_path)
+    extractor = TemplateStyleExtractor(open_template(template_path), use_cache=use_cache)
     style = extractor.extract_all()
     extractor.print_summary()
     return style
 
 
-def get_theme_from_template(template_path):
+def get_theme_from_template(template_path, use_cache=True):
     """
     从模板提取主题配置，可直接用于AutoPPTGeneratorV3
     
     Args:
         template_path: 模板文件路径
+        use_cache: 是否使用模板分析缓存
     
     Returns:
         dict: 主题配置字典
     """
-    extractor = TemplateStyleExtractor(template_path)
+    extractor = TemplateStyleExtractor(open_template(template_path), use_cache=use_cache)
     return extractor.get_theme_config()
 
 
-def generate_from_template(template_path, json_data, output_path, mode='clone'):
+def generate_from_template(template_path, json_data, output_path, mode='clone', use_cache=True):
     """
     基于模板生成PPT的快捷函数
     
@@ -975,11 +1829,12 @@ def generate_from_template(template_path, json_data, output_path, mode='clone'):
         json_data: JSON数据（字典或文件路径）
         output_path: 输出文件路径
         mode: 'clone'(克隆样式) 或 'fill'(填充模板)
+        use_cache: 是否使用模板分析缓存
     
     Returns:
         str: 输出文件路径
     """
-    generator = TemplateBasedGenerator(template_path)
+    generator = TemplateBasedGenerator(open_template(template_path), use_cache=use_cache)
     generator.generate_from_json(json_data, output_path, mode=mode)
     return output_path
 
@@ -992,7 +1847,7 @@ if __name__ == '__main__':
     import sys
     
     print("\n" + "="*60)
-    print("📋 PPT模板解析器 v1.0")
+    print("📋 PPT模板解析器 v1.1")
     print("="*60)
     
     if len(sys.argv) < 2:
@@ -214,6 +214,1593 @@ def test_ppt_generation():
     return True
 
 
+def test_concurrent_image_download():
+    """测试并发图片下载引擎"""
+    print("\n" + "=" * 60)
+    print("测试6: 并发图片下载")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    import time
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        tasks = [
+            {'prompt': f'prompt {i}', 'path': os.path.join(tmp_dir, f'slide_{i}.png'),
+             'desc': f'图片{i}', 'title': f'标题{i}'}
+            for i in range(8)
+        ]
+        
+        # 替换真实API调用，模拟0.3秒的网络耗时
+        def fake_generate(prompt, api_key, filename, **kwargs):
+            time.sleep(0.3)
+            if prompt == 'prompt 3':
+                return False, "模拟失败"
+            with open(filename, 'wb') as f:
+                f.write(prompt.encode())
+            return True, "AI生成成功"
+        
+        original = ppt_module.generate_single_image_siliconflow
+        ppt_module.generate_single_image_siliconflow = fake_generate
+        try:
+            start = time.monotonic()
+            success_paths = ppt_module.download_images_from_json(
+                tasks, siliconflow_key='fake-key', max_workers=8, requests_per_second=0,
+                use_cache=False
+            )
+            elapsed = time.monotonic() - start
+        finally:
+            ppt_module.generate_single_image_siliconflow = original
+        
+        # 成功路径保持任务顺序，失败任务不在列表中
+        expected = [t['path'] for t in tasks if t['prompt'] != 'prompt 3']
+        assert success_paths == expected, f"成功路径不符: {success_paths}"
+        assert elapsed < 1.5, f"并发执行过慢: {elapsed:.2f}s"
+        
+        print(f"   8个任务耗时 {elapsed:.2f}s")
+        print("\n 并发图片下载测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_image_cache():
+    """测试图片缓存（命中后不再调用API，超限按LRU淘汰）"""
+    print("\n" + "=" * 60)
+    print("测试7: 图片缓存")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    from image_cache import ImageCache
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        tasks = [
+            {'prompt': 'same prompt', 'path': os.path.join(tmp_dir, 'a.png'), 'desc': 'a', 'title': 'a'},
+            {'prompt': 'other prompt', 'path': os.path.join(tmp_dir, 'b.png'), 'desc': 'b', 'title': 'b'},
+        ]
+        
+        calls = []
+        
+        def fake_generate(prompt, api_key, filename, **kwargs):
+            calls.append(prompt)
+            with open(filename, 'wb') as f:
+                f.write(prompt.encode() * 100)
+            return True, "AI生成成功"
+        
+        original = ppt_module.generate_single_image_siliconflow
+        ppt_module.generate_single_image_siliconflow = fake_generate
+        try:
+            for _ in range(2):
+                ppt_module.download_images_from_json(
+                    tasks, siliconflow_key='fake-key', requests_per_second=0, cache_dir=cache_dir
+                )
+        finally:
+            ppt_module.generate_single_image_siliconflow = original
+        
+        assert sorted(calls) == ['other prompt', 'same prompt'], f"第二次运行不应再调用API: {calls}"
+        with open(tasks[0]['path'], 'rb') as f:
+            assert f.read() == b'same prompt' * 100, "缓存内容应与原图一致"
+        
+        # 参数不同则键不同
+        key1 = ImageCache.make_key('siliconflow', 'm', 'p', '1024x1024', 20)
+        key2 = ImageCache.make_key('siliconflow', 'm', 'p', '512x512', 20)
+        assert key1 != key2, "图片尺寸不同应产生不同的缓存键"
+        
+        # 超出上限时淘汰
+        cache = ImageCache(cache_dir, max_bytes=1500)
+        cache.evict()
+        assert cache.size() <= 1500, f"缓存未按上限淘汰: {cache.size()}"
+        
+        # 总大小在内存中维护：连续写入只在首次检查时扫描目录
+        scans = []
+        original_entries = cache._entries
+        cache._entries = lambda: scans.append(1) or original_entries()
+        cache.max_bytes = 10 ** 9
+        cache._total = None
+        for i in range(5):
+            cache.store(f'{i:064x}', tasks[0]['path'])
+        assert len(scans) == 1, f"每次写入不应重新扫描缓存目录: {len(scans)}次"
+        cache._entries = original_entries
+        assert cache._total == cache.size()
+        
+        print(f"   API调用次数: {len(calls)}，缓存大小: {cache.size()} bytes")
+        print("\n 图片缓存测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_pipeline_generation():
+    """测试流水线模式（边下载边渲染，页面顺序不变）"""
+    print("\n" + "=" * 60)
+    print("测试8: 流水线生成")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    import time
+    from PIL import Image
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        json_data = {
+            'slides': [
+                {'type': 'cover', 'title': '流水线测试'},
+                {'type': 'content_image', 'title': '慢图', 'bullets': ['要点'], 'image_prompt': 'slow',
+                 'image': os.path.join(tmp_dir, 'slow.png')},
+                {'type': 'section', 'title': '章节'},
+                {'type': 'content_image', 'title': '快图', 'bullets': ['要点'], 'image_prompt': 'fast',
+                 'image': os.path.join(tmp_dir, 'fast.png')},
+                {'type': 'ending', 'title': '结束'},
+            ]
+        }
+        
+        # 慢图先提交但后完成，验证渲染顺序与最终页面顺序无关
+        def fake_generate(prompt, api_key, filename, **kwargs):
+            time.sleep(0.4 if prompt == 'slow' else 0.05)
+            Image.new('RGB', (64, 64), (0, 120, 200)).save(filename)
+            return True, "AI生成成功"
+        
+        image_tasks = extract_image_prompts_from_json(json_data)
+        output_path = os.path.join(tmp_dir, 'pipeline.pptx')
+        
+        original = ppt_module.generate_single_image_siliconflow
+        ppt_module.generate_single_image_siliconflow = fake_generate
+        try:
+            success_paths = ppt_module.generate_with_image_pipeline(
+                json_data, output_path, image_tasks, siliconflow_key='fake-key',
+                requests_per_second=0, use_cache=False
+            )
+        finally:
+            ppt_module.generate_single_image_siliconflow = original
+        
+        assert len(success_paths) == 2, f"应下载2张图片: {success_paths}"
+        
+        prs = Presentation(output_path)
+        titles = [next(shape.text_frame.text for shape in slide.shapes
+                       if shape.has_text_frame and shape.text_frame.text)
+                  for slide in prs.slides]
+        assert titles == ['流水线测试', '慢图', '章节', '快图', '结束'], f"页面顺序错误: {titles}"
+        
+        pictures = sum(1 for slide in prs.slides for shape in slide.shapes
+                       if shape.shape_type == MSO_SHAPE_TYPE.PICTURE)
+        assert pictures == 2, f"应插入2张图片，实际{pictures}"
+        
+        print(f"   页面顺序: {titles}")
+        print("\n 流水线生成测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_provider_client_keepalive():
+    """测试共享HTTP客户端（本地桩服务，连接复用）"""
+    print("\n" + "=" * 60)
+    print("测试9: HTTP连接复用")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    connections = set()
+    png_bytes = b'\x89PNG fake image'
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # 支持keep-alive
+        
+        def _send(self, body, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_POST(self):
+            connections.add(self.client_address)
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            host, port = self.server.server_address
+            body = ('{"images": [{"url": "http://%s:%d/img.png"}]}' % (host, port)).encode()
+            self._send(body, 'application/json')
+        
+        def do_GET(self):
+            connections.add(self.client_address)
+            self._send(png_bytes, 'image/png')
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    
+    original_url = ppt_module.SILICONFLOW_API_URL
+    ppt_module.SILICONFLOW_API_URL = f"http://{host}:{port}/v1/images/generations"
+    client = ppt_module.ProviderClient(pool_size=2)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        try:
+            for i in range(3):
+                filename = os.path.join(tmp_dir, f'img_{i}.png')
+                success, msg = ppt_module.generate_single_image_siliconflow(
+                    f'prompt {i}', 'fake-key', filename, client=client
+                )
+                assert success, msg
+                with open(filename, 'rb') as f:
+                    assert f.read() == png_bytes, "图片内容不一致"
+        finally:
+            ppt_module.SILICONFLOW_API_URL = original_url
+            client.close()
+            server.shutdown()
+            server.server_close()
+        
+        # 3次生成共6个请求，应复用同一个TCP连接
+        assert len(connections) == 1, f"应复用1个连接，实际{len(connections)}个"
+        
+        print(f"   6个请求使用 {len(connections)} 个连接")
+        print("\n HTTP连接复用测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_adaptive_rate_limiter():
+    """测试自适应限速（429减速、遵循Retry-After）"""
+    print("\n" + "=" * 60)
+    print("测试10: 自适应限速")
+    print("=" * 60)
+    
+    import base64
+    import shutil
+    import tempfile
+    import time
+    
+    class FakeResponse:
+        def __init__(self, status_code, headers=None, payload=None):
+            self.status_code = status_code
+            self.headers = headers or {}
+            self._payload = payload
+        
+        def json(self):
+            return self._payload
+    
+    class FakeClient:
+        """第一次请求返回429（Retry-After: 0.3），之后成功"""
+        def __init__(self):
+            self.calls = 0
+        
+        def post(self, url, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                return FakeResponse(429, {'Retry-After': '0.3'})
+            payload = {'images': [{'b64_json': base64.b64encode(b'image').decode()}]}
+            return FakeResponse(200, payload=payload)
+    
+    limiter = ppt_module.AdaptiveRateLimiter(requests_per_second=10)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tmp_dir, 'img.png')
+        
+        start = time.monotonic()
+        success, msg = ppt_module.generate_single_image_siliconflow(
+            'prompt', 'fake-key', filename, client=FakeClient(), limiter=limiter
+        )
+        elapsed = time.monotonic() - start
+        
+        assert success, msg
+        assert elapsed >= 0.3, f"应遵循Retry-After等待，实际{elapsed:.2f}s"
+        
+        metrics = limiter.metrics()
+        assert metrics['throttle_count'] == 1, f"限流次数错误: {metrics}"
+        assert metrics['current_rate'] < 10, f"限流后应降速: {metrics}"
+        
+        # 成功后线性恢复，但不超过上限
+        for _ in range(200):
+            limiter.on_success()
+        assert limiter.metrics()['current_rate'] == 10, "速率不应超过配置上限"
+        
+        assert ppt_module._parse_retry_after('5') == 5.0
+        assert ppt_module._parse_retry_after('invalid') is None
+        # X-RateLimit-Reset 常为Unix时间戳；非有限值无效；暂停有上限
+        reset_at = ppt_module._parse_retry_after(str(int(time.time()) + 30))
+        assert 28 <= reset_at <= 30, reset_at
+        assert ppt_module._parse_retry_after('1760000000') <= ppt_module.MAX_RATE_LIMIT_PAUSE
+        assert ppt_module._parse_retry_after('inf') is None
+        assert ppt_module._parse_retry_after('nan') is None
+        assert ppt_module._parse_retry_after('100000') == ppt_module.MAX_RATE_LIMIT_PAUSE
+        paused = ppt_module.AdaptiveRateLimiter(requests_per_second=10)
+        assert paused.on_throttle(retry_after=1e6) == ppt_module.MAX_RATE_LIMIT_PAUSE
+        assert paused._paused_until <= time.monotonic() + ppt_module.MAX_RATE_LIMIT_PAUSE
+        
+        print(f"   限速指标: {metrics}")
+        print("\n 自适应限速测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_streaming_write():
+    """测试流式写盘（原子重命名、分块base64解码）"""
+    print("\n" + "=" * 60)
+    print("测试11: 流式写盘")
+    print("=" * 60)
+    
+    import base64
+    import shutil
+    import tempfile
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tmp_dir, 'slide_1.png')
+        
+        # 分块解码结果应与整体解码一致
+        raw = os.urandom(200003)
+        b64_text = base64.b64encode(raw).decode()
+        ppt_module._atomic_write_chunks(filename, ppt_module._iter_b64_decode(b64_text, chunk_size=1000))
+        with open(filename, 'rb') as f:
+            assert f.read() == raw, "分块解码结果不一致"
+        
+        # 按76列折行（含\r\n）的base64：空白不影响分块边界
+        wrapped = base64.encodebytes(raw).decode().replace('\n', '\r\n')
+        assert b''.join(ppt_module._iter_b64_decode(wrapped, chunk_size=1000)) == raw, "折行base64解码结果不一致"
+        
+        # 下载中途失败：目标文件保持原样，且不残留临时文件
+        def broken_chunks():
+            yield b'partial'
+            raise IOError("连接中断")
+        
+        try:
+            ppt_module._atomic_write_chunks(filename, broken_chunks())
+            assert False, "应抛出异常"
+        except IOError:
+            pass
+        
+        with open(filename, 'rb') as f:
+            assert f.read() == raw, "失败的写入不应覆盖原图片"
+        assert os.listdir(tmp_dir) == ['slide_1.png'], f"残留临时文件: {os.listdir(tmp_dir)}"
+        
+        print("\n 流式写盘测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_image_normalizer():
+    """测试图片预处理（按区域缩放、转JPEG、结果缓存）"""
+    print("\n" + "=" * 60)
+    print("测试12: 图片预处理")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    from PIL import Image
+    from image_cache import ImageNormalizer
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        src_path = os.path.join(tmp_dir, 'ai_image.png')
+        Image.frombytes('RGB', (1024, 1024), os.urandom(1024 * 1024 * 3)).save(src_path)
+        
+        normalizer = ImageNormalizer(cache_dir=os.path.join(tmp_dir, 'processed'), dpi=100)
+        
+        # emphasis_text 布局的图片区域：2.8 x 3 英寸
+        out_path = normalizer.normalize(src_path, 2.8, 3)
+        assert out_path != src_path, "大图应被处理"
+        with Image.open(out_path) as img:
+            assert img.format == 'JPEG', f"无透明通道应转为JPEG: {img.format}"
+            assert img.size == (280, 300), f"尺寸错误: {img.size}"
+        assert os.path.getsize(out_path) < os.path.getsize(src_path), "处理后应更小"
+        
+        # 相同输入命中缓存
+        assert normalizer.normalize(src_path, 2.8, 3) == out_path, "应命中缓存"
+        assert normalizer.cache.size() == os.path.getsize(out_path), "处理结果应存入缓存"
+        
+        # 透明图片保持PNG
+        rgba_path = os.path.join(tmp_dir, 'logo.png')
+        Image.new('RGBA', (800, 800), (255, 0, 0, 128)).save(rgba_path)
+        rgba_out = normalizer.normalize(rgba_path, 1, 1)
+        with Image.open(rgba_out) as img:
+            assert img.format == 'PNG' and img.size == (100, 100), "透明图片应保持PNG"
+        
+        print(f"   {os.path.getsize(src_path)//1024} KB -> {os.path.getsize(out_path)//1024} KB")
+        print("\n 图片预处理测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_media_deduplication():
+    """测试媒体去重（相同图片只保留一个媒体部件）"""
+    print("\n" + "=" * 60)
+    print("测试13: 媒体去重")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    import zipfile
+    from PIL import Image
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        logo_a = os.path.join(tmp_dir, 'logo_a.png')
+        logo_b = os.path.join(tmp_dir, 'logo_b.png')
+        Image.frombytes('RGB', (200, 200), os.urandom(200 * 200 * 3)).save(logo_a)
+        shutil.copyfile(logo_a, logo_b)  # 路径不同、内容相同
+        
+        slides = [{'type': 'cover', 'title': '去重测试'}]
+        for i in range(4):
+            slides.append({'type': 'content_image', 'title': f'第{i+1}页', 'bullets': ['要点'],
+                           'image': logo_a if i % 2 == 0 else logo_b})
+        
+        generator = AutoPPTGeneratorV3()
+        output_path = os.path.join(tmp_dir, 'dedup.pptx')
+        generator.generate_from_json({'slides': slides}, output_path)
+        
+        report = generator.media_report
+        assert report['references'] == 4 and report['unique'] == 1, f"相同内容应只有1个媒体: {report}"
+        # add_picture 已按SHA1复用，去重本身没有合并任何部件
+        assert report['merged'] == 0 and report['bytes_saved'] == 0, f"不应计入 add_picture 的复用: {report}"
+        
+        # 模拟其他途径复制进来的重复媒体部件（例如模板页面克隆）
+        from pptx.parts.image import ImagePart
+        from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+        from pptx.opc.packuri import PackURI
+        
+        extra_slide = generator.prs.slides.add_slide(generator.prs.slide_layouts[6])
+        with open(logo_a, 'rb') as f:
+            blob = f.read()
+        duplicate_part = ImagePart(PackURI('/ppt/media/dup_image.png'), 'image/png', generator.prs.part.package, blob)
+        extra_slide.part.relate_to(duplicate_part, RT.IMAGE)
+        
+        report = ppt_module.deduplicate_media(generator.prs)
+        assert report['merged'] == 1, f"应合并1个重复部件: {report}"
+        assert report['bytes_saved'] == len(blob), f"应只计入合并的部件: {report}"
+        generator.prs.save(output_path)
+        
+        with zipfile.ZipFile(output_path) as zf:
+            media = [n for n in zf.namelist() if n.startswith('ppt/media/')]
+        assert len(media) == 1, f"输出包中应只有1个媒体文件: {media}"
+        
+        print(f"   去重报告: {report}")
+        print("\n 媒体去重测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_batch_generate():
+    """测试批量生成（多进程，汇总报告）"""
+    print("\n" + "=" * 60)
+    print("测试14: 批量生成")
+    print("=" * 60)
+    
+    import json
+    import shutil
+    import tempfile
+    from batch_generate import batch_generate
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        config_dir = os.path.join(tmp_dir, 'configs')
+        os.makedirs(config_dir)
+        
+        example = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'example_config.json')
+        if os.path.exists(example):
+            with open(example, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            data = parse_outline_to_json("# 批量测试\n## 第一章\n### 内容\n- 要点")
+        
+        for i in range(3):
+            with open(os.path.join(config_dir, f'deck_{i}.json'), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        with open(os.path.join(config_dir, 'broken.json'), 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        
+        output_dir = os.path.join(tmp_dir, 'out')
+        summary = batch_generate([config_dir], output_dir, workers=2)
+        
+        assert summary['total'] == 4, f"应处理4个配置: {summary['total']}"
+        assert summary['success'] == 3 and summary['failed'] == 1, "3个成功，1个失败"
+        for record in summary['decks']:
+            if record['status'] == 'success':
+                assert os.path.exists(record['output']) and record['slides'] > 0
+                assert record['size'] == os.path.getsize(record['output'])
+        assert os.path.exists(os.path.join(output_dir, 'batch_summary.json')), "应写出汇总报告"
+        
+        # 不同子目录中的同名配置按相对路径输出，互不覆盖
+        from batch_generate import output_names
+        for sub in ('a', 'b'):
+            os.makedirs(os.path.join(tmp_dir, 'nested', sub))
+            with open(os.path.join(tmp_dir, 'nested', sub, 'deck.json'), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        nested_out = os.path.join(tmp_dir, 'nested_out')
+        trace_dir = os.path.join(tmp_dir, 'traces')
+        nested = batch_generate([os.path.join(tmp_dir, 'nested', '**', '*.json')], nested_out, workers=2, trace_dir=trace_dir)
+        assert nested['success'] == 2, nested
+        for sub in ('a', 'b'):
+            assert os.path.exists(os.path.join(nested_out, sub, 'deck.pptx'))
+            assert os.path.exists(os.path.join(trace_dir, sub, 'deck.trace.json'))
+        try:
+            output_names([os.path.join(tmp_dir, 'Deck.json'), os.path.join(tmp_dir, 'deck.json')])
+            assert False, "仅大小写不同的输出名应报冲突"
+        except ValueError:
+            pass
+        
+        print(f"   {summary['success']} 成功, {summary['failed']} 失败, {summary['wall_seconds']}s")
+        print("\n 批量生成测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_benchmark_suite():
+    """测试基准测试框架（离线运行、基线对比）"""
+    print("\n" + "=" * 60)
+    print("测试15: 基准测试框架")
+    print("=" * 60)
+    
+    import copy
+    import benchmark
+    
+    deck = benchmark.make_synthetic_deck(30, 'long')
+    assert len(deck['slides']) == 30, f"合成页数错误: {len(deck['slides'])}"
+    types = {s['type'] for s in deck['slides']}
+    assert types == {'cover', 'section', 'chart', 'content_image', 'ending'}, f"页面类型不全: {types}"
+    
+    report = benchmark.run_benchmarks(sizes=(10,), repeat=1, quick=True,
+                                      only=['parse_outline', 'download_images'])
+    assert len(report['results']) == 2, f"用例筛选错误: {list(report['results'])}"
+    for name, r in report['results'].items():
+        assert r['seconds'] > 0 and r['items'] > 0 and r['peak_kb'] > 0, f"{name} 指标缺失: {r}"
+    
+    # 基线对比：耗时翻倍的用例应被识别为回退
+    baseline = copy.deepcopy(report)
+    name = next(iter(baseline['results']))
+    baseline['results'][name]['seconds'] = report['results'][name]['seconds'] / 2
+    regressions = benchmark.compare_with_baseline(report, baseline, threshold=1.5)
+    assert [r[0] for r in regressions] == [name], f"回退检测错误: {regressions}"
+    
+    print(f"   用例: {list(report['results'])}")
+    print("\n 基准测试框架测试通过！")
+    return True
+
+
+def test_run_trace():
+    """测试分阶段性能追踪（阶段耗时、计数器、JSON报告）"""
+    print("\n" + "=" * 60)
+    print("测试16: 性能追踪")
+    print("=" * 60)
+    
+    import json
+    import shutil
+    import tempfile
+    
+    outline = """# 追踪测试
+## 第一章
+### 要点页
+- 要点一
+- 要点二
+"""
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        trace = ppt_module.start_trace('test', profile=True)
+        try:
+            json_data = ppt_module.parse_outline_to_json(outline)
+            generator = ppt_module.AutoPPTGeneratorV3()
+            generator.generate_from_json(json_data, os.path.join(tmp_dir, 'trace.pptx'))
+        finally:
+            ppt_module.finish_trace(os.path.join(tmp_dir, 'trace.json'))
+        
+        # 追踪结束后埋点不再记录
+        with ppt_module.trace_span('after_finish'):
+            pass
+        
+        report = trace.to_dict()
+        for stage in ('outline_parse', 'render_slides', 'render_slide', 'save'):
+            assert stage in report['stages'], f"缺少阶段: {stage}"
+        assert report['stages']['render_slide']['count'] == len(json_data['slides']), "逐页计时数量错误"
+        assert report['counters'].get('slides_rendered') == len(json_data['slides']), f"计数器错误: {report['counters']}"
+        assert 'after_finish' not in report['stages'], "追踪结束后仍在记录"
+        assert report['profile'], "缺少cProfile热点"
+        
+        # 逐页区间应挂在 render_slides 之下
+        parent_ids = {s['id'] for s in report['spans'] if s['name'] == 'render_slides'}
+        assert all(s['parent'] in parent_ids for s in report['spans'] if s['name'] == 'render_slide'), "区间层级错误"
+        
+        with open(os.path.join(tmp_dir, 'trace.json'), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved['stages'].keys() == report['stages'].keys(), "保存的报告与内存中不一致"
+        
+        print(f"   阶段: {list(report['stages'])}")
+        print("\n 性能追踪测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_renderer_registry():
+    """测试页面渲染器注册表（插件注册、未知类型、按类型计时）"""
+    print("\n" + "=" * 60)
+    print("测试17: 渲染器注册表")
+    print("=" * 60)
+    
+    import sys
+    import shutil
+    import tempfile
+    from pptx import Presentation
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(tmp_dir, 'timeline_plugin.py'), 'w', encoding='utf-8') as f:
+            f.write(
+                "from pptx.util import Inches\n"
+                "def render_timeline(generator, data):\n"
+                "    slide = generator.prs.slides.add_slide(generator.prs.slide_layouts[6])\n"
+                "    box = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(1))\n"
+                "    box.text_frame.text = ' -> '.join(data.get('events', []))\n"
+                "    generator.slide_index += 1\n"
+                "    return slide\n"
+                "def register_renderers(registry):\n"
+                "    registry.register('timeline', render_timeline)\n"
+            )
+        sys.path.insert(0, tmp_dir)
+        
+        registry = ppt_module.AutoPPTGeneratorV3.RENDERERS
+        try:
+            assert registry.load_plugins('timeline_plugin, missing_plugin_xyz') == ['timeline_plugin'], "插件加载结果错误"
+            assert 'timeline' in registry, "插件类型未注册"
+            
+            json_data = {
+                'slides': [
+                    {'type': 'cover', 'title': '注册表测试'},
+                    {'type': 'timeline', 'events': ['起点', '终点']},
+                    {'type': 'unknown_type', 'title': '应被跳过'},
+                    {'type': 'ending', 'title': '结束'},
+                ]
+            }
+            generator = ppt_module.AutoPPTGeneratorV3()
+            output_path = os.path.join(tmp_dir, 'registry.pptx')
+            generator.generate_from_json(json_data, output_path)
+            
+            prs = Presentation(output_path)
+            assert len(prs.slides) == 3, f"页数错误: {len(prs.slides)}"
+            texts = [shape.text_frame.text for shape in prs.slides[1].shapes if shape.has_text_frame]
+            assert '起点 -> 终点' in texts, f"插件页面内容错误: {texts}"
+            
+            stats = generator.render_stats
+            assert set(stats) == {'cover', 'timeline', 'ending'}, f"计时类型错误: {stats}"
+            assert all(item['count'] == 1 and item['seconds'] >= 0 for item in stats.values()), f"计时错误: {stats}"
+            assert generator.skipped_types == {'unknown_type': 1}, f"跳过的类型未记录: {generator.skipped_types}"
+        finally:
+            registry.unregister('timeline')
+            sys.path.remove(tmp_dir)
+        
+        assert 'timeline' not in registry, "注销失败"
+        print(f"   已注册类型: {registry.types()}")
+        print("\n 渲染器注册表测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_compiled_styles():
+    """测试预编译样式（与逐项设置属性生成的XML一致）"""
+    print("\n" + "=" * 60)
+    print("测试18: 预编译样式")
+    print("=" * 60)
+    
+    from lxml import etree
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    from pptx.dml.color import RGBColor
+    from pptx.enum.text import PP_ALIGN
+    
+    def xml(element):
+        return etree.tostring(element, method='c14n')
+    
+    prs = Presentation()
+    slide_a = prs.slides.add_slide(prs.slide_layouts[6])
+    slide_b = prs.slides.add_slide(prs.slide_layouts[6])
+    red = RGBColor(213, 0, 0)
+    
+    # 背景
+    fill = slide_a.background.fill
+    fill.solid()
+    fill.fore_color.rgb = red
+    ppt_module.BackgroundStyle(red).apply(slide_b)
+    assert xml(slide_a._element.cSld.bg) == xml(slide_b._element.cSld.bg), "背景不一致"
+    
+    # 段落字体 + 段落格式 + 文字段字体
+    boxes = []
+    for slide in (slide_a, slide_b):
+        tf = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame
+        tf.text = '标题'
+        run = tf.add_paragraph().add_run()
+        run.text = '正文'
+        boxes.append(tf)
+    p, run = boxes[0].paragraphs[0], boxes[0].paragraphs[1].runs[0]
+    p.font.size = Pt(32)
+    p.font.bold = True
+    p.font.color.rgb = red
+    p.alignment = PP_ALIGN.CENTER
+    run.font.size = Pt(8)
+    run.font.italic = True
+    para = boxes[0].paragraphs[1]
+    para.level = 0
+    para.space_before = Pt(1)
+    para.space_after = Pt(1)
+    para.line_spacing = 1.05
+    ppt_module.TextStyle(32, bold=True, color=red, alignment=PP_ALIGN.CENTER).apply_to_paragraph(boxes[1].paragraphs[0])
+    ppt_module.TextStyle(8, italic=True).apply_to_run(boxes[1].paragraphs[1].runs[0])
+    ppt_module.ParagraphStyle(0, space_before=1, space_after=1, line_spacing=1.05).apply(boxes[1].paragraphs[1])
+    assert xml(boxes[0]._txBody) == xml(boxes[1]._txBody), "文字样式不一致"
+    
+    # 形状填充与边框
+    shape_a = slide_a.shapes.add_shape(1, Inches(1), Inches(3), Inches(2), Inches(1))
+    shape_a.fill.solid()
+    shape_a.fill.fore_color.rgb = red
+    shape_a.line.color.rgb = red
+    shape_a.line.width = Pt(2)
+    shape_b = slide_b.shapes.add_shape(1, Inches(1), Inches(3), Inches(2), Inches(1))
+    ppt_module.ShapeStyle(fill=red, line=red, line_width=Pt(2)).apply(shape_b)
+    assert xml(shape_a._element.spPr) == xml(shape_b._element.spPr), "形状样式不一致"
+    
+    # 布局几何预先换算为EMU
+    generator = ppt_module.AutoPPTGeneratorV3()
+    for key, config in generator.LAYOUTS.items():
+        assert generator.styles.layouts[key]['text_area'] == tuple(Inches(v) for v in config['text_area']), key
+    
+    print("\n 预编译样式测试通过！")
+    return True
+
+
+def test_fast_text_mode():
+    """测试快速文本模式（直接生成XML，输出与默认模式逐字节一致）"""
+    print("\n" + "=" * 60)
+    print("测试19: 快速文本模式")
+    print("=" * 60)
+    
+    json_data = {
+        'slides': [
+            {'type': 'cover', 'title': '快速文本\n第二行\v软换行', 'subtitle': '副标题', 'slogan': '口号'},
+            {'type': 'section', 'title': '第一章'},
+            {'type': 'content_image', 'title': '要点页',
+             'bullets': ['标题：' + '很长的内容' * 8, '短标题：内容', '没有标题的超长要点，' * 6, '控制字符\x07'],
+             'quote': '金句'},
+            {'type': 'chart', 'title': '图表', 'note': '备注',
+             'chart_data': {'labels': ['A', 'B'], 'datasets': [{'name': 'S', 'values': [1, 2]}]}},
+            {'type': 'ending', 'title': '结束', 'bullets': ['总结：要点'], 'quote': '再见'},
+        ]
+    }
+    
+    blobs = {}
+    for fast_text in (False, True):
+        generator = ppt_module.AutoPPTGeneratorV3(theme='tech_blue', fast_text=fast_text)
+        for slide_data in json_data['slides']:
+            generator._render_slide(slide_data)
+        blobs[fast_text] = [slide.part.blob for slide in generator.prs.slides]
+    
+    assert len(blobs[True]) == len(json_data['slides']), f"页数错误: {len(blobs[True])}"
+    for i, (legacy, fast) in enumerate(zip(blobs[False], blobs[True])):
+        assert legacy == fast, f"第{i + 1}页XML不一致"
+    
+    print(f"   {len(blobs[True])} 页XML一致")
+    print("\n 快速文本模式测试通过！")
+    return True
+
+
+def test_text_layout():
+    """测试字体度量排版（测量、换行、二分选字号）"""
+    print("\n" + "=" * 60)
+    print("测试20: 字体度量排版")
+    print("=" * 60)
+    
+    from text_layout import TextMeasurer, tokenize
+    
+    measurer = TextMeasurer()
+    
+    # 测量：汉字全角，拉丁字母按字宽
+    assert measurer.measure('中文', 10) == 20, "汉字应为全角"
+    assert measurer.measure('i', 10) < measurer.measure('m', 10) < 10, "拉丁字母应按字宽"
+    assert measurer.measure('AB', 10, True) > measurer.measure('AB', 10), "粗体应更宽"
+    
+    # 避头尾：标点不出现在行首，英文单词不拆开
+    assert tokenize('决策（智能），提高') == ('决', '策', '（智', '能），', '提', '高')
+    lines = measurer.wrap('人工智能正在重塑现代战争形态，决策速度和精度大幅提升。Artificial intelligence', 12, 150)
+    assert len(lines) > 2, f"应换行: {lines}"
+    assert all(measurer.measure(line, 12) <= 150 for line in lines), f"行宽超出: {lines}"
+    assert not any(line[0] in '，。' for line in lines), f"标点出现在行首: {lines}"
+    assert 'Artificial' in lines[-1] or 'Artificial' in lines[-2], f"单词被拆开: {lines}"
+    
+    # 二分选字号：内容越多字号越小，结果确定
+    short = [[('标题：', 1, True), ('内容', 0, False)]]
+    long = [[('标题：', 1, True), ('很长的内容' * 30, 0, False)]] * 5
+    size_short = measurer.fit_size(short, 324, 252, 8, 14)
+    size_long = measurer.fit_size(long, 324, 252, 8, 14)
+    assert size_short == 14 and 8 <= size_long < size_short, f"字号错误: {size_short}, {size_long}"
+    assert TextMeasurer().fit_size(long, 324, 252, 8, 14) == size_long, "结果应确定"
+    
+    # 生成器集成：要点和标题按字号变体渲染
+    generator = ppt_module.AutoPPTGeneratorV3(theme='tech_blue', fit_text=True)
+    slide = generator._render_slide({'type': 'content_image', 'title': '超过十八个字的很长很长很长的内容页标题',
+                                     'bullets': ['短标题：内容', '没有标题的要点']})
+    sizes = {run.font.size.pt for shape in slide.shapes if shape.has_text_frame
+             for p in shape.text_frame.paragraphs for run in p.runs if run.font.size}
+    assert sizes == {14, 15}, f"要点字号错误: {sizes}"
+    title_size = slide.shapes[0].text_frame.paragraphs[0].font.size.pt
+    assert title_size == 32, f"标题一行放得下应取最大字号: {title_size}"
+    
+    print(f"   字号: 少量要点 {size_short}pt, 大量要点 {size_long}pt, 标题 {title_size}pt")
+    print("\n 字体度量排版测试通过！")
+    return True
+
+
+def test_line_break_cache():
+    """测试字宽表与断行缓存（命中、持久化、批量模式跨次运行复用）"""
+    print("\n" + "=" * 60)
+    print("测试21: 断行缓存")
+    print("=" * 60)
+    
+    import json
+    import shutil
+    import tempfile
+    from text_layout import TextMeasurer, LineBreakCache, advance_table
+    from batch_generate import batch_generate
+    
+    # 字宽表按字体共享，ASCII预填，其余码位按需写回
+    table = advance_table('sans')
+    assert table is TextMeasurer()._tables[0], "同一字体应共享字宽表"
+    assert table.itemsize == 2 and len(table) == 0x10000
+    assert TextMeasurer().advance('中') == 1000 and table[ord('中')] == 1000
+    
+    # 重复断行命中缓存，结果不变
+    cache = LineBreakCache()
+    measurer = TextMeasurer(line_cache=cache)
+    text = '人工智能正在重塑现代战争形态，决策速度和精度大幅提升'
+    first = measurer.wrap(text, 12, 150)
+    assert measurer.wrap(text, 12, 150) == first and cache.hits == 1 and cache.misses == 1
+    assert measurer.wrap(text, 12, 200) != first, "行宽不同应重新断行"
+    
+    # LRU上限
+    small = LineBreakCache(maxsize=2)
+    for width in (100, 120, 140):
+        TextMeasurer(line_cache=small).wrap(text, 12, width)
+    assert len(small) == 2
+    
+    # 持久化：载入后直接命中；版本不符的文件被忽略
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        cache_path = os.path.join(tmp_dir, 'line_breaks.json')
+        assert cache.save(cache_path)
+        loaded = LineBreakCache()
+        assert loaded.load(cache_path) == len(cache)
+        assert TextMeasurer(line_cache=loaded).wrap(text, 12, 150) == first and loaded.hits == 1
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': -1, 'entries': []}, f)
+        assert LineBreakCache().load(cache_path) == 0
+        
+        # 批量模式：子进程回传新增条目，第二次运行全部命中
+        config_dir = os.path.join(tmp_dir, 'configs')
+        os.makedirs(config_dir)
+        data = {'slides': [{'type': 'content_image', 'title': '缓存测试', 'bullets': ['要点：' + text]},
+                           {'type': 'ending', 'title': '结束', 'bullets': [text]}]}
+        with open(os.path.join(config_dir, 'deck.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.remove(cache_path)
+        
+        summary = batch_generate([config_dir], os.path.join(tmp_dir, 'out'), workers=1,
+                                 fit_text=True, line_cache_path=cache_path)
+        assert summary['success'] == 1 and summary['line_cache_entries'] > 0, "应写入断行缓存"
+        assert all('line_breaks' not in record for record in summary['decks'])
+        entries = summary['line_cache_entries']
+        summary = batch_generate([config_dir], os.path.join(tmp_dir, 'out'), workers=1,
+                                 fit_text=True, line_cache_path=cache_path)
+        assert summary['line_cache_entries'] == entries, "相同内容不应新增条目"
+        
+        print(f"   断行缓存 {entries} 条，第二次运行无新增")
+        print("\n 断行缓存测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_incremental_generation():
+    """测试增量生成（复用未变页面，结果与完整生成一致）"""
+    print("\n" + "=" * 60)
+    print("测试22: 增量生成")
+    print("=" * 60)
+    
+    import copy
+    import shutil
+    import tempfile
+    from pptx import Presentation
+    
+    slides = [
+        {'type': 'cover', 'title': '增量测试', 'subtitle': '副标题'},
+        {'type': 'section', 'title': '第一章'},
+        {'type': 'content_image', 'title': '内容A', 'bullets': ['要点：一', '要点：二'], 'quote': '金句'},
+        {'type': 'content_image', 'title': '内容B', 'bullets': ['要点：三']},
+        {'type': 'chart', 'title': '图表',
+         'chart_data': {'labels': ['A', 'B'], 'datasets': [{'name': 'S', 'values': [1, 2]}]}},
+        {'type': 'ending', 'title': '结束', 'bullets': ['总结']},
+    ]
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        output_path = os.path.join(tmp_dir, 'incremental.pptx')
+        
+        def generate(slides_data):
+            generator = ppt_module.AutoPPTGeneratorV3(theme='tech_blue')
+            generator.generate_from_json({'slides': copy.deepcopy(slides_data)}, output_path, incremental=True)
+            return generator.incremental_report
+        
+        assert generate(slides) == {'reused': 0, 'rendered': 6, 'dropped': 0}, "首次应全部渲染"
+        assert generate(slides) == {'reused': 6, 'rendered': 0, 'dropped': 0}, "未修改应全部复用"
+        
+        # 修改一条要点、删除一页
+        edited = copy.deepcopy(slides)
+        edited[3]['bullets'][0] = '要点：三（修改）'
+        del edited[1]
+        report = generate(edited)
+        assert report['rendered'] >= 1 and report['reused'] >= 2, f"应只重新渲染变化的页面: {report}"
+        
+        prs = Presentation(output_path)
+        titles = [[shape.text_frame.text for shape in slide.shapes if shape.has_text_frame][0] for slide in prs.slides]
+        assert titles == ['增量测试', '内容A', '内容B', '图表', '结束'], f"页面顺序错误: {titles}"
+        assert '要点：三（修改）' in ''.join(shape.text_frame.text for shape in prs.slides[2].shapes if shape.has_text_frame)
+        
+        # 与完整生成的页面内容一致
+        full = ppt_module.AutoPPTGeneratorV3(theme='tech_blue')
+        for slide_data in copy.deepcopy(edited):
+            full._render_slide(slide_data)
+        for incremental_slide, full_slide in zip(prs.slides, full.prs.slides):
+            assert len(incremental_slide.shapes) == len(full_slide.shapes)
+            assert [s.shape_type for s in incremental_slide.shapes] == [s.shape_type for s in full_slide.shapes]
+        
+        # 主题变化时全部重新渲染
+        generator = ppt_module.AutoPPTGeneratorV3(theme='nature_green')
+        generator.generate_from_json({'slides': copy.deepcopy(edited)}, output_path, incremental=True)
+        assert generator.incremental_report['reused'] == 0, "主题变化不应复用"
+        
+        print(f"   修改后: 复用 {report['reused']} 页，重新渲染 {report['rendered']} 页，删除 {report['dropped']} 页")
+        print("\n 增量生成测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_watch_mode():
+    """测试监视生成（轮询检测变化、合并连续保存、增量重新生成）"""
+    print("\n" + "=" * 60)
+    print("测试23: 监视生成")
+    print("=" * 60)
+    
+    import json
+    import time
+    import shutil
+    import tempfile
+    import threading
+    from watch_generate import ChangeWatcher, DeckRegenerator
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        config_path = os.path.join(tmp_dir, 'deck.json')
+        output_path = os.path.join(tmp_dir, 'deck.pptx')
+        data = {'slides': [{'type': 'cover', 'title': '监视测试'},
+                           {'type': 'content_image', 'title': '内容', 'bullets': ['要点：一']},
+                           {'type': 'ending', 'title': '结束'}]}
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        
+        regenerate = DeckRegenerator(config_path, output_path, theme='tech_blue')
+        ok, msg = regenerate()
+        assert ok and os.path.exists(output_path), msg
+        
+        events = []
+        watcher = ChangeWatcher([config_path], [tmp_dir], lambda changed: events.append((time.monotonic(), changed)),
+                                debounce=0.2, poll_interval=0.05, use_watchdog=False)
+        thread = threading.Thread(target=watcher.run, kwargs={'stop_after': 1}, daemon=True)
+        thread.start()
+        time.sleep(0.1)
+        
+        # 连续两次保存只触发一次；输出PPT和非图片文件不触发
+        data['slides'][1]['bullets'][0] = '要点：修改'
+        for _ in range(2):
+            with open(config_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            time.sleep(0.05)
+        saved_at = time.monotonic()
+        with open(os.path.join(tmp_dir, 'notes.txt'), 'w', encoding='utf-8') as f:
+            f.write('ignored')
+        thread.join(timeout=5)
+        watcher.stop()
+        
+        assert len(events) == 1, f"应合并为一次变化: {events}"
+        assert events[0][1] == {os.path.abspath(config_path)}, f"变化文件错误: {events[0][1]}"
+        assert events[0][0] - saved_at < 1, "检测延迟过长"
+        
+        ok, msg = regenerate()
+        assert ok, msg
+        assert '复用 2' in msg and '重新渲染 1' in msg, f"应只重新渲染修改的页面: {msg}"
+        
+        # JSON写到一半（语法错误）时保留上次输出
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write('{"slides": [')
+        ok, msg = regenerate()
+        assert not ok and os.path.exists(output_path), "配置错误时应保留上次输出"
+        
+        print(f"   {msg}")
+        print("\n 监视生成测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_streaming_outline():
+    """测试流式大纲解析（逐行产出页面、内存与文档长度无关、直接交给渲染）"""
+    print("\n" + "=" * 60)
+    print("测试24: 流式大纲解析")
+    print("=" * 60)
+    
+    import io
+    import shutil
+    import tempfile
+    import tracemalloc
+    
+    outline = """# 流式测试大纲
+副标题
+## 第1页：开篇
+- 要点：一
+> 金句
+### 子页
+- 要点二
+## 总结
+- 收尾
+"""
+    # 与一次性解析结果一致；文件对象逐行读取
+    slides = list(ppt_module.iter_outline_slides(io.StringIO(outline)))
+    assert slides == ppt_module.parse_outline_to_json(outline)['slides'], "流式结果应与一次性解析一致"
+    assert [s['type'] for s in slides] == ['cover', 'content_image', 'content_image', 'ending']
+    assert slides[0]['title'] == '流式测试' and slides[0]['subtitle'] == '副标题'
+    
+    # 页面在读到下一页标题时即产出
+    consumed = []
+    
+    def lines():
+        for line in outline.split('\n'):
+            consumed.append(line)
+            yield line
+    
+    stream = ppt_module.iter_outline_slides(lines())
+    assert next(stream)['type'] == 'cover' and next(stream)['title'] == '开篇'
+    assert len(consumed) < outline.count('\n'), "应在读完全文之前产出页面"
+    
+    # 内容之后才出现的封面信息：流式产出的封面不再变化，一次性解析仍然生效
+    late = "## 第1页：开篇\n- 要点\n## 第2页：展开\n## 封面\n- 标题：晚到标题\n# 晚到大纲\n"
+    stream = ppt_module.iter_outline_slides(io.StringIO(late))
+    cover = next(stream)
+    assert cover['title'] == '演示文稿'
+    rest = list(stream)
+    assert cover['title'] == '演示文稿', "已产出的封面不应被回写"
+    assert [s['title'] for s in rest[:2]] == ['开篇', '展开']
+    assert ppt_module.parse_outline_to_json(late)['slides'][0]['title'] == '晚到'
+    assert ppt_module.parse_outline_to_json(late)['metadata']['title'] == '晚到'
+    
+    # 内存峰值与文档长度无关
+    def manual(sections):
+        for i in range(sections):
+            yield f"## 第{i}节：章节{i}\n"
+            for j in range(8):
+                yield f"- 要点{j}：培训手册第{i}节的第{j}条内容\n"
+            yield "> 金句\n"
+    
+    peaks = []
+    for sections in (500, 5000):  # 5000节约5万行
+        tracemalloc.start()
+        count = sum(1 for _ in ppt_module.iter_outline_slides(manual(sections)))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert count == sections + 2, f"页数错误: {count}"
+    assert peaks[1] < peaks[0] * 2, f"内存峰值随文档增长: {peaks}"
+    
+    # 直接流式渲染
+    generator = ppt_module.AutoPPTGeneratorV3(theme='tech_blue')
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        output_path = os.path.join(tmp_dir, 'stream.pptx')
+        generator.generate_from_slides(ppt_module.iter_outline_slides(io.StringIO(outline)), output_path)
+        assert len(generator.prs.slides) == 4 and os.path.exists(output_path)
+        
+        print(f"   5万行大纲内存峰值 {peaks[1] / 1024:.0f} KB（5千行 {peaks[0] / 1024:.0f} KB）")
+        print("\n 流式大纲解析测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_outline_tokenizer():
+    """测试大纲行分类（单次匹配）"""
+    print("\n" + "=" * 60)
+    print("测试25: 大纲行分类")
+    print("=" * 60)
+    
+    tokenize = ppt_module.tokenize_outline_line
+    cases = {
+        '# 标题': ('heading', 1, '标题'),
+        '## 第1页：开篇': ('heading', 2, '第1页：开篇'),
+        '### 子页': ('heading', 3, '子页'),
+        '#### 四级': ('text', 0, '#### 四级'),
+        '  - 缩进要点': ('bullet', 0, '缩进要点'),
+        '* 星号要点': ('bullet', 0, '星号要点'),
+        '- ': ('bullet', 0, ''),
+        '-': ('text', 0, '-'),
+        '> 金句': ('quote', 0, '金句'),
+        '---': ('separator', 0, '---'),
+        '**理解类比**：内容': ('emphasis', 0, '**理解类比**：内容'),
+        '*斜体*': ('text', 0, '*斜体*'),
+        '   ': ('blank', 0, ''),
+    }
+    for line, expected in cases.items():
+        assert tokenize(line) == expected, f"{line!r}: {tokenize(line)}"
+    
+    print(f"   {len(cases)} 种行格式分类正确")
+    print("\n 大纲行分类测试通过！")
+    return True
+
+
+def test_template_single_pass():
+    """测试模板样式单次遍历提取（与逐项提取结果一致）"""
+    print("\n" + "=" * 60)
+    print("测试26: 模板样式单次遍历")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    from pptx.dml.color import RGBColor
+    from template_parser import TemplateStyleExtractor
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        template_path = os.path.join(tmp_dir, 'template.pptx')
+        prs = Presentation()
+        for i in range(6):
+            slide = prs.slides.add_slide(prs.slide_layouts[i % 2])
+            slide.shapes.title.text = f"标题{i}"
+            run = slide.shapes.title.text_frame.paragraphs[0].runs[0]
+            run.font.size = Pt(32)
+            run.font.name = '微软雅黑'
+            run.font.color.rgb = RGBColor(26, 35, 126)
+            box = slide.shapes.add_textbox(Inches(1), Inches(3), Inches(4), Inches(1))
+            box.text_frame.text = f"正文{i}"
+            box.text_frame.paragraphs[0].runs[0].font.size = Pt(14)
+            box.text_frame.paragraphs[0].runs[0].font.color.rgb = RGBColor(200, 30, 30)
+            shape = slide.shapes.add_shape(1, Inches(6), Inches(3), Inches(2), Inches(1))
+            shape.fill.solid()
+            shape.fill.fore_color.rgb = RGBColor(0, 120, 60)
+            if i % 2:
+                slide.background.fill.solid()
+                slide.background.fill.fore_color.rgb = RGBColor(250, 250, 250)
+        prs.save(template_path)
+        
+        style = TemplateStyleExtractor(template_path, use_cache=False).extract_all()
+        separate = TemplateStyleExtractor(template_path, use_cache=False)
+        assert style['colors'] == separate._extract_colors()
+        assert style['fonts'] == separate._extract_fonts()
+        assert style['layouts'] == separate._extract_layouts()
+        assert style['backgrounds'] == separate._extract_backgrounds()
+        
+        assert style['fonts']['title_size'] == 32 and style['fonts']['body_size'] == 14
+        assert [b['type'] for b in style['backgrounds']] == ['unknown', 'solid'] * 3
+        assert len(style['layouts']) == 6 and all(layout['has_title'] for layout in style['layouts'])
+        
+        print(f"   {len(style['layouts'])}页模板单次遍历结果与逐项提取一致")
+        print("\n 模板样式单次遍历测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_template_xml_backend():
+    """测试模板样式的XML提取（主题色、主题字体、东亚字体）"""
+    print("\n" + "=" * 60)
+    print("测试27: 模板样式XML提取")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    from pptx.dml.color import RGBColor
+    from pptx.enum.dml import MSO_THEME_COLOR
+    from pptx.oxml.ns import qn
+    from template_parser import TemplateStyleExtractor
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        template_path = os.path.join(tmp_dir, 'template.pptx')
+        prs = Presentation()  # 默认Office主题：accent1=4F81BD，正文主题字体 Calibri
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        box = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(1))
+        box.text_frame.text = "主题色标题"
+        run = box.text_frame.paragraphs[0].runs[0]
+        run.font.size = Pt(30)
+        run.font.color.theme_color = MSO_THEME_COLOR.ACCENT_1
+        run._r.get_or_add_rPr().append(run._r.makeelement(qn('a:ea'), {'typeface': '微软雅黑'}))
+        for text in ("正文一", "正文二"):
+            para = box.text_frame.add_paragraph()
+            para.text = text
+            para.runs[0].font.size = Pt(12)
+            para.runs[0].font.name = '+mn-lt'
+            para.runs[0].font.color.rgb = RGBColor(33, 33, 33)
+        shape = slide.shapes.add_shape(1, Inches(1), Inches(3), Inches(2), Inches(1))
+        shape.fill.solid()
+        shape.fill.fore_color.theme_color = MSO_THEME_COLOR.ACCENT_2
+        slide.background.fill.solid()
+        slide.background.fill.fore_color.theme_color = MSO_THEME_COLOR.BACKGROUND_1
+        prs.save(template_path)
+        
+        style = TemplateStyleExtractor(template_path, use_cache=False).extract_all()
+        colors, fonts = style['colors'], style['fonts']
+        assert (79, 129, 189) in colors['text_colors'] and colors['accent'] == (79, 129, 189)
+        assert colors['primary'] == (192, 80, 77)             # schemeClr accent2
+        assert colors['text'] == (33, 33, 33)
+        assert colors['background'] == (255, 255, 255)        # bg1 -> lt1（颜色映射）
+        assert style['backgrounds'][0] == {'index': 0, 'type': 'solid', 'color': (255, 255, 255)}
+        assert set(fonts['all_fonts']) == {'微软雅黑', 'Calibri'}
+        assert fonts['title_fonts'] == ['微软雅黑'] and fonts['body_fonts'] == ['Calibri', 'Calibri']
+        
+        # 主题背景（p:bgRef）：按主题背景填充样式与其中的 schemeClr 解析
+        from pptx.oxml import parse_xml
+        from pptx.oxml.ns import nsdecls
+        themed_path = os.path.join(os.path.dirname(template_path), 'themed_bg.pptx')
+        themed = Presentation()
+        for idx in ('1001', '0'):
+            slide = themed.slides.add_slide(themed.slide_layouts[6])
+            slide.element.cSld.insert(0, parse_xml(
+                f'<p:bg {nsdecls("p", "a")}><p:bgRef idx="{idx}"><a:schemeClr val="bg2"/></p:bgRef></p:bg>'))
+        themed.save(themed_path)
+        themed_style = TemplateStyleExtractor(themed_path, use_cache=False).extract_all()
+        assert themed_style['backgrounds'] == [{'index': 0, 'type': 'solid', 'color': (238, 236, 225)},  # bg2 -> lt2
+                                               {'index': 1, 'type': 'unknown'}]
+        assert themed_style['colors']['background'] == (238, 236, 225)
+        
+        # 代理对象方式识别不到主题色，布局两种方式一致
+        proxy = TemplateStyleExtractor(template_path, backend='proxy', use_cache=False).extract_all()
+        assert proxy['colors']['primary'] is None and proxy['colors']['text'] == (33, 33, 33)
+        assert proxy['layouts'] == style['layouts']
+        
+        try:
+            TemplateStyleExtractor(template_path, backend='unknown')
+            assert False, "未知提取方式应报错"
+        except ValueError:
+            pass
+        
+        print(f"   主题色 {len(colors['text_colors'])}种文字色，字体: {', '.join(sorted(fonts['all_fonts']))}")
+        print("\n 模板样式XML提取测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_template_analysis_cache():
+    """测试模板分析缓存（按内容哈希命中、模板修改或版本变化后失效）"""
+    print("\n" + "=" * 60)
+    print("测试28: 模板分析缓存")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    from pptx.dml.color import RGBColor
+    import template_parser
+    from template_parser import TemplateStyleExtractor
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        template_path = os.path.join(tmp_dir, 'template.pptx')
+        prs = Presentation()
+        for i in range(3):
+            slide = prs.slides.add_slide(prs.slide_layouts[1])
+            slide.shapes.title.text = f"标题{i}"
+            run = slide.shapes.title.text_frame.paragraphs[0].runs[0]
+            run.font.size = Pt(32)
+            run.font.color.rgb = RGBColor(26, 35, 126)
+            shape = slide.shapes.add_shape(1, Inches(6), Inches(3), Inches(2), Inches(1))
+            shape.fill.solid()
+            shape.fill.fore_color.rgb = RGBColor(0, 120, 60)
+        prs.save(template_path)
+        
+        first = TemplateStyleExtractor(template_path, cache_dir=cache_dir)
+        style = first.extract_all()
+        assert not first.cache_hit and len(os.listdir(cache_dir)) == 1
+        
+        # 命中：结果（含颜色元组、Emu长度）与主题配置与重新分析一致
+        second = TemplateStyleExtractor(template_path, cache_dir=cache_dir)
+        cached = second.extract_all()
+        assert second.cache_hit and cached == style
+        assert isinstance(cached['colors']['primary'], tuple) and cached['slide_size']['width'].inches == 10
+        assert second.get_theme_config() == first.get_theme_config()
+        assert second.get_theme_config()['primary'] == RGBColor(0, 120, 60)
+        
+        # 模板修改后失效
+        prs.slides.add_slide(prs.slide_layouts[6])
+        prs.save(template_path)
+        changed = TemplateStyleExtractor(template_path, cache_dir=cache_dir)
+        assert len(changed.extract_all()['layouts']) == 4 and not changed.cache_hit
+        
+        # 提取器版本变化后失效
+        original_version = template_parser.EXTRACTOR_VERSION
+        template_parser.EXTRACTOR_VERSION = original_version + 1
+        try:
+            bumped = TemplateStyleExtractor(template_path, cache_dir=cache_dir)
+            bumped.extract_all()
+            assert not bumped.cache_hit
+        finally:
+            template_parser.EXTRACTOR_VERSION = original_version
+        
+        uncached = TemplateStyleExtractor(template_path, use_cache=False)
+        assert uncached.extract_all() == changed.extracted_style and not uncached.cache_hit
+        
+        # 条目数超限时淘汰最久未使用的条目（命中会刷新使用时间）
+        lru_dir = os.path.join(tmp_dir, 'lru')
+        lru = template_parser.TemplateAnalysisCache(lru_dir, max_entries=2)
+        theme = changed.get_theme_config()
+        for i, name in enumerate(('a', 'b')):
+            assert lru.save(name * 64, 'xml', changed.extracted_style, theme)
+            os.utime(os.path.join(lru_dir, f"{name * 64}-xml.json"), (1000 + i, 1000 + i))
+        assert lru.load('a' * 64, 'xml') is not None
+        assert lru.save('c' * 64, 'xml', changed.extracted_style, theme)
+        assert sorted(os.listdir(lru_dir)) == [f"{name * 64}-xml.json" for name in ('a', 'c')]
+        
+        print(f"   缓存条目: {len(os.listdir(cache_dir))}")
+        print("\n 模板分析缓存测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_template_handle_reuse():
+    """测试模板句柄共享（延迟加载、同一生成器多次生成）"""
+    print("\n" + "=" * 60)
+    print("测试29: 模板句柄共享")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    import contextlib
+    from pptx import Presentation
+    import gc
+    import weakref
+    from template_parser import TemplateHandle, TemplateBasedGenerator, open_template
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        template_path = os.path.join(tmp_dir, 'template.pptx')
+        prs = Presentation()
+        for i in range(3):
+            slide = prs.slides.add_slide(prs.slide_layouts[1])
+            slide.shapes.title.text = f"标题{i}"
+            slide.placeholders[1].text_frame.text = "正文"
+        prs.save(template_path)
+        
+        data = {'slides': [{'type': 'cover', 'title': '封面', 'subtitle': '副标题'},
+                           {'type': 'content_image', 'title': '内容', 'bullets': ['要点一', '要点二']},
+                           {'type': 'ending', 'title': '结束'}]}
+        
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            handle = TemplateHandle(template_path)
+            generator = TemplateBasedGenerator(handle, cache_dir=os.path.join(tmp_dir, 'cache'))
+            assert generator.extractor.template is handle and handle.loads == 1
+            
+            # 同一生成器多次生成：模板不重新加载，页码从头计
+            for i, mode in enumerate(('clone', 'fill', 'clone')):
+                output_path = os.path.join(tmp_dir, f'out_{i}.pptx')
+                generator.generate_from_json(data, output_path, mode=mode)
+                assert len(Presentation(output_path).slides) == 3 and generator.slide_index == 3
+            # 共享的模板只解析一次；填充模式另外从内存中的模板内容解析一份输出底稿
+            assert handle.loads == 1 and handle.copies == 1
+            
+            # 分析缓存命中时克隆模式不加载模板
+            cached = TemplateHandle(template_path)
+            generator = TemplateBasedGenerator(cached, cache_dir=os.path.join(tmp_dir, 'cache'))
+            generator.generate_from_json(data, os.path.join(tmp_dir, 'out_cached.pptx'))
+            assert generator.extractor.cache_hit and not cached.loaded
+        
+        # open_template 按文件共享句柄，文件修改后重新打开
+        shared = open_template(template_path)
+        assert open_template(template_path) is shared
+        prs.slides.add_slide(prs.slide_layouts[6])
+        prs.save(template_path)
+        assert open_template(template_path) is not shared
+        
+        # 不再被引用的共享句柄（连同加载的演示文稿）随之释放
+        shared.prs
+        shared_ref = weakref.ref(shared)
+        del shared
+        gc.collect()
+        assert shared_ref() is None
+        
+        print("   3次生成共享模板解析1次（另有填充模式底稿1份），缓存命中时0次")
+        print("\n 模板句柄共享测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_template_slide_cloning():
+    """测试填充模式按XML克隆模板页面（保留图片与形状，原位替换文字）"""
+    print("\n" + "=" * 60)
+    print("测试30: 模板页面克隆")
+    print("=" * 60)
+    
+    import shutil
+    import tempfile
+    import zipfile
+    import contextlib
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    from pptx.dml.color import RGBColor
+    from pptx.enum.shapes import MSO_SHAPE, MSO_SHAPE_TYPE, PP_PLACEHOLDER
+    from PIL import Image
+    from template_parser import TemplateBasedGenerator
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        image_path = os.path.join(tmp_dir, 'logo.png')
+        Image.new('RGB', (40, 40), (200, 30, 30)).save(image_path)
+        
+        template_path = os.path.join(tmp_dir, 'template.pptx')
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        title = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(1))
+        title.name = 'Title 1'
+        run = title.text_frame.paragraphs[0].add_run()
+        run.text = "模板标题"
+        run.font.size = Pt(40)
+        run.font.color.rgb = RGBColor(10, 20, 30)
+        subtitle = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(6), Inches(1))
+        subtitle.name = 'Subtitle 2'
+        subtitle.text_frame.text = "模板副标题"
+        shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(1), Inches(4), Inches(3), Inches(2))
+        shape.fill.solid()
+        shape.fill.fore_color.rgb = RGBColor(0, 120, 60)
+        shape.text_frame.text = "装饰"
+        slide.shapes.add_picture(image_path, Inches(7), Inches(1))
+        body = slide.shapes.add_textbox(Inches(1), Inches(6), Inches(6), Inches(1))
+        body.name = 'Content 5'
+        body.text_frame.text = "模板正文"
+        # 占位符页面：标题、正文占位符替换，页脚占位符保持原样
+        layout = prs.slide_layouts[1]
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = "图表页"
+        slide.placeholders[1].text_frame.text = "模板要点"
+        footer = next(ph for ph in layout.placeholders if ph.placeholder_format.type == PP_PLACEHOLDER.FOOTER)
+        slide.shapes.clone_placeholder(footer)
+        next(ph for ph in slide.placeholders if ph.placeholder_format.type == PP_PLACEHOLDER.FOOTER).text_frame.text = "页脚"
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        ending_title = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(1))
+        ending_title.name = 'Title 1'
+        ending_title.text_frame.text = "谢谢"
+        prs.save(template_path)
+        
+        data = {'slides': [{'type': 'content_image', 'title': '第一页', 'subtitle': '副标题一', 'bullets': ['要点一', '要点二']},
+                           {'type': 'ending', 'title': '再见'},
+                           {'type': 'content_image', 'title': '第三页', 'subtitle': '副标题三'},
+                           {'type': 'chart', 'title': '图表标题', 'bullets': ['b1', 'b2']},
+                           {'type': 'section', 'title': '无匹配模板'}]}
+        output_path = os.path.join(tmp_dir, 'out.pptx')
+        
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            generator = TemplateBasedGenerator(template_path, cache_dir=os.path.join(tmp_dir, 'cache'))
+            generator.generate_from_json(data, output_path, mode='fill')
+        
+        # 模板原有页面已删除，只剩生成的页面；无匹配模板的页面按克隆模式生成
+        out = Presentation(output_path)
+        assert len(out.slides) == 5
+        assert list(generator.render_stats) == ['section']
+        
+        for idx, expected in ((0, ('第一页', '副标题一')), (2, ('第三页', '副标题三'))):
+            shapes = {shape.name: shape for shape in out.slides[idx].shapes}
+            assert set(shapes) == {'Title 1', 'Subtitle 2', 'Rectangle 3', 'Picture 4', 'Content 5'}
+            assert (shapes['Title 1'].text_frame.text, shapes['Subtitle 2'].text_frame.text) == expected
+            # 原位替换保留了模板的字符格式与形状填充
+            font = shapes['Title 1'].text_frame.paragraphs[0].runs[0].font
+            assert font.size == Pt(40) and font.color.rgb == RGBColor(10, 20, 30)
+            assert shapes['Rectangle 3'].fill.fore_color.rgb == RGBColor(0, 120, 60)
+            assert shapes['Rectangle 3'].text_frame.text == "装饰"  # 非标题/正文形状的文字不动
+            assert shapes['Picture 4'].shape_type == MSO_SHAPE_TYPE.PICTURE
+            assert shapes['Picture 4'].image.size == (40, 40)
+        assert out.slides[0].shapes[4].text_frame.text == "要点一\n要点二"
+        assert out.slides[2].shapes[4].text_frame.text == ""
+        assert out.slides[1].shapes[0].text_frame.text == "再见"
+        texts = {ph.placeholder_format.type: ph.text_frame.text for ph in out.slides[3].placeholders}
+        assert texts == {PP_PLACEHOLDER.TITLE: "图表标题", PP_PLACEHOLDER.OBJECT: "b1\nb2", PP_PLACEHOLDER.FOOTER: "页脚"}, texts
+        
+        # 克隆页面共用同一个图片部件
+        with zipfile.ZipFile(output_path) as zf:
+            assert len([name for name in zf.namelist() if name.startswith('ppt/media/')]) == 1
+        
+        # 跳转到其他模板页面的链接：目标页面被克隆时改指向克隆，否则去掉链接，不留下孤立页面
+        from pptx.chart.data import CategoryChartData
+        from pptx.enum.chart import XL_CHART_TYPE
+        jump_path = os.path.join(tmp_dir, 'jump.pptx')
+        prs = Presentation()
+        cover = prs.slides.add_slide(prs.slide_layouts[6])
+        cover_title = cover.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(1))
+        cover_title.name = 'Title 1'
+        cover_title.text_frame.text = "封面"
+        chart_data = CategoryChartData()
+        chart_data.categories = ['A', 'B']
+        chart_data.add_series('S', (1, 2))
+        cover.shapes.add_chart(XL_CHART_TYPE.COLUMN_CLUSTERED, Inches(1), Inches(3), Inches(4), Inches(3), chart_data)
+        cover.notes_slide.notes_text_frame.text = "备注"
+        ending = prs.slides.add_slide(prs.slide_layouts[6])
+        ending_title = ending.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(1))
+        ending_title.name = 'Title 1'
+        ending_title.text_frame.text = "谢谢"
+        ending_title.click_action.target_slide = cover
+        prs.save(jump_path)
+        
+        def slide_parts(path):
+            with zipfile.ZipFile(path) as zf:
+                return sorted(name for name in zf.namelist()
+                              if name.startswith(('ppt/slides/slide', 'ppt/charts/chart', 'ppt/notesSlides/notesSlide')))
+        
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            generator = TemplateBasedGenerator(jump_path, use_cache=False)
+            generator.generate_from_json({'slides': [{'type': 'ending', 'title': '结束'}]}, output_path, mode='fill')
+            out = Presentation(output_path)
+            assert len(out.slides) == 1 and out.slides[0].shapes[0].click_action.target_slide is None
+            parts = slide_parts(output_path)
+            assert len(parts) == 1 and parts[0].startswith('ppt/slides/'), parts
+            
+            generator.generate_from_json({'slides': [{'type': 'cover', 'title': '开始'}, {'type': 'ending', 'title': '结束'}]},
+                                         output_path, mode='fill')
+            out = Presentation(output_path)
+            assert len(out.slides) == 2
+            assert out.slides[1].shapes[0].click_action.target_slide.slide_id == out.slides[0].slide_id
+            assert len([name for name in slide_parts(output_path) if name.startswith('ppt/slides/')]) == 2
+            assert len([name for name in slide_parts(output_path) if name.startswith('ppt/charts/')]) == 1
+        
+        print("   5页：4页克隆自模板（图片、形状、字符格式、页脚保留），1页按样式生成")
+        print("\n 模板页面克隆测试通过！")
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
 def main():
     """运行所有测试"""
     print("\n" + "=" * 70)
@@ -226,6 +1813,31 @@ def main():
         ("文字换行", test_text_wrapping),
         ("布局配置", test_layout_config),
         ("PPT生成", test_ppt_generation),
+        ("并发图片下载", test_concurrent_image_download),
+        ("图片缓存", test_image_cache),
+        ("流水线生成", test_pipeline_generation),
+        ("HTTP连接复用", test_provider_client_keepalive),
+        ("自适应限速", test_adaptive_rate_limiter),
+        ("流式写盘", test_streaming_write),
+        ("图片预处理", test_image_normalizer),
+        ("媒体去重", test_media_deduplication),
+        ("批量生成", test_batch_generate),
+        ("基准测试框架", test_benchmark_suite),
+        ("性能追踪", test_run_trace),
+        ("渲染器注册表", test_renderer_registry),
+        ("预编译样式", test_compiled_styles),
+        ("快速文本模式", test_fast_text_mode),
+        ("字体度量排版", test_text_layout),
+        ("断行缓存", test_line_break_cache),
+        ("增量生成", test_incremental_generation),
+        ("监视生成", test_watch_mode),
+        ("流式大纲解析", test_streaming_outline),
+        ("大纲行分类", test_outline_tokenizer),
+        ("模板样式单次遍历", test_template_single_pass),
+        ("模板样式XML提取", test_template_xml_backend),
+        ("模板分析缓存", test_template_analysis_cache),
+        ("模板句柄共享", test_template_handle_reuse),
+        ("模板页面克隆", test_template_slide_cloning),
     ]
     
     passed = 0
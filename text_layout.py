@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+文字排版引擎 v1.1
+功能：
+1. 按字体度量表计算文字宽度（CJK全角 / 拉丁字母按字形宽度），不依赖系统字体，结果确定
+2. 模拟文本框自动换行（中文逐字可断、英文按单词断，避头尾标点）
+3. 二分查找能放进文本框的最大字号
+4. 测量结果按 (文本, 字号, 粗体) 缓存，数千条要点/秒
+5. 【新】每种字体一张数组字宽表（按码位索引，进程内共享）
+6. 【新】断行结果LRU缓存，键为 (字体, 文本, 字号, 行宽)，可保存到磁盘跨次运行复用
+
+度量表采用 Helvetica/Arial 的 AFM 字宽（1/1000 em）。PPT默认的等线/Calibri 比它略窄，
+因此估算偏保守：按本引擎排得下的文字在PowerPoint中不会溢出
+
+作者：AI资源指挥官
+版本：1.1
+更新：2026-01-15
+"""
+
+import os
+import re
+import json
+import tempfile
+import functools
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+
+# ========================================================================
+# 字体度量表
+# ========================================================================
+
+# ASCII 32~126 的字宽（1/1000 em），与 Helvetica / Arial 一致
+_SANS_ASCII_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,   # space ! " # $ % & ' ( ) * + , - . /
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556,                                 # 0-9
+    278, 278, 584, 584, 584, 556, 1015,                                               # : ; < = > ? @
+    667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833,                  # A-M
+    722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611,                  # N-Z
+    278, 278, 278, 469, 556, 333,                                                     # [ \ ] ^ _ `
+    556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833,                  # a-m
+    556, 556, 556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500,                  # n-z
+    334, 260, 334, 584,                                                               # { | } ~
+)
+
+FONT_METRICS = {
+    'sans': {
+        'ascii': _SANS_ASCII_WIDTHS,
+        'full_width': 1000,    # CJK 汉字、全角标点、emoji
+        'other': 556,          # 其他字符（带重音的拉丁字母等）按平均字宽
+        'bold_scale': 1.06,    # 粗体的非全角字符加宽
+        'line_height': 1.2,    # 单倍行距 = 字号 × 1.2
+    },
+}
+
+DEFAULT_FONT = 'sans'
+
+# 度量表或断行规则变化时递增，旧的断行缓存文件随之失效
+LAYOUT_VERSION = 1
+
+# 断行缓存的默认保存路径与条数上限
+DEFAULT_LINE_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.ppt_auto_cache', 'line_breaks.json')
+DEFAULT_LINE_CACHE_SIZE = 100000
+
+# 文本框默认内边距（磅）：左右各0.1英寸，上下各0.05英寸
+BOX_INSET_X = 7.2
+BOX_INSET_Y = 3.6
+
+
+# ========================================================================
+# 断行规则
+# ========================================================================
+
+# 英文单词、数字等连续字符作为一个整体；空白单独成段；其余逐字
+_TOKEN_RE = re.compile(r"[A-Za-z0-9À-ɏ'’_\-.@/%#&+]+|\s+|.", re.S)
+
+# 避头：不能出现在行首的标点（并入前一段）
+NO_LINE_START = frozenset('，。、；：！？）》」』】〕〉…—,.;:!?)]}%’”·')
+# 避尾：不能出现在行尾的标点（与后一段合并）
+NO_LINE_END = frozenset('（《「『【〔〈([{“‘')
+
+
+@functools.lru_cache(maxsize=65536)
+def tokenize(text):
+    """
+    把文本切成不可再分的断行单元（已按避头尾规则合并）
+
+    Returns:
+        tuple: 单元列表，空白单元保留原样
+    """
+    tokens = []
+    glue_next = False
+    for token in _TOKEN_RE.findall(text):
+        if tokens and not token.isspace() and not tokens[-1].isspace() and (
+                glue_next or token[0] in NO_LINE_START):
+            tokens[-1] += token
+        else:
+            tokens.append(token)
+        glue_next = token[-1] in NO_LINE_END
+    return tuple(tokens)
+
+
+# ========================================================================
+# 字宽表
+# ========================================================================
+
+_UNKNOWN = 0xFFFF
+_ADVANCE_TABLES = {}  # (字体, 粗体) -> array('H')，基本多文种平面逐码位的字宽
+
+
+def _glyph_advance(metrics, ch, bold):
+    """按度量表计算单个字符的字宽（1/1000 em，取整）"""
+    code = ord(ch)
+    if 32 <= code <= 126:
+        width = metrics['ascii'][code - 32]
+    elif unicodedata.east_asian_width(ch) in ('W', 'F', 'A'):
+        return metrics['full_width']
+    elif unicodedata.combining(ch) or ch in '\u200b\ufeff':
+        return 0
+    else:
+        width = metrics['other']
+    return round(width * metrics['bold_scale']) if bold else width
+
+
+def advance_table(font, bold=False):
+    """
+    取字体的字宽表（65536项 × 2字节），同一字体的所有测量器共享
+    ASCII 预先填好，其余码位首次用到时计算并写回
+    """
+    key = (font, bold)
+    table = _ADVANCE_TABLES.get(key)
+    if table is None:
+        metrics = FONT_METRICS[font]
+        table = array('H', [_UNKNOWN]) * 0x10000
+        for code in range(32, 127):
+            table[code] = _glyph_advance(metrics, chr(code), bold)
+        _ADVANCE_TABLES[key] = table
+    return table
+
+
+# ========================================================================
+# 断行缓存
+# ========================================================================
+
+class LineBreakCache:
+    """
+    断行结果的LRU缓存
+    键：(字体, ((文本, 相对字号, 粗体), ...), 字号, 行宽)，值：每行文本的元组
+    """
+
+    def __init__(self, maxsize=DEFAULT_LINE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._new = {}  # 上次 drain_new 之后新增的条目
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        lines = self._entries.get(key)
+        if lines is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return lines
+
+    def put(self, key, lines):
+        self._store(key, tuple(lines))
+        self._new[key] = self._entries[key]
+
+    def _store(self, key, lines):
+        self._entries[key] = lines
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _to_record(key, lines):
+        font, segments, size, width = key
+        return [font, [list(seg) for seg in segments], size, width, list(lines)]
+
+    def export(self):
+        """全部条目（按最近使用排序），JSON可序列化"""
+        return [self._to_record(key, lines) for key, lines in self._entries.items()]
+
+    def drain_new(self):
+        """取出并清空上次调用以来新增的条目（批量模式下子进程回传给主进程）"""
+        records = [self._to_record(key, lines) for key, lines in self._new.items()]
+        self._new = {}
+        return records
+
+    def update(self, records):
+        """合并 export / drain_new 的条目"""
+        for font, segments, size, width, lines in records:
+            key = (font, tuple(tuple(seg) for seg in segments), size, width)
+            self._store(key, tuple(lines))
+
+    def load(self, path=None):
+        """
+        从JSON文件载入（文件不存在、损坏或版本不符时忽略）
+
+        Returns:
+            int: 载入的条目数
+        """
+        path = path or DEFAULT_LINE_CACHE_PATH
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != LAYOUT_VERSION:
+                return 0
+            records = data['entries']
+            self.update(records)
+            return len(records)
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+    def save(self, path=None):
+        """原子写入JSON文件，返回是否成功"""
+        path = path or DEFAULT_LINE_CACHE_PATH
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': LAYOUT_VERSION, 'entries': self.export()}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+
+# ========================================================================
+# 测量与排版
+# ========================================================================
+
+class TextMeasurer:
+    """
+    基于度量表的文字测量与排版
+    所有长度单位为磅（pt）
+    """
+
+    def __init__(self, font=DEFAULT_FONT, cache_size=65536, line_cache=None):
+        """
+        Args:
+            font: FONT_METRICS 中的字体名
+            cache_size: 测量缓存条数
+            line_cache: 断行缓存（LineBreakCache，可在多个测量器间共享）；默认新建
+        """
+        if font not in FONT_METRICS:
+            raise ValueError(f"未知字体度量: {font}")
+        self.font = font
+        self.metrics = FONT_METRICS[font]
+        self._tables = (advance_table(font, False), advance_table(font, True))
+        self._astral = {}  # 基本平面以外的字符（emoji等）
+        self.line_cache = line_cache if line_cache is not None else LineBreakCache()
+        self.measure = functools.lru_cache(maxsize=cache_size)(self._measure)
+
+    def advance(self, ch, bold=False):
+        """单个字符的宽度（1/1000 em）"""
+        code = ord(ch)
+        if code > 0xFFFF:
+            key = (ch, bold)
+            width = self._astral.get(key)
+            if width is None:
+                width = self._astral[key] = _glyph_advance(self.metrics, ch, bold)
+            return width
+        table = self._tables[bold]
+        width = table[code]
+        if width == _UNKNOWN:
+            width = table[code] = _glyph_advance(self.metrics, ch, bold)
+        return width
+
+    def _measure(self, text, size, bold=False):
+        table = self._tables[bold]
+        total = 0
+        for ch in text:
+            code = ord(ch)
+            width = table[code] if code <= 0xFFFF else _UNKNOWN
+            total += width if width != _UNKNOWN else self.advance(ch, bold)
+        return total * size / 1000
+
+    def wrap_segments(self, segments, size, max_width):
+        """
+        模拟自动换行（结果按 (字体, 文字段, 字号, 行宽) 缓存）
+
+        Args:
+            segments: [(文本, 相对字号, 粗体), ...]，同一段落内的多个文字段
+            size: 基准字号（磅），各文字段字号 = size + 相对字号
+            max_width: 可用行宽（磅）
+
+        Returns:
+            list: 每行的文本
+        """
+        segments = tuple(segments)
+        key = (self.font, segments, size, max_width)
+        lines = self.line_cache.get(key)
+        if lines is None:
+            lines = self._break_lines(segments, size, max_width)
+            self.line_cache.put(key, lines)
+        return list(lines)
+
+    def _break_lines(self, segments, size, max_width):
+        """贪心断行（不经缓存）"""
+        measure = self.measure
+        lines = []
+        line = []
+        x = 0.0
+
+        for text, delta, bold in segments:
+            seg_size = size + delta
+            for token in tokenize(text):
+                width = measure(token, seg_size, bold)
+
+                # 空白可以悬挂在行尾，不触发换行
+                if token.isspace():
+                    if line:
+                        line.append(token)
+                        x += width
+                    continue
+
+                if x + width <= max_width:
+                    line.append(token)
+                    x += width
+                    continue
+
+                if line:
+                    lines.append(''.join(line).rstrip())
+                    line, x = [], 0.0
+
+                if width <= max_width:
+                    line.append(token)
+                    x = width
+                    continue
+
+                # 单个单元比整行还宽：逐字强制断开
+                for ch in token:
+                    ch_width = measure(ch, seg_size, bold)
+                    if x + ch_width > max_width and line:
+                        lines.append(''.join(line))
+                        line, x = [], 0.0
+                    line.append(ch)
+                    x += ch_width
+
+        if line or not lines:
+            lines.append(''.join(line).rstrip())
+        return lines
+
+    def wrap(self, text, size, max_width, bold=False):
+        """单一样式文本的自动换行，返回每行文本"""
+        return self.wrap_segments(((text, 0, bold),), size, max_width)
+
+    def text_height(self, paragraphs, size, max_width, line_spacing=1.0,
+                    space_before=0.0, space_after=0.0):
+        """
+        多个段落排版后的总高度（磅）
+
+        Args:
+            paragraphs: [[(文本, 相对字号, 粗体), ...], ...]
+            line_spacing: 行距倍数（同 paragraph.line_spacing）
+            space_before, space_after: 段前、段后（磅）
+        """
+        line_height = self.metrics['line_height'] * line_spacing
+        height = 0.0
+        for segments in paragraphs:
+            lines = len(self.wrap_segments(segments, size, max_width))
+            largest = size + max((delta for _, delta, _ in segments), default=0)
+            height += lines * largest * line_height + space_before + space_after
+        return height
+
+    def fit_size(self, paragraphs, box_width, box_height, min_size, max_size, step=0.5,
+                 line_spacing=1.0, space_before=0.0, space_after=0.0):
+        """
+        二分查找能放进文本框的最大字号
+
+        Args:
+            paragraphs: [[(文本, 相对字号, 粗体), ...], ...]
+            box_width, box_height: 文本框尺寸（磅，含默认内边距）
+            min_size, max_size: 字号范围（磅）
+            step: 字号粒度
+
+        Returns:
+            float: 最大可用字号；最小字号也放不下时返回 min_size
+        """
+        width = box_width - 2 * BOX_INSET_X
+        height = box_height - 2 * BOX_INSET_Y
+
+        def fits(size):
+            return self.text_height(paragraphs, size, width, line_spacing,
+                                    space_before, space_after) <= height
+
+        # 字号越大占用越高，在 [0, steps] 上找最后一个放得下的档位
+        steps = int(round((max_size - min_size) / step))
+        low, high = 0, steps
+        if not fits(min_size):
+            return min_size
+        while low < high:
+            mid = (low + high + 1) // 2
+            if fits(min_size + mid * step):
+                low = mid
+            else:
+                high = mid - 1
+        return min_size + low * step
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+PPT监视生成工具 v1.0
+功能：
+1. 监视JSON配置或大纲文本、图片目录，保存后自动重新生成PPT
+2. 优先使用 watchdog（inotify/FSEvents/ReadDirectoryChanges），未安装时轮询文件修改时间
+3. 合并短时间内的连续变化（编辑器保存时常触发多次写入），只生成一次
+4. 增量生成：只重新渲染内容或图片变化的页面
+
+作者：AI资源指挥官
+版本：1.0
+更新：2026-01-16
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+
+from ppt_generator import AutoPPTGeneratorV3, parse_outline_to_json, HAS_TEXT_LAYOUT
+
+# 文件系统事件（可选）
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+if HAS_TEXT_LAYOUT:
+    from text_layout import LineBreakCache
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+
+
+# ========================================================================
+# 变化监视
+# ========================================================================
+
+class ChangeWatcher:
+    """
+    监视文件与目录（目录只看图片文件），变化平息 debounce 秒后回调 callback(变化的路径集合)
+    """
+
+    def __init__(self, files, image_dirs, callback, debounce=0.3, poll_interval=0.2, use_watchdog=True):
+        """
+        Args:
+            files: 监视的文件路径列表
+            image_dirs: 监视的图片目录列表（含子目录）
+            callback: 回调函数，参数为变化的路径集合
+            debounce: 最后一次变化后等待的秒数
+            poll_interval: 轮询间隔（秒），watchdog 模式下为检查待处理变化的间隔
+            use_watchdog: 已安装 watchdog 时是否使用
+        """
+        self.files = {os.path.abspath(p) for p in files}
+        self.image_dirs = [os.path.abspath(d) for d in image_dirs if os.path.isdir(d)]
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_watchdog = use_watchdog and HAS_WATCHDOG
+        self.mode = 'watchdog' if self.use_watchdog else 'polling'
+
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._last_change = 0.0
+        self._stop = threading.Event()
+        self._observer = None
+        self._snapshot = {}
+
+    def is_relevant(self, path):
+        """只关心被监视的文件和图片目录中的图片"""
+        path = os.path.abspath(path)
+        if path in self.files:
+            return True
+        return (path.lower().endswith(IMAGE_EXTENSIONS)
+                and any(path.startswith(d + os.sep) for d in self.image_dirs))
+
+    def notify(self, path):
+        """记录一次变化（watchdog 线程或轮询调用）"""
+        if not self.is_relevant(path):
+            return
+        with self._lock:
+            self._pending.add(os.path.abspath(path))
+            self._last_change = time.monotonic()
+
+    def _take_settled(self):
+        """变化已平息时取出并清空待处理集合，否则返回None"""
+        with self._lock:
+            if not self._pending or time.monotonic() - self._last_change < self.debounce:
+                return None
+            changed, self._pending = self._pending, set()
+            return changed
+
+    def _scan(self):
+        """当前所有被监视文件的 (修改时间, 大小)"""
+        snapshot = {}
+        for path in self.files:
+            try:
+                st = os.stat(path)
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        for directory in self.image_dirs:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        try:
+                            st = os.stat(path)
+                            snapshot[path] = (st.st_mtime_ns, st.st_size)
+                        except OSError:
+                            pass
+        return snapshot
+
+    def _poll(self):
+        """对比两次扫描，新增、修改、删除都记为变化"""
+        snapshot = self._scan()
+        for path in snapshot.keys() | self._snapshot.keys():
+            if snapshot.get(path) != self._snapshot.get(path):
+                self.notify(path)
+        self._snapshot = snapshot
+
+    def _start_observer(self):
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                watcher.notify(event.src_path)
+                dest_path = getattr(event, 'dest_path', None)
+                if dest_path:
+                    watcher.notify(dest_path)  # 编辑器常用“写临时文件再改名”保存
+
+        handler = Handler()
+        self._observer = Observer()
+        for directory in {os.path.dirname(p) for p in self.files}:
+            self._observer.schedule(handler, directory, recursive=False)
+        for directory in self.image_dirs:
+            self._observer.schedule(handler, directory, recursive=True)
+        self._observer.start()
+
+    def run(self, stop_after=None):
+        """
+        阻塞运行，直到 stop() 或 Ctrl+C
+
+        Args:
+            stop_after: 回调次数达到该值后自动停止（测试用）
+        """
+        if self.use_watchdog:
+            self._start_observer()
+        else:
+            self._snapshot = self._scan()
+
+        calls = 0
+        try:
+            while not self._stop.is_set():
+                if not self.use_watchdog:
+                    self._poll()
+                changed = self._take_settled()
+                if changed:
+                    self.callback(changed)
+                    calls += 1
+                    if stop_after is not None and calls >= stop_after:
+                        break
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer.join()
+                self._observer = None
+
+    def stop(self):
+        self._stop.set()
+
+
+# ========================================================================
+# 重新生成
+# ========================================================================
+
+def load_config(config_path):
+    """读取JSON配置或大纲文本（.md/.txt 等非JSON文件按大纲解析）"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if config_path.lower().endswith('.json'):
+        return json.loads(text)
+    return parse_outline_to_json(text)
+
+
+def image_dirs_for(data, config_path):
+    """各页图片所在的目录，以及配置旁的 images 目录（如有）"""
+    dirs = set()
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(config_path)), 'images')
+    if os.path.isdir(default_dir):
+        dirs.add(default_dir)
+    for slide in data.get('slides', []):
+        if slide.get('image'):
+            dirs.add(os.path.dirname(os.path.abspath(slide['image'])))
+    return sorted(dirs)
+
+
+class DeckRegenerator:
+    """每次调用增量重新生成一次PPT；断行缓存在多次生成之间共享"""
+
+    def __init__(self, config_path, output_path, theme=None, fast_text=False, fit_text=False):
+        self.config_path = config_path
+        self.output_path = output_path
+        self.theme = theme
+        self.fast_text = fast_text
+        self.fit_text = fit_text
+        self.line_cache = LineBreakCache() if fit_text and HAS_TEXT_LAYOUT else None
+        self.runs = 0
+
+    def __call__(self):
+        """
+        重新生成（受影响的页面由增量生成的页面指纹判断）
+
+        Returns:
+            tuple: (是否成功, 消息)
+        """
+        start = time.perf_counter()
+        try:
+            data = load_config(self.config_path)
+        except (OSError, ValueError) as e:
+            # 编辑器保存到一半或JSON语法错误：保留上次的输出，等下一次保存
+            return False, f"配置读取失败: {type(e).__name__}: {e}"
+
+        theme = self.theme or data.get('metadata', {}).get('theme', 'military_solemn')
+        try:
+            with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                generator = AutoPPTGeneratorV3(theme=theme, fast_text=self.fast_text,
+                                               fit_text=self.fit_text, line_cache=self.line_cache)
+                generator.generate_from_json(data, self.output_path, incremental=True)
+        except PermissionError as e:
+            return False, f"无法写入输出文件（是否已在PowerPoint中打开？）: {e}"
+        except Exception as e:
+            return False, f"生成失败: {type(e).__name__}: {e}"
+
+        self.runs += 1
+        report = generator.incremental_report
+        elapsed = time.perf_counter() - start
+        return True, (f"{len(generator.prs.slides)}页（复用 {report['reused']}，重新渲染 {report['rendered']}）"
+                      f"，{elapsed:.2f}s")
+
+
+def watch(config_path, output_path, image_dirs=None, theme=None, fast_text=False, fit_text=False,
+          debounce=0.3, poll_interval=0.2, use_watchdog=True):
+    """
+    监视配置与图片，变化后增量重新生成PPT（阻塞，Ctrl+C 退出）
+
+    Args:
+        config_path: JSON配置或大纲文本路径
+        output_path: 输出PPT路径
+        image_dirs: 监视的图片目录（默认：各页图片所在目录 + 配置旁的 images 目录）
+    """
+    regenerate = DeckRegenerator(config_path, output_path, theme, fast_text, fit_text)
+
+    ok, msg = regenerate()
+    print(f"{'✅' if ok else '❌'} {msg}")
+
+    if image_dirs is None:
+        try:
+            image_dirs = image_dirs_for(load_config(config_path), config_path)
+        except (OSError, ValueError):
+            image_dirs = []
+
+    def on_change(changed):
+        names = ', '.join(sorted(os.path.basename(p) for p in changed)[:3])
+        more = f" 等{len(changed)}个文件" if len(changed) > 3 else ""
+        print(f"🔄 检测到变化: {names}{more}")
+        ok, msg = regenerate()
+        print(f"{'✅' if ok else '❌'} {msg}")
+
+    watcher = ChangeWatcher([config_path], image_dirs, on_change, debounce, poll_interval, use_watchdog)
+
+    print("=" * 70)
+    print(f"👀 监视中（{watcher.mode}）: {config_path}")
+    for directory in watcher.image_dirs:
+        print(f"🖼️  图片目录: {directory}")
+    print(f"📁 输出: {output_path}")
+    print("按 Ctrl+C 退出")
+    print("=" * 70)
+
+    watcher.run()
+    return regenerate.runs
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        description="监视JSON配置/大纲与图片目录，保存后自动增量重新生成PPT",
+        epilog="示例: python watch_generate.py deck.json -o deck.pptx"
+    )
+    parser.add_argument('config', help="JSON配置或大纲文本（.md/.txt）")
+    parser.add_argument('-o', '--output', default=None, help="输出PPT路径（默认与配置同名）")
+    parser.add_argument('-t', '--theme', choices=list(AutoPPTGeneratorV3.THEMES.keys()),
+                        help="主题（默认使用JSON中的主题）")
+    parser.add_argument('--images', action='append', default=None, help="监视的图片目录（可多次指定）")
+    parser.add_argument('--debounce', type=float, default=0.3, help="合并连续变化的等待秒数（默认: 0.3）")
+    parser.add_argument('--poll-interval', type=float, default=0.2, help="轮询间隔秒数（默认: 0.2）")
+    parser.add_argument('--polling', action='store_true', help="不使用watchdog，强制轮询")
+    parser.add_argument('--fast-text', action='store_true', help="文本直接生成XML（输出不变，更快）")
+    parser.add_argument('--fit-text', action='store_true', help="按字体度量选取要点与标题字号")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.config):
+        print(f"❌ 文件不存在: {args.config}")
+        return 1
+
+    output = args.output or os.path.splitext(args.config)[0] + '.pptx'
+    watch(args.config, output, args.images, args.theme, args.fast_text, args.fit_text,
+          args.debounce, args.poll_interval, not args.polling)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())